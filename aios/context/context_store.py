@@ -0,0 +1,331 @@
+# This implements the store of suspended generation contexts.
+# Contexts of preempted or timed-out generations (token ids and KV caches of
+# Hugging Face models, partial outputs of API models) are kept in memory up
+# to a byte budget. Colder contexts are spilled to local disk and memory
+# mapped back when their process resumes, and contexts of processes that
+# never resume are dropped after a TTL.
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+SPILL_DIR_PREFIX = "spill-"
+
+
+def context_nbytes(value: Any) -> int:
+    """
+    Estimate the memory held by a saved context.
+
+    Args:
+        value: Tensors, strings, or dicts, lists and tuples of them
+
+    Returns:
+        Bytes of the tensor storage and text in the context
+    """
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, dict):
+        return sum(context_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(context_nbytes(item) for item in value)
+    return 0
+
+
+def _map_tensors(value: Any, fn) -> Any:
+    """Apply fn to every tensor of a context, keeping its structure."""
+    if isinstance(value, torch.Tensor):
+        return fn(value)
+    if isinstance(value, dict):
+        return {key: _map_tensors(item, fn) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_map_tensors(item, fn) for item in value)
+    return value
+
+
+def _find_device(value: Any) -> Optional[torch.device]:
+    """Device of the first tensor of a context, None if it holds no tensor."""
+    if isinstance(value, torch.Tensor):
+        return value.device
+    items = value.values() if isinstance(value, dict) else value if isinstance(value, (list, tuple)) else ()
+    for item in items:
+        device = _find_device(item)
+        if device is not None:
+            return device
+    return None
+
+
+class ContextStore:
+    """
+    Bounded store of suspended generation contexts, keyed by process id.
+
+    Contexts are kept in memory, least recently used first, while their total
+    size stays within `max_memory_bytes`. Beyond the budget the coldest ones
+    are written to `spill_dir` with torch.save and removed from memory; a
+    later get memory-maps the file, moves the tensors back to the device they
+    were saved from and makes the context resident again. Without a spill
+    directory the coldest contexts are dropped instead, and their processes
+    restart generation from the prompt.
+
+    Contexts not touched for `ttl` seconds, in memory or on disk, belong to
+    processes that will not resume and are removed whenever the store is
+    used (or on collect_garbage()). Contexts must hold tensors in plain
+    containers (e.g. KV caches in the legacy tuple layout).
+
+    Example:
+        ```python
+        store = ContextStore(max_memory_bytes=2 * 1024 ** 3, spill_dir="/tmp/aios", ttl=1800)
+
+        store.put(pid, {"generated_tokens": tokens, "past_key_values": legacy, "start_idx": 128})
+        context = store.get(pid)   # reloaded from disk if it was spilled
+        store.pop(pid)
+        store.get_metrics()
+        ```
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = 2 * 1024 ** 3,
+        spill_dir: Optional[str] = None,
+        ttl: Optional[float] = 1800
+    ):
+        """
+        Initialize the context store.
+
+        Args:
+            max_memory_bytes: Memory budget for resident contexts
+            spill_dir: Directory to spill cold contexts to, None to drop them instead
+            ttl: Seconds after their last use at which contexts are dropped, None to keep them
+        """
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl = ttl
+
+        self.spill_dir = None
+        if spill_dir is not None:
+            spill_dir = os.path.expanduser(spill_dir)
+            os.makedirs(spill_dir, exist_ok=True)
+            self._remove_stale_spills(spill_dir)
+            # A directory of its own, so stores sharing spill_dir do not collide
+            self.spill_dir = tempfile.mkdtemp(prefix=SPILL_DIR_PREFIX, dir=spill_dir)
+
+        # key -> (context, bytes, last use), least recently used first
+        self.resident: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        # key -> (file path, bytes, last use, device), in spill order
+        self.spilled: "OrderedDict[str, Tuple[str, int, float, Optional[torch.device]]]" = OrderedDict()
+        self.resident_bytes = 0
+        self.spilled_bytes = 0
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.spills = 0
+        self.reloads = 0
+        self.expired = 0
+        self.dropped = 0
+
+    def _remove_stale_spills(self, spill_dir: str) -> None:
+        """Remove spill directories of earlier runs that outlived the TTL."""
+        if self.ttl is None:
+            return
+        now = time.time()
+        for name in os.listdir(spill_dir):
+            path = os.path.join(spill_dir, name)
+            try:
+                if name.startswith(SPILL_DIR_PREFIX) and os.path.isdir(path) and now - os.path.getmtime(path) > self.ttl:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                continue
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".pt")
+
+    def _remove_spilled(self, key: str) -> Optional[Tuple[str, int, float, Optional[torch.device]]]:
+        entry = self.spilled.pop(key, None)
+        if entry is not None:
+            self.spilled_bytes -= entry[1]
+            try:
+                os.remove(entry[0])
+            except OSError:
+                pass
+        return entry
+
+    def _remove_resident(self, key: str) -> Optional[Tuple[Any, int, float]]:
+        entry = self.resident.pop(key, None)
+        if entry is not None:
+            self.resident_bytes -= entry[1]
+        return entry
+
+    def _evict(self) -> None:
+        """Spill (or drop) the coldest contexts until the resident ones fit the budget."""
+        while self.resident_bytes > self.max_memory_bytes and self.resident:
+            key, (value, nbytes, last_used) = self.resident.popitem(last=False)
+            self.resident_bytes -= nbytes
+            if self.spill_dir is None:
+                self.dropped += 1
+                logger.warning(f"Context store over budget, dropping the context of process {key}.")
+                continue
+            path = self._spill_path(key)
+            try:
+                torch.save(_map_tensors(value, lambda tensor: tensor.detach().cpu()), path)
+            except Exception as e:
+                self.dropped += 1
+                logger.warning(f"Failed to spill the context of process {key}, dropping it: {e}")
+                continue
+            self.spilled[key] = (path, nbytes, last_used, _find_device(value))
+            self.spilled_bytes += nbytes
+            self.spills += 1
+
+    def _expire(self, now: float) -> None:
+        """Drop contexts whose last use is older than the TTL (both orders are by last use)."""
+        if self.ttl is None:
+            return
+        while self.resident and now - next(iter(self.resident.values()))[2] > self.ttl:
+            key = next(iter(self.resident))
+            self._remove_resident(key)
+            self.expired += 1
+        while self.spilled and now - next(iter(self.spilled.values()))[2] > self.ttl:
+            key = next(iter(self.spilled))
+            self._remove_spilled(key)
+            self.expired += 1
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Save the context of a process, replacing any earlier one.
+
+        Args:
+            key: Process id
+            value: The context to save
+        """
+        key = str(key)
+        nbytes = context_nbytes(value)
+        now = time.time()
+        with self.lock:
+            self._remove_resident(key)
+            self._remove_spilled(key)
+            self.resident[key] = (value, nbytes, now)
+            self.resident_bytes += nbytes
+            self._expire(now)
+            self._evict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Get the saved context of a process, reloading it from disk if it was spilled.
+
+        Args:
+            key: Process id
+
+        Returns:
+            The saved context, or None if there is none (never saved, expired or dropped)
+        """
+        key = str(key)
+        now = time.time()
+        with self.lock:
+            self._expire(now)
+            entry = self.resident.get(key)
+            if entry is not None:
+                self.resident[key] = (entry[0], entry[1], now)
+                self.resident.move_to_end(key)
+                return entry[0]
+
+            spilled = self.spilled.get(key)
+            if spilled is None:
+                return None
+            path, nbytes, _, device = spilled
+            try:
+                value = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+                if device is not None and device.type != "cpu":
+                    value = _map_tensors(value, lambda tensor: tensor.to(device))
+            except Exception as e:
+                logger.warning(f"Failed to reload the context of process {key}: {e}")
+                self._remove_spilled(key)
+                self.dropped += 1
+                return None
+            self._remove_spilled(key)
+            self.reloads += 1
+            self.resident[key] = (value, nbytes, now)
+            self.resident_bytes += nbytes
+            self._evict()
+            return value
+
+    def pop(self, key: Any) -> None:
+        """
+        Remove the saved context of a process from memory and disk.
+
+        Args:
+            key: Process id
+        """
+        key = str(key)
+        with self.lock:
+            self._remove_resident(key)
+            self._remove_spilled(key)
+
+    def __contains__(self, key: Any) -> bool:
+        key = str(key)
+        with self.lock:
+            return key in self.resident or key in self.spilled
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.resident) + len(self.spilled)
+
+    def collect_garbage(self) -> None:
+        """Drop every context not used within the TTL."""
+        with self.lock:
+            self._expire(time.time())
+
+    def clear(self) -> None:
+        """Remove every saved context from memory and disk."""
+        with self.lock:
+            for key in list(self.spilled):
+                self._remove_spilled(key)
+            self.resident.clear()
+            self.resident_bytes = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the store's statistics.
+
+        Returns:
+            Dict with resident and spilled contexts and bytes, the memory budget,
+            and counts of spills, reloads, expired and dropped contexts
+
+        Example:
+            ```python
+            store.get_metrics()
+            # Returns:
+            # {
+            #     "resident_contexts": 6,
+            #     "resident_bytes": 1932735283,
+            #     "spilled_contexts": 3,
+            #     "spilled_bytes": 1181116006,
+            #     "max_memory_bytes": 2147483648,
+            #     "spills": 12,
+            #     "reloads": 9,
+            #     "expired": 1,
+            #     "dropped": 0
+            # }
+            ```
+        """
+        with self.lock:
+            self._expire(time.time())
+            return {
+                "resident_contexts": len(self.resident),
+                "resident_bytes": self.resident_bytes,
+                "spilled_contexts": len(self.spilled),
+                "spilled_bytes": self.spilled_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "spills": self.spills,
+                "reloads": self.reloads,
+                "expired": self.expired,
+                "dropped": self.dropped,
+            }
@@ -2,16 +2,24 @@
 # The file is used in the BaseLLM class and the RRScheduler class.
 
 from aios.context.base import BaseContextManager
+from aios.context.context_store import ContextStore
+from aios.config.config_manager import config
 
+import litellm
 from litellm import completion
 
 from openai import OpenAI
 
 import time
 import torch
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
 
 from ..llm_core.utils import decode_litellm_tool_calls, merge_messages_with_tools, merge_messages_with_response_format
+from ..llm_core.hf_batching import cache_from_legacy, cache_to_legacy
+from ..llm_core.tokens import get_token_counter
+
+# Asked of models that cannot natively continue a partial assistant message
+CONTINUATION_PROMPT = "Continue your previous response exactly where it stopped, without repeating any of it."
 
 class SimpleContextManager(BaseContextManager):
     """
@@ -44,10 +52,23 @@ class SimpleContextManager(BaseContextManager):
     """
     def __init__(self):
         """
-        Initialize the SimpleContextManager with an empty context dictionary.
+        Initialize the SimpleContextManager with an empty context store.
+
+        The store is configured by llms.context_store in config.yaml: its
+        memory budget (max_memory_mb), the TTL of abandoned contexts (ttl) and
+        whether and where cold contexts are spilled (spill, spill_dir, which
+        defaults to the context restoration directory).
         """
         BaseContextManager.__init__(self)
-        self.context_dict = {}
+        store_config = config.get_llms_config().get("context_store", {}) or {}
+        spill_dir = None
+        if store_config.get("spill", True):
+            spill_dir = store_config.get("spill_dir") or self.context_dir
+        self.context_store = ContextStore(
+            max_memory_bytes=int(store_config.get("max_memory_mb", 2048) * 1024 * 1024),
+            spill_dir=spill_dir,
+            ttl=store_config.get("ttl", 1800)
+        )
 
     def get_streaming_completion_response(
             self, 
@@ -58,7 +79,9 @@ class SimpleContextManager(BaseContextManager):
             temperature: float,
             max_tokens: int,
             response_format: Optional[Dict[str, Any]] = None,
-            stream: bool = True
+            stream: bool = True,
+            api_base: Optional[str] = None,
+            extra_body: Optional[Dict[str, Any]] = None
         ) -> Any:
         """
         Get a completion response from either litellm or OpenAI client.
@@ -71,6 +94,8 @@ class SimpleContextManager(BaseContextManager):
             temperature: Temperature setting for generation
             response_format: Optional format specification for the response
             stream: Whether to stream the response
+            api_base: Optional API base URL for string-based models
+            extra_body: Optional extra request fields for the OpenAI client
             
         Returns:
             The completion response object
@@ -93,6 +118,9 @@ class SimpleContextManager(BaseContextManager):
                 
             if response_format and stream:
                 kwargs["response_format"] = response_format
+            
+            if api_base:
+                kwargs["api_base"] = api_base
                 
             return completion(**kwargs)
         else:
@@ -110,14 +138,56 @@ class SimpleContextManager(BaseContextManager):
                 
             if response_format and not stream:
                 kwargs["response_format"] = response_format
+            
+            if extra_body:
+                kwargs["extra_body"] = extra_body
                 
             return model_or_client.chat.completions.create(**kwargs)
 
+    def _continuation_request(
+            self,
+            model_or_client: Union[str, OpenAI],
+            messages: List[Dict[str, str]],
+            partial: str
+        ) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        Build the request that continues a partial response of a previous time slice.
+        
+        The partial output is appended as an assistant message. Servers behind
+        the OpenAI client (vLLM, SGLang) continue it natively with
+        `continue_final_message`; litellm models that support assistant prefill
+        continue it as a prefix; other models are asked to carry on after it.
+        
+        Args:
+            model_or_client: Either a model name string or OpenAI client
+            messages: Original messages of the request
+            partial: Output generated by the previous slices
+            
+        Returns:
+            Tuple of (messages, extra_body for the OpenAI client)
+        """
+        if not isinstance(model_or_client, str):
+            continued = messages + [{"role": "assistant", "content": partial}]
+            return continued, {"continue_final_message": True, "add_generation_prompt": False}
+        
+        try:
+            supports_prefill = litellm.get_model_info(model_or_client).get("supports_assistant_prefill", False)
+        except Exception:
+            supports_prefill = False
+        
+        if supports_prefill:
+            return messages + [{"role": "assistant", "content": partial, "prefix": True}], None
+        return messages + [
+            {"role": "assistant", "content": partial},
+            {"role": "user", "content": CONTINUATION_PROMPT}
+        ], None
+
     def process_completion_streaming_response(
             self, 
             response: Any, 
             initial_content: str,
-            time_limit: float
+            time_limit: Optional[float],
+            on_delta: Optional[Callable[[str], None]] = None
         ) -> Tuple[str, bool]:
         """
         Process a streaming response with time limit enforcement.
@@ -126,6 +196,7 @@ class SimpleContextManager(BaseContextManager):
             response: The streaming response object
             initial_content: Initial content to start with
             time_limit: Maximum time in seconds to allow for generation
+            on_delta: Optional callback receiving each text delta as it arrives
             
         Returns:
             Tuple of (completed_response, finished)
@@ -137,8 +208,10 @@ class SimpleContextManager(BaseContextManager):
         for part in response:
             delta_content = part.choices[0].delta.content or ""
             completed_response += delta_content
+            if on_delta and delta_content:
+                on_delta(delta_content)
             
-            if time.time() - start_time > time_limit:
+            if time_limit is not None and time.time() - start_time > time_limit:
                 if part.choices[0].finish_reason is None:
                     finished = False
                 break
@@ -167,17 +240,27 @@ class SimpleContextManager(BaseContextManager):
             max_tokens: int,
             temperature: float, 
             pid: int,
-            time_limit: float
+            time_limit: Optional[float],
+            on_delta: Optional[Callable[[str], None]] = None,
+            should_yield: Optional[Callable[[], bool]] = None
         ) -> Tuple[str, bool, Dict]:
         """
         Generate text with a HuggingFace model with time limit enforcement.
         
+        Decoding is incremental: the prompt is prefilled once and every later
+        step feeds only the newest token together with the KV cache. When the
+        time limit interrupts generation, or `should_yield` reports that a
+        scheduler preempted the call, the cache is saved with the tokens so the
+        next slice continues where this one stopped.
+        
         Args:
             model: The HuggingFace model instance
             messages: List of message dictionaries
             max_tokens: Maximum number of tokens to generate
             temperature: Temperature setting for generation
-            time_limit: Maximum time in seconds for generation
+            time_limit: Maximum time in seconds for generation, None for no limit
+            on_delta: Optional callback receiving each newly decoded piece of text
+            should_yield: Optional check, polled every step, that interrupts generation when True
             
         Returns:
             Tuple of (result, finished, generation_state)
@@ -190,6 +273,8 @@ class SimpleContextManager(BaseContextManager):
             start_idx = context_data["start_idx"]
             generated_tokens = context_data["generated_tokens"]
             past_key_values = context_data["past_key_values"]
+            if past_key_values is not None:
+                past_key_values = cache_from_legacy(past_key_values)
             input_length = context_data["input_length"]
         else:
             start_idx = 0
@@ -213,25 +298,53 @@ class SimpleContextManager(BaseContextManager):
             generated_tokens = inputs["input_ids"].clone()
             past_key_values = None
         
+        # Only a generation that still has to prefill can use or fill the prefix cache
+        prefix_cache = getattr(model, "prefix_cache", None) if past_key_values is None else None
+        prefix, reused = (None, 0)
+        if prefix_cache is not None:
+            prefix, reused = prefix_cache.lookup(generated_tokens)
+        
+        # Text already handed to on_delta, so only the new suffix is emitted
+        emitted_text = ""
+        if on_delta is not None:
+            emitted_text = model.tokenizer.decode(generated_tokens[0][input_length:], skip_special_tokens=True)
+        
         # Initialize timing and completion flags
         # breakpoint()
         
         start_time = time.time()
         finished = True
         
-        # Generate tokens incrementally with time checking
+        # Generate tokens incrementally with time checking. The KV cache always
+        # covers every token except the last one, so after the prefill each
+        # step only feeds the newest token.
         for i in range(start_idx, max_tokens):
-            # Check time limit
-            if time.time() - start_time > time_limit:
+            # Check time limit and preemption
+            timed_out = time_limit is not None and time.time() - start_time > time_limit
+            if timed_out or (should_yield is not None and i > start_idx and should_yield()):
                 finished = False
+                start_idx = i
                 break
             
             # breakpoint()
             
+            prefill = past_key_values is None
+            if prefill and prefix is not None:
+                # Prefill only the tokens after the cached prompt prefix
+                past_key_values = cache_from_legacy(prefix)
+                step_input = generated_tokens[:, reused:]
+            elif prefill:
+                # Prefill: run the whole prompt once to build the cache
+                step_input = generated_tokens
+            else:
+                step_input = generated_tokens[:, -1:]
+            
             # Forward pass
             with torch.no_grad():
                 outputs = model.model(
-                    generated_tokens,
+                    step_input,
+                    past_key_values=past_key_values,
+                    use_cache=True,
                     return_dict=True,
                     output_attentions=False,
                     output_hidden_states=False
@@ -258,6 +371,15 @@ class SimpleContextManager(BaseContextManager):
             # Update past key values
             past_key_values = outputs.past_key_values
             
+            if prefix_cache is not None and prefill:
+                prefix_cache.insert(generated_tokens[:, :input_length], cache_to_legacy(past_key_values))
+            
+            if on_delta is not None:
+                text = model.tokenizer.decode(generated_tokens[0][input_length:], skip_special_tokens=True)
+                if len(text) > len(emitted_text):
+                    on_delta(text[len(emitted_text):])
+                    emitted_text = text
+            
             # Check if EOS token was generated
             if next_token.item() == model.tokenizer.eos_token_id:
                 finished = True
@@ -271,14 +393,16 @@ class SimpleContextManager(BaseContextManager):
         
         # breakpoint()
         # Prepare generation state for potential resumption
-        # Only store the necessary vectors, not the decoded text
+        # Only store the necessary vectors, not the decoded text. The KV cache
+        # is kept so the next slice resumes decoding without a new prefill, in
+        # the legacy layout so the context store can size and spill it.
         if not finished:
-            self.context_dict[str(pid)] = {
+            self.context_store.put(pid, {
                 "generated_tokens": generated_tokens,
-                "past_key_values": past_key_values,
+                "past_key_values": cache_to_legacy(past_key_values) if past_key_values is not None else None,
                 "start_idx": start_idx,
                 "input_length": input_length
-            }
+            })
         else:
             self.clear_context(str(pid))
         
@@ -294,8 +418,11 @@ class SimpleContextManager(BaseContextManager):
             temperature: float, 
             max_tokens: int,
             pid: Union[int, str], 
-            time_limit: float,
-            response_format: Optional[Dict[str, Any]] = None
+            time_limit: Optional[float],
+            response_format: Optional[Dict[str, Any]] = None,
+            api_base: Optional[str] = None,
+            on_delta: Optional[Callable[[str], None]] = None,
+            should_yield: Optional[Callable[[], bool]] = None
         ) -> Tuple[Any, bool]:
         """
         Save the context of an LLM generation.
@@ -313,8 +440,11 @@ class SimpleContextManager(BaseContextManager):
             temperature (float): Temperature setting for generation
             max_tokens (int): Maximum number of tokens to generate
             pid (int): Process ID to associate with this context
-            time_limit (float): Maximum time in seconds to allow for generation
+            time_limit (float, optional): Maximum time in seconds to allow for generation, None for no limit
             response_format (dict, optional): Format specification for the response
+            api_base (str, optional): API base URL for string-based models
+            on_delta (callable, optional): Callback receiving text deltas as they are generated
+            should_yield (callable, optional): Preemption check of Hugging Face generations
             
         Returns:
             tuple: (completed_response, finished)
@@ -332,7 +462,9 @@ class SimpleContextManager(BaseContextManager):
                     temperature=temperature,
                     max_tokens=max_tokens,
                     time_limit=time_limit,
-                    pid=pid
+                    pid=pid,
+                    on_delta=on_delta,
+                    should_yield=should_yield
                 )
             elif message_return_type == "json":
                 messages_with_response_format = merge_messages_with_response_format(messages, response_format)
@@ -342,7 +474,9 @@ class SimpleContextManager(BaseContextManager):
                     temperature=temperature,
                     max_tokens=max_tokens,
                     time_limit=time_limit,
-                    pid=pid 
+                    pid=pid,
+                    on_delta=on_delta,
+                    should_yield=should_yield
                 )
             else:
                 completed_response, finished = self.generate_with_time_limit_hf(
@@ -351,21 +485,24 @@ class SimpleContextManager(BaseContextManager):
                     temperature=temperature,
                     max_tokens=max_tokens,
                     time_limit=time_limit,
-                    pid=pid
+                    pid=pid,
+                    on_delta=on_delta,
+                    should_yield=should_yield
                 )
             
             return completed_response, finished
             
         # Handle tool calls (non-streaming)
         if tools:
-            response = self._get_completion_response(
+            response = self.get_streaming_completion_response(
                 model_or_client=model,
                 model_name=model_name,
                 messages=messages,
                 tools=tools,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                stream=False
+                stream=False,
+                api_base=api_base
             )
             
             # Process tool calls response
@@ -377,31 +514,41 @@ class SimpleContextManager(BaseContextManager):
                 
             return completed_response, True
         
+        # Resume from the output of the previous slice instead of regenerating it,
+        # generating only what is left of the token budget
+        saved = self.load_context(pid)
+        partial = saved if isinstance(saved, str) else ""
+        request_messages, extra_body, remaining_tokens = messages, None, max_tokens
+        if partial:
+            request_messages, extra_body = self._continuation_request(model, messages, partial)
+            if max_tokens:
+                remaining_tokens = max(1, max_tokens - get_token_counter().count_text(partial, model_name))
+        
         # Handle streaming text or JSON responses
         stream_response = self.get_streaming_completion_response(
             model_or_client=model,
             model_name=model_name,
-            messages=messages,
+            messages=request_messages,
             tools=None,
             temperature=temperature,
-            max_tokens=max_tokens,
+            max_tokens=remaining_tokens,
             response_format=response_format if message_return_type == "json" else None,
-            stream=True
+            stream=True,
+            api_base=api_base,
+            extra_body=extra_body
         )
         
-        # Get initial content from the last message
-        initial_content = messages[-1]["content"] if messages and "content" in messages[-1] else ""
-        
         # Process the streaming response
-        completed_response, finished = self.process_streaming_completion_response(
+        completed_response, finished = self.process_completion_streaming_response(
             response=stream_response,
-            initial_content=initial_content,
-            time_limit=time_limit
+            initial_content=partial,
+            time_limit=time_limit,
+            on_delta=on_delta
         )
         
         if not finished:
-            # Store the response
-            self.context_dict[str(pid)] = completed_response
+            # Store the partial output for the next slice to continue
+            self.context_store.put(pid, completed_response)
         else:
             self.clear_context(str(pid))
         return completed_response, finished
@@ -425,7 +572,7 @@ class SimpleContextManager(BaseContextManager):
         Raises:
             TypeError: If the context and model types are incompatible
         """
-        context_data = self.context_dict.get(str(pid), None)
+        context_data = self.context_store.get(pid)
         return context_data
 
     def clear_context(self, pid):
@@ -438,6 +585,5 @@ class SimpleContextManager(BaseContextManager):
         Returns:
             None
         """
-        if str(pid) in self.context_dict:
-            self.context_dict.pop(str(pid))
+        self.context_store.pop(pid)
         return
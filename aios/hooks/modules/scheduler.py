@@ -23,6 +23,9 @@ from aios.hooks.utils.validate import validate
 from aios.hooks.stores import queue as QueueStore, processes as ProcessStore
 from aios.scheduler.fifo_scheduler import FIFOScheduler
 from aios.scheduler.rr_scheduler import RRScheduler
+from aios.scheduler.priority_scheduler import PriorityScheduler
+from aios.scheduler.sjf_scheduler import SJFScheduler
+from aios.scheduler.fair_share_scheduler import FairShareScheduler
 
 
 @validate(SchedulerParams)
@@ -198,4 +201,90 @@ def rr_scheduler_nonblock(params: SchedulerParams):
     
     scheduler = RRScheduler(**params.model_dump())
 
-    return scheduler
\ No newline at end of file
+    return scheduler
+
+@validate(SchedulerParams)
+def priority_scheduler_nonblock(params: SchedulerParams):
+    """
+    Create a preemptive priority scheduler without starting it.
+
+    Args:
+        params (SchedulerParams): The parameters for the scheduler.
+    """
+    if params.get_llm_syscall is None:
+        from aios.hooks.stores._global import global_llm_req_queue_get_message
+        params.get_llm_syscall = global_llm_req_queue_get_message
+
+    if params.get_memory_syscall is None:
+        from aios.hooks.stores._global import global_memory_req_queue_get_message
+        params.get_memory_syscall = global_memory_req_queue_get_message
+    
+    if params.get_storage_syscall is None:
+        from aios.hooks.stores._global import global_storage_req_queue_get_message
+        params.get_storage_syscall = global_storage_req_queue_get_message
+        
+    if params.get_tool_syscall is None:
+        from aios.hooks.stores._global import global_tool_req_queue_get_message
+        params.get_tool_syscall = global_tool_req_queue_get_message
+    
+    scheduler = PriorityScheduler(**params.model_dump())
+
+    return scheduler
+
+
+@validate(SchedulerParams)
+def sjf_scheduler_nonblock(params: SchedulerParams):
+    """
+    Create a shortest-job-first scheduler without starting it.
+
+    Args:
+        params (SchedulerParams): The parameters for the scheduler.
+    """
+    if params.get_llm_syscall is None:
+        from aios.hooks.stores._global import global_llm_req_queue_get_message
+        params.get_llm_syscall = global_llm_req_queue_get_message
+
+    if params.get_memory_syscall is None:
+        from aios.hooks.stores._global import global_memory_req_queue_get_message
+        params.get_memory_syscall = global_memory_req_queue_get_message
+    
+    if params.get_storage_syscall is None:
+        from aios.hooks.stores._global import global_storage_req_queue_get_message
+        params.get_storage_syscall = global_storage_req_queue_get_message
+        
+    if params.get_tool_syscall is None:
+        from aios.hooks.stores._global import global_tool_req_queue_get_message
+        params.get_tool_syscall = global_tool_req_queue_get_message
+    
+    scheduler = SJFScheduler(**params.model_dump())
+
+    return scheduler
+
+
+@validate(SchedulerParams)
+def fair_share_scheduler_nonblock(params: SchedulerParams):
+    """
+    Create a fair-share (deficit round robin) scheduler without starting it.
+
+    Args:
+        params (SchedulerParams): The parameters for the scheduler.
+    """
+    if params.get_llm_syscall is None:
+        from aios.hooks.stores._global import global_llm_req_queue_get_message
+        params.get_llm_syscall = global_llm_req_queue_get_message
+
+    if params.get_memory_syscall is None:
+        from aios.hooks.stores._global import global_memory_req_queue_get_message
+        params.get_memory_syscall = global_memory_req_queue_get_message
+    
+    if params.get_storage_syscall is None:
+        from aios.hooks.stores._global import global_storage_req_queue_get_message
+        params.get_storage_syscall = global_storage_req_queue_get_message
+        
+    if params.get_tool_syscall is None:
+        from aios.hooks.stores._global import global_tool_req_queue_get_message
+        params.get_tool_syscall = global_tool_req_queue_get_message
+    
+    scheduler = FairShareScheduler(**params.model_dump())
+
+    return scheduler
@@ -1,12 +1,25 @@
 from queue import Queue
-from typing import List
+from typing import List, Optional
 REQUEST_QUEUE: dict[str, Queue] = {}
 # REQUEST_QUEUE: dict[str, []] = {}
 
+# Marker put on a queue to wake a blocked consumer during shutdown
+_SHUTDOWN = object()
 
-def getMessage(q: List):
-    return q.get(block=True, timeout=0.1)
+
+class QueueShutdown(Exception):
+    """Raised by getMessage when the queue has been shut down."""
+    pass
+
+
+def getMessage(q: List, timeout: Optional[float] = None):
     # return q.pop(0)
+    # Block until a message arrives instead of polling. A timeout is only
+    # used by callers that close a batch window, and raises queue.Empty.
+    message = q.get(block=True, timeout=timeout)
+    if message is _SHUTDOWN:
+        raise QueueShutdown()
+    return message
 
 def addMessage(q: List, message: str):
     # q.append(message)
@@ -15,4 +28,13 @@ def addMessage(q: List, message: str):
 
 def isEmpty(q: List):
     # return len(q) == 0
-    return q.empty()
\ No newline at end of file
+    return q.empty()
+
+def shutdown(q: List):
+    q.put(_SHUTDOWN)
+    return None
+
+def shutdownAll():
+    for q in REQUEST_QUEUE.values():
+        shutdown(q)
+    return None
@@ -1,5 +1,5 @@
 from aios.context.simple_context import SimpleContextManager
-from aios.llm_core.routing import RouterStrategy, SequentialRouting, SmartRouting
+from aios.llm_core.routing import RouterStrategy, SequentialRouting, SmartRouting, LoadAwareRouting, ModelLoadTracker
 from aios.llm_core.local import HfLocalBackend
 from aios.utils.id_generator import generator_tool_call_id
 from cerebrum.llm.apis import LLMQuery, LLMResponse
@@ -14,12 +14,17 @@ from aios.config.config_manager import config
 from dataclasses import dataclass
 import logging
 from typing import Any
+import asyncio
 import concurrent.futures
-from collections import defaultdict
+import threading
 from concurrent.futures import ThreadPoolExecutor
 import traceback
 import litellm
 from .utils import check_availability_for_selected_llm_lists
+from .async_engine import AsyncLLMEngine
+from .cache import ResponseCache, make_cache_key
+from .semantic_cache import SemanticCache
+from .tokens import get_token_counter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -39,6 +44,8 @@ class LLMConfig:
         eval_device (Optional[str]): Device for model evaluation
         hostname (Optional[str]): Hostname for the LLM service
         api_key (Optional[str]): API key for the LLM
+        max_concurrency (Optional[int]): Maximum number of concurrent requests to the model
+        weight (float): Share of traffic among replicas of the same model under weighted balancing
     
     Example:
         ```python
@@ -54,6 +61,8 @@ class LLMConfig:
     eval_device: Optional[str] = None
     hostname: Optional[str] = None
     api_key: Optional[str] = None
+    max_concurrency: Optional[int] = None
+    weight: float = 1.0
 
 class LLMAdapter:
     """
@@ -111,21 +120,97 @@ class LLMAdapter:
         self.llm_configs = llm_configs
         self.llms = []
         
+        # Long-lived worker pools, one per model index
+        self.model_executors: Dict[int, ThreadPoolExecutor] = {}
+        self.executor_lock = threading.Lock()
+        
+        # Remote models run as coroutines on a shared event loop when enabled
+        self.async_engine: Optional[AsyncLLMEngine] = None
+        if config.get_llms_config().get("use_async_engine", True):
+            self.async_engine = AsyncLLMEngine(
+                max_connections=config.get_llms_config().get("async_max_connections", 256)
+            )
+            self.async_engine.start()
+        
+        # Identical in-flight requests share one upstream call: key -> (leader, followers)
+        coalescing_config = config.get_llms_config().get("request_coalescing", {}) or {}
+        self.coalescing_enabled = coalescing_config.get("enabled", False) and not use_context_manager
+        self.coalesce_sampled = coalescing_config.get("include_sampled", False)
+        self.inflight_requests: Dict[str, tuple] = {}
+        self.inflight_lock = threading.Lock()
+        self.coalesced_count = 0
+        
+        # Opt-in cache of deterministic (temperature 0) responses
+        self.response_cache: Optional[ResponseCache] = None
+        cache_config = config.get_llms_config().get("response_cache", {}) or {}
+        if cache_config.get("enabled", False):
+            disk_config = cache_config.get("disk", {}) or {}
+            self.response_cache = ResponseCache(
+                ttl=cache_config.get("ttl", 3600),
+                max_entries=cache_config.get("max_entries", 1024),
+                max_bytes=int(cache_config.get("max_memory_mb", 64)) * 1024 * 1024,
+                disk_path=disk_config.get("path") if disk_config.get("enabled", False) else None,
+                disk_max_entries=disk_config.get("max_entries", 10000)
+            )
+        
+        # Opt-in cache answering near-duplicate questions by embedding similarity
+        self.semantic_cache: Optional[SemanticCache] = None
+        self.semantic_pending: Dict[int, Any] = {}
+        # ids of dispatched syscalls answered from the semantic cache by their worker
+        self.semantic_hits: set = set()
+        semantic_config = config.get_llms_config().get("semantic_cache", {}) or {}
+        if semantic_config.get("enabled", False):
+            try:
+                self.semantic_cache = SemanticCache(
+                    model_name=semantic_config.get("embedding_model", "all-MiniLM-L6-v2"),
+                    threshold=semantic_config.get("threshold", 0.95),
+                    scope=semantic_config.get("scope", "agent_model"),
+                    max_entries_per_scope=semantic_config.get("max_entries_per_scope", 1000),
+                    max_scopes=semantic_config.get("max_scopes", 256),
+                    ttl=semantic_config.get("ttl", None)
+                )
+            except Exception as e:
+                logger.error(f"Failed to initialize semantic cache, continuing without it: {e}")
+        
         self._setup_api_keys()
         self._initialize_llms()
         
+        # Live per-model load shared with the router
+        self.load_tracker = ModelLoadTracker()
+        rate_limits = config.get_router_config().get("rate_limits", {}) or {}
+        for model_idx, llm_config in enumerate(self.llm_configs):
+            self.load_tracker.set_limits(
+                model_idx,
+                concurrency=self._get_concurrency_limit(llm_config),
+                requests_per_minute=rate_limits.get(llm_config.name)
+            )
+        
         routing_strategy = config.get_router_config().get("strategy", RouterStrategy.Sequential)
         
         # breakpoint()
         
         if routing_strategy == RouterStrategy.Sequential:
             self.router = SequentialRouting(
-                llm_configs=self.llm_configs
+                llm_configs=self.llm_configs,
+                load_tracker=self.load_tracker,
+                balancing=config.get_router_config().get("balancing", "round_robin")
             )
         elif routing_strategy == RouterStrategy.Smart:
+            router_config = config.get_router_config()
             self.router = SmartRouting(
                 llm_configs=self.llm_configs,
-                bootstrap_url=config.get_router_config().get("bootstrap_url", None)
+                bootstrap_url=router_config.get("bootstrap_url", None),
+                load_tracker=self.load_tracker,
+                assignment=router_config.get("assignment", "greedy"),
+                solver_time_limit=router_config.get("solver_time_limit", 0.05),
+                balance_weight=router_config.get("balance_weight", 0.1),
+                background_init=router_config.get("background_init", True)
+            )
+        elif routing_strategy == RouterStrategy.LoadAware:
+            self.router = LoadAwareRouting(
+                llm_configs=self.llm_configs,
+                load_tracker=self.load_tracker,
+                default_output_tokens=config.get_router_config().get("default_output_tokens", 256)
             )
             
         else:
@@ -178,7 +263,9 @@ class LLMAdapter:
                     max_gpu_memory=config_dict.get("max_gpu_memory"),
                     eval_device=config_dict.get("eval_device"),
                     hostname=config_dict.get("hostname"),
-                    api_key=config_dict.get("api_key")
+                    api_key=config_dict.get("api_key"),
+                    max_concurrency=config_dict.get("max_concurrency"),
+                    weight=config_dict.get("weight", 1.0)
                 )
                 if not llm_config.name or not llm_config.backend:
                     logger.warning(f"Skipping incomplete LLM config: {config_dict}")
@@ -223,17 +310,22 @@ class LLMAdapter:
                     if not os.getenv("HF_TOKEN"):
                         logger.warning(f"HF_TOKEN environment variable not set. May impact private model access for {config.name}")
                     # Add try-except around HfLocalBackend initialization if it can raise specific errors
-                    return HfLocalBackend(
+                    backend = HfLocalBackend(
                         model_name=config.name,
                         max_gpu_memory=config.max_gpu_memory,
                         eval_device=config.eval_device
                     )
+                    # Count this model's tokens with the tokenizer it already loaded
+                    get_token_counter().register_hf_model(config.name, getattr(backend, "tokenizer", None))
+                    return backend
                 
                 case "vllm" | "sglang":
                     # These use OpenAI compatible endpoints
                     if not config.hostname:
                         logger.error(f"Hostname (base_url) required for {config.backend} backend ({config.name}) but not provided.")
                         return None
+                    # Served from Hugging Face weights, so count tokens with their tokenizer
+                    get_token_counter().register_hf_model(config.name)
                     # OpenAI client init can fail if URL is malformed, though less common.
                     return OpenAI(
                         base_url=config.hostname,
@@ -331,23 +423,28 @@ class LLMAdapter:
     def execute_llm_syscalls(
         self,
         llm_syscalls: List[LLMQuery],
-    ) -> None:
+    ) -> List[concurrent.futures.Future]:
         """
-        Execute a batch of LLM syscalls using the configured routing strategy and parallel execution.
+        Dispatch a batch of LLM syscalls using the configured routing strategy.
+
+        Each syscall is routed to a model and submitted to that model's long-lived
+        worker pool. The call returns as soon as the batch is submitted; every
+        syscall is completed (response set, event signalled) by its worker once
+        its own response arrives.
 
         Args:
             llm_syscalls: List of LLMQuery objects
 
         Returns:
-            List of LLMResponse objects corresponding to each input syscall.
-            If an error occurs *before* dispatching a syscall, its corresponding response will be an error LLMResponse.
+            List of futures, one per dispatched syscall, each resolving to the syscall.
+            Syscalls that fail before dispatch are completed immediately with an
+            error LLMResponse and have no future.
         """
         num_syscalls = len(llm_syscalls)
         if num_syscalls == 0:
             return []
 
-        start_exec_time = time.time()
-        logger.info(f"Starting batch execution for {num_syscalls} LLM syscalls...")
+        logger.info(f"Dispatching batch of {num_syscalls} LLM syscalls...")
         
         if not self.llms:
             logger.error("Cannot execute syscalls: No LLMs were successfully initialized.")
@@ -363,7 +460,7 @@ class LLMAdapter:
                 llm_syscall.set_end_time(time.time())
                 llm_syscall.event.set()
             
-            return             
+            return []
         
         
         selected_llm_lists = [syscall.query.llms for syscall in llm_syscalls]
@@ -391,162 +488,665 @@ class LLMAdapter:
                 executable_llm_syscalls.append(llm_syscalls[i])
                 available_selected_llm_lists.append(selected_llm_lists[i])
         
+        if not executable_llm_syscalls:
+            return []
+
         queries = [syscall.query.messages for syscall in executable_llm_syscalls]
         
-        model_idxs = self.router.get_model_idxs(available_selected_llm_lists, queries)
-        
-        grouped_tasks = defaultdict(list)
-
-        for i, llm_syscall in enumerate(executable_llm_syscalls):
-            model_idx = model_idxs[i]
-            
-            if model_idx not in grouped_tasks:
-                grouped_tasks[model_idx] = []
-            grouped_tasks[model_idx].append(llm_syscall)
-            
-        # --- 3. Parallel Execution using ThreadPoolExecutor ---
-        if not grouped_tasks:
-            logger.warning("No tasks were grouped for execution.")
-            # Fill remaining Nones with a generic routing error if needed
+        try:
+            if isinstance(self.router, LoadAwareRouting):
+                # Load-aware routing ranks models by the expected output length
+                max_tokens = [getattr(syscall.query, "max_new_tokens", None) for syscall in executable_llm_syscalls]
+                model_idxs = self.router.get_model_idxs(available_selected_llm_lists, queries, max_tokens=max_tokens)
+            else:
+                model_idxs = self.router.get_model_idxs(available_selected_llm_lists, queries)
+        except Exception as routing_exc:
+            logger.error(f"LLM routing failed: {routing_exc}", exc_info=True)
             error_response = LLMResponse(response_message=None, error="System Error: LLM routing failed.", finished=True, status_code=500)
             for llm_syscall in executable_llm_syscalls:
-                llm_syscall.set_status("done")
-                llm_syscall.set_response(error_response)
-                llm_syscall.set_end_time(time.time())
-                llm_syscall.event.set()
+                self._complete_llm_syscall(llm_syscall, error_response, status="error")
+            return []
+
+        # --- Submission to the async engine or the per-model worker pools ---
+        futures = []
+        for llm_syscall, model_idx in zip(executable_llm_syscalls, model_idxs):
+            if self._complete_from_cache(model_idx, llm_syscall):
+                continue
+            follower_future = self._join_inflight(model_idx, llm_syscall)
+            if follower_future is not None:
+                futures.append(follower_future)
+                continue
+            try:
+                if self._uses_async_engine(model_idx):
+                    future = self.async_engine.submit(self._arun_llm_syscall(model_idx, llm_syscall))
+                else:
+                    future = self._get_model_executor(model_idx).submit(self._run_llm_syscall, model_idx, llm_syscall)
+                self._track_load(model_idx, future)
+                future.add_done_callback(lambda f, idx=model_idx, syscall=llm_syscall: self._on_worker_done(idx, syscall, f))
+                futures.append(future)
+            except Exception as submit_exc:
+                # Raised if the pool is shut down or the model index is invalid
+                logger.error(f"Failed to submit syscall to model index {model_idx}: {submit_exc}", exc_info=True)
+                self.semantic_pending.pop(id(llm_syscall), None)
+                error_response = LLMResponse(
+                    response_message=None,
+                    error=str(submit_exc),
+                    finished=True,
+                    status_code=500
+                )
+                self._complete_llm_syscall(llm_syscall, error_response, status="error")
+                self._release_followers(model_idx, llm_syscall, error_response)
+
+        return futures
+
+    def _track_load(self, model_idx: int, future: concurrent.futures.Future) -> None:
+        """
+        Count a dispatched request against its model until it completes.
+
+        Args:
+            model_idx: Index of the model the request was dispatched to
+            future: Future of the request
+        """
+        self.load_tracker.on_dispatch(model_idx)
+        future.add_done_callback(lambda f: self._record_load_outcome(model_idx, f))
+
+    def _record_load_outcome(self, model_idx: int, future: concurrent.futures.Future) -> None:
+        """
+        Report the latency, throughput and error class of a finished request to the load tracker.
+
+        Args:
+            model_idx: Index of the model that served the request
+            future: Completed future resolving to the syscall
+        """
+        latency, output_tokens, error, rate_limited = None, None, True, False
+        try:
+            llm_syscall = future.result()
+            # A semantic cache hit says nothing about the model's latency
+            cache_hit = id(llm_syscall) in self.semantic_hits
+            self.semantic_hits.discard(id(llm_syscall))
+            response = llm_syscall.get_response()
+            if not cache_hit and llm_syscall.get_start_time() and llm_syscall.get_end_time():
+                latency = llm_syscall.get_end_time() - llm_syscall.get_start_time()
+            if response is not None:
+                error = bool(response.error)
+                rate_limited = response.status_code == 429
+                if isinstance(response.response_message, str):
+                    output_tokens = get_token_counter().count_text(
+                        response.response_message, model=self.llm_configs[model_idx].name
+                    )
+        except Exception:
+            pass
+        self.load_tracker.on_complete(
+            model_idx, latency=latency, output_tokens=output_tokens, error=error, rate_limited=rate_limited
+        )
+
+    def _on_worker_done(self, model_idx: int, llm_syscall, future: concurrent.futures.Future) -> None:
+        """
+        Fail a syscall, and the followers coalesced onto it, if its worker never completed it.
+
+        This covers futures cancelled by cleanup() before they ran and
+        workers that raised outside of the model call.
+
+        Args:
+            model_idx: Index of the model the syscall was dispatched to
+            llm_syscall: The dispatched syscall
+            future: Its completed future
+        """
+        if not future.cancelled() and future.exception() is None:
             return
+        reason = "cancelled" if future.cancelled() else f"failed: {future.exception()}"
+        error_response = LLMResponse(
+            response_message=None,
+            error=f"System Error: LLM request {reason}",
+            finished=True,
+            status_code=500
+        )
+        self._release_followers(model_idx, llm_syscall, error_response)
+        if not llm_syscall.is_done():
+            self._complete_llm_syscall(llm_syscall, error_response, status="error")
+
+    def _get_model_executor(self, model_idx: int) -> ThreadPoolExecutor:
+        """
+        Get the long-lived worker pool of a model, creating it on first use.
+
+        The pool size is the model's concurrency limit, which bounds how many
+        requests can be in flight against one backend at a time.
 
-        # Determine max workers for the outer executor (managing groups)
-        max_group_workers = len(grouped_tasks)
-        logger.info(f"Processing {len(grouped_tasks)} model groups...")
+        Args:
+            model_idx: Index of the model configuration
 
-        # Dictionary to store results keyed by original index
-        results_dict = {}
+        Returns:
+            The ThreadPoolExecutor serving that model
+        """
+        with self.executor_lock:
+            executor = self.model_executors.get(model_idx)
+            if executor is None:
+                model_config = self.llm_configs[model_idx]
+                max_workers = self._get_concurrency_limit(model_config)
+                batching_engine = getattr(self.llms[model_idx], "batching_engine", None)
+                if batching_engine is not None and not model_config.max_concurrency:
+                    # The batching engine bounds concurrency itself; keep its batch full
+                    max_workers = max(max_workers, batching_engine.max_batch_size)
+                executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix=f"LLMWorker_M{model_idx}"
+                )
+                self.model_executors[model_idx] = executor
+                logger.info(f"Created worker pool for model '{model_config.name}' (Index {model_idx}) with {max_workers} workers.")
+            return executor
+
+    def _get_concurrency_limit(self, model_config: LLMConfig) -> int:
+        """
+        Resolve the concurrency limit of a model.
 
+        The per-model `max_concurrency` takes precedence, then the backend entry
+        of `llms.concurrency` in config.yaml, then its `default` entry.
+
+        Args:
+            model_config: Configuration of the model
+
+        Returns:
+            Maximum number of concurrent requests for the model
+        """
+        if model_config.max_concurrency:
+            return int(model_config.max_concurrency)
+
+        concurrency_config = config.get_llms_config().get("concurrency", {}) or {}
+        backend_defaults = {
+            "huggingface": 1,
+            "hflocal": 1,
+        }
+        limit = concurrency_config.get(
+            model_config.backend,
+            backend_defaults.get(model_config.backend, concurrency_config.get("default", 16))
+        )
+        return max(1, int(limit))
+
+    def _run_llm_syscall(self, model_idx: int, llm_syscall) -> LLMQuery:
+        """
+        Worker entry point: execute one syscall on its model and complete it.
+
+        Args:
+            model_idx: Index of the model configuration to use
+            llm_syscall: The syscall to execute
+
+        Returns:
+            The completed syscall
+        """
+        if self._complete_from_semantic_cache(model_idx, llm_syscall):
+            return llm_syscall
+
+        model_name = self.llm_configs[model_idx].name
         try:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_group_workers, thread_name_prefix="LLMGroupWorker") as group_executor:
-                future_to_group = {
-                    group_executor.submit(self._process_batch_for_model, model_idx, tasks): model_idx
-                    for model_idx, tasks in grouped_tasks.items()
-                }
+            _, response = self.execute_llm_syscall(model_idx, llm_syscall)
+        except Exception as exc:
+            logger.error(f"Error executing syscall on model '{model_name}': {exc}", exc_info=True)
+            response = self._handle_completion_error(exc, model_name)
+
+        self._store_in_cache(model_idx, llm_syscall, response)
+        self._release_followers(model_idx, llm_syscall, response)
+        if response.finished:
+            self._complete_llm_syscall(llm_syscall, response, status="done")
+        else:
+            # This case implies interruption or streaming, adapt if needed
+            self._complete_llm_syscall(llm_syscall, response, status="suspend")
+        return llm_syscall
 
-                for future in concurrent.futures.as_completed(future_to_group):
-                    model_idx_completed = future_to_group[future]
-                    model_config = self.llm_configs[model_idx_completed] # Get config using index
-                    model_name_completed = model_config.name
+    async def _arun_llm_syscall(self, model_idx: int, llm_syscall) -> LLMQuery:
+        """
+        Async engine entry point: execute one syscall on its model and complete it.
 
-                    try:
-                        # Worker returns a list of (original_index, result_tuple)
-                        # where result_tuple is (syscall_object, LLMResponse)
-                        group_results = future.result() # Raises exceptions from the worker function
-                        
-                        for original_idx, (syscall_obj, response) in group_results:
-                            results_dict[original_idx] = response # Store the LLMResponse
-                            # Update syscall object status based on response
-                            if response.finished:
-                                syscall_obj.set_status("done")
-                            else:
-                                # This case implies interruption or streaming, adapt if needed
-                                syscall_obj.set_status("suspend") # Or another status?
-                            syscall_obj.set_response(response)
-                            syscall_obj.set_end_time(time.time())
-                            syscall_obj.event.set() # Notify anyone waiting on this specific syscall
-
-                        logger.info(f"Group processing completed for model '{model_name_completed}' (Index {model_idx_completed}). Processed {len(group_results)} tasks.")
-
-                    except Exception as exc:
-                        # Handle errors occurring within the _process_batch_for_model worker
-                        logger.error(f"Worker thread for model group '{model_name_completed}' (Index {model_idx_completed}) failed: {exc}", exc_info=True)
-                        # Assign an error response to all tasks originally assigned to this failed group worker
-                        error_response = LLMResponse(
-                            response_message=None,
-                            error=f"Worker exception: {exc}",
-                            finished=True,
-                            status_code=500
-                        )
-                        tasks_in_failed_group = grouped_tasks[model_idx_completed]
-                        for failed_original_idx, failed_syscall in tasks_in_failed_group:
-                            if failed_original_idx not in results_dict: # Avoid overwriting if processed before crash
-                                results_dict[failed_original_idx] = error_response
-                                failed_syscall.set_status("error")
-                                failed_syscall.set_response(error_response)
-                                failed_syscall.set_end_time(time.time())
-                                failed_syscall.event.set()
-
-
-        except Exception as outer_exc:
-             # Handle errors during ThreadPoolExecutor setup or management
-            logger.error(f"Critical error during batch execution setup: {outer_exc}", exc_info=True)
-            error_response = LLMResponse(
-                response_message=None,
-                error=str(outer_exc),
-                finished=True,
-                status_code=500
+        Args:
+            model_idx: Index of the model configuration to use
+            llm_syscall: The syscall to execute
+
+        Returns:
+            The completed syscall
+        """
+        # Embedding is CPU-bound; keep it off the event loop
+        if self.semantic_cache is not None and await asyncio.to_thread(
+            self._complete_from_semantic_cache, model_idx, llm_syscall
+        ):
+            return llm_syscall
+
+        model_name = self.llm_configs[model_idx].name
+        try:
+            _, response = await self.aexecute_llm_syscall(model_idx, llm_syscall)
+        except Exception as exc:
+            logger.error(f"Error executing syscall on model '{model_name}': {exc}", exc_info=True)
+            response = self._handle_completion_error(exc, model_name)
+
+        self._store_in_cache(model_idx, llm_syscall, response)
+        self._release_followers(model_idx, llm_syscall, response)
+        self._complete_llm_syscall(llm_syscall, response, status="done")
+        return llm_syscall
+
+    def _coalescing_key(self, model_idx: int, llm_syscall) -> Optional[str]:
+        """
+        Compute the key under which identical in-flight requests are coalesced.
+
+        Args:
+            model_idx: Index of the model serving the syscall
+            llm_syscall: The syscall
+
+        Returns:
+            The key, or None if coalescing is disabled or does not apply to the request
+        """
+        if not self.coalescing_enabled:
+            return None
+        query = llm_syscall.query
+        temperature = getattr(query, "temperature", None)
+        if not self.coalesce_sampled and temperature != 0:
+            return None
+        return make_cache_key(
+            model_name=self.llm_configs[model_idx].name,
+            messages=query.messages,
+            tools=query.tools,
+            response_format=query.response_format,
+            temperature=temperature,
+            message_return_type=query.message_return_type,
+            max_tokens=getattr(query, "max_new_tokens", None)
+        )
+
+    def _join_inflight(self, model_idx: int, llm_syscall) -> Optional[concurrent.futures.Future]:
+        """
+        Attach a syscall to an identical request that is already in flight.
+
+        The first syscall with a given key becomes the leader and is dispatched
+        normally; later ones wait for the leader's response.
+
+        Args:
+            model_idx: Index of the model the syscall was routed to
+            llm_syscall: The syscall
+
+        Returns:
+            A future resolving to the syscall if it became a follower, None if it
+            must be dispatched
+        """
+        key = self._coalescing_key(model_idx, llm_syscall)
+        if key is None:
+            return None
+        with self.inflight_lock:
+            inflight = self.inflight_requests.get(key)
+            if inflight is None:
+                self.inflight_requests[key] = (llm_syscall, [])
+                return None
+            future = concurrent.futures.Future()
+            future.set_running_or_notify_cancel()
+            inflight[1].append((llm_syscall, future))
+            self.coalesced_count += 1
+
+        llm_syscall.set_start_time(time.time())
+        llm_syscall.set_target(self.llm_configs[model_idx].name)
+        logger.info(f"Coalesced syscall from {llm_syscall.agent_name} with an identical in-flight request")
+        return future
+
+    def _release_followers(self, model_idx: int, llm_syscall, response: LLMResponse) -> None:
+        """
+        Complete the syscalls that waited on a leader with copies of its response.
+
+        Args:
+            model_idx: Index of the model that served the leader
+            llm_syscall: The leader syscall
+            response: The leader's response
+        """
+        key = self._coalescing_key(model_idx, llm_syscall)
+        if key is None:
+            return
+        with self.inflight_lock:
+            inflight = self.inflight_requests.get(key)
+            if inflight is None or inflight[0] is not llm_syscall:
+                return
+            del self.inflight_requests[key]
+
+        self._complete_followers(inflight[1], response)
+
+    def _complete_followers(self, followers: List[tuple], response: LLMResponse) -> None:
+        for follower, future in followers:
+            follower_response = response.model_copy(deep=True)
+            if isinstance(follower_response.response_message, str):
+                follower.put_delta(follower_response.response_message)
+            self._complete_llm_syscall(follower, follower_response, status="error" if follower_response.error else "done")
+            if not future.done():
+                future.set_result(follower)
+
+    def _response_cache_key(self, model_idx: int, llm_syscall) -> Optional[str]:
+        """
+        Compute the response cache key of a syscall on a model.
+
+        Only deterministic requests (temperature 0) are cacheable.
+
+        Args:
+            model_idx: Index of the model serving the syscall
+            llm_syscall: The syscall
+
+        Returns:
+            The cache key, or None if the cache is disabled or the request is not cacheable
+        """
+        if self.response_cache is None:
+            return None
+        query = llm_syscall.query
+        temperature = getattr(query, "temperature", None)
+        if temperature is None or temperature != 0:
+            return None
+        return make_cache_key(
+            model_name=self.llm_configs[model_idx].name,
+            messages=query.messages,
+            tools=query.tools,
+            response_format=query.response_format,
+            temperature=temperature,
+            message_return_type=query.message_return_type,
+            max_tokens=getattr(query, "max_new_tokens", None)
+        )
+
+    def _complete_from_cache(self, model_idx: int, llm_syscall) -> bool:
+        """
+        Complete a syscall from the response cache if possible.
+
+        Args:
+            model_idx: Index of the model the syscall was routed to
+            llm_syscall: The syscall
+
+        Returns:
+            True if the syscall was completed with a cached response
+        """
+        # A resumed time slice must finish its own generation: its stream
+        # already carries the partial output and its saved context is pending
+        if llm_syscall.is_resumed():
+            return False
+        cache_key = self._response_cache_key(model_idx, llm_syscall)
+        if cache_key is None:
+            return False
+        cached = self.response_cache.get(cache_key)
+        if cached is None:
+            return False
+
+        logger.info(f"Response cache hit for model '{self.llm_configs[model_idx].name}'")
+        response = LLMResponse(**cached)
+        llm_syscall.set_start_time(time.time())
+        llm_syscall.set_target(self.llm_configs[model_idx].name)
+        if isinstance(response.response_message, str):
+            llm_syscall.put_delta(response.response_message)
+        self._complete_llm_syscall(llm_syscall, response, status="done")
+        return True
+
+    def _complete_from_semantic_cache(self, model_idx: int, llm_syscall) -> bool:
+        """
+        Complete a syscall with the cached answer of a semantically equivalent request.
+
+        Runs in the syscall's worker, before the model call, so embedding
+        never blocks dispatch. Only requests without tools are eligible, and
+        not resumed time slices. On a miss the embedding is kept so the
+        response can be stored without re-embedding; on a hit, requests
+        coalesced onto this one get the cached answer too.
+
+        Args:
+            model_idx: Index of the model the syscall was routed to
+            llm_syscall: The syscall
+
+        Returns:
+            True if the syscall was completed with a cached answer
+        """
+        if self.semantic_cache is None or llm_syscall.query.tools or llm_syscall.is_resumed():
+            return False
+
+        model_name = self.llm_configs[model_idx].name
+        try:
+            embedding = self.semantic_cache.embed(llm_syscall.query.messages)
+            if embedding is None:
+                return False
+            cached = self.semantic_cache.lookup(
+                llm_syscall.agent_name,
+                model_name,
+                llm_syscall.query.messages,
+                embedding=embedding,
+                message_return_type=llm_syscall.query.message_return_type,
+                response_format=llm_syscall.query.response_format
             )
-            # Assign error to all tasks that haven't received a result yet
-            for llm_syscall in executable_llm_syscalls:
-                llm_syscall.set_status("error")
-                llm_syscall.set_response(error_response)
-                llm_syscall.set_end_time(time.time())
-                llm_syscall.event.set()
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            return False
+
+        if cached is None:
+            self.semantic_pending[id(llm_syscall)] = embedding
+            return False
+
+        logger.info(f"Semantic cache hit for model '{model_name}'")
+        response = LLMResponse(**cached)
+        llm_syscall.set_start_time(time.time())
+        llm_syscall.set_target(model_name)
+        if isinstance(response.response_message, str):
+            llm_syscall.put_delta(response.response_message)
+        self.semantic_hits.add(id(llm_syscall))
+        self._release_followers(model_idx, llm_syscall, response)
+        self._complete_llm_syscall(llm_syscall, response, status="done")
+        return True
+
+    def _store_in_cache(self, model_idx: int, llm_syscall, response: LLMResponse) -> None:
+        """
+        Store a successful, finished response in the enabled response caches.
 
-        end_exec_time = time.time()
-        logger.info(f"Batch execution finished for {num_syscalls} syscalls in {end_exec_time - start_exec_time:.2f} seconds.")
-        
-        return
+        Args:
+            model_idx: Index of the model that served the syscall
+            llm_syscall: The syscall
+            response: Its response
+        """
+        embedding = self.semantic_pending.pop(id(llm_syscall), None)
+        if not response.finished or response.error or response.status_code != 200:
+            return
+        cache_key = self._response_cache_key(model_idx, llm_syscall)
+        if cache_key is not None:
+            self.response_cache.put(cache_key, response.model_dump())
+
+        if embedding is not None and isinstance(response.response_message, str):
+            messages = llm_syscall.query.messages
+            model_name = self.llm_configs[model_idx].name
+            try:
+                saved_tokens = get_token_counter().count_messages(
+                    messages + [{"role": "assistant", "content": response.response_message}],
+                    model=model_name
+                )
+            except Exception:
+                saved_tokens = 0
+            self.semantic_cache.store(
+                llm_syscall.agent_name,
+                model_name,
+                messages,
+                response.model_dump(),
+                saved_tokens=saved_tokens,
+                embedding=embedding,
+                message_return_type=llm_syscall.query.message_return_type,
+                response_format=llm_syscall.query.response_format
+            )
+
+    def get_router_status(self) -> Dict[str, Any]:
+        """
+        Get the readiness of the router.
+
+        Routers that load state at startup (SmartRouting) report their own
+        warm-up state; the others are ready as soon as they are constructed.
+
+        Returns:
+            Dict with the routing strategy, its state and whether it is ready
+        """
+        get_status = getattr(self.router, "get_status", None)
+        if get_status is not None:
+            return get_status()
+        return {"strategy": type(self.router).__name__, "state": "ready", "ready": True}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the adapter's metrics.
+
+        Returns:
+            Dict with the metrics of the enabled caches and engines
+        """
+        metrics = {
+            "models": self.load_tracker.snapshot(),
+            "token_counter": get_token_counter().get_metrics(),
+        }
+        if self.response_cache is not None:
+            metrics["response_cache"] = self.response_cache.get_metrics()
+        if self.semantic_cache is not None:
+            metrics["semantic_cache"] = self.semantic_cache.get_metrics()
+        if self.context_manager is not None:
+            metrics["context_store"] = self.context_manager.context_store.get_metrics()
+        if self.coalescing_enabled:
+            with self.inflight_lock:
+                metrics["request_coalescing"] = {
+                    "coalesced": self.coalesced_count,
+                    "inflight_keys": len(self.inflight_requests),
+                }
+        return metrics
+
+    def _complete_llm_syscall(self, llm_syscall, response: LLMResponse, status: str = "done") -> None:
+        """
+        Set the response of a syscall and notify anyone waiting on it.
+
+        Args:
+            llm_syscall: The syscall to complete
+            response: The response to deliver
+            status: Final status of the syscall
+        """
+        llm_syscall.set_status(status)
+        llm_syscall.set_response(response)
+        llm_syscall.set_end_time(time.time())
+        llm_syscall.close_stream()
+        llm_syscall.event.set()
+
+    def cleanup(self) -> None:
+        """Shut down the per-model worker pools and the async engine."""
+        with self.executor_lock:
+            for executor in self.model_executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+            self.model_executors.clear()
+        if self.async_engine is not None:
+            self.async_engine.stop()
+        # Coalesced requests still in flight will not complete; release them
+        with self.inflight_lock:
+            inflight = list(self.inflight_requests.values())
+            self.inflight_requests.clear()
+        error_response = LLMResponse(
+            response_message=None, error="System Error: LLM adapter shut down", finished=True, status_code=500
+        )
+        for leader, followers in inflight:
+            if not leader.is_done():
+                self._complete_llm_syscall(leader, error_response.model_copy(deep=True), status="error")
+            self._complete_followers(followers, error_response)
+        for llm in self.llms:
+            if isinstance(llm, HfLocalBackend):
+                llm.cleanup()
+        if self.response_cache is not None:
+            self.response_cache.close()
 
     
-    def _process_batch_for_model(self, model_idx, tasks_with_indices):
+    def _prepare_llm_request(
+        self,
+        model_idx,
+        llm_syscall
+    ) -> tuple[Optional[Dict[str, Any]], Optional[LLMResponse]]:
         """
-        Process a batch of tasks assigned to a specific model index using another ThreadPoolExecutor.
+        Extract and validate the parameters of an LLM syscall for a given model.
 
         Args:
-            model_idx: Index of the target model configuration.
-            tasks_with_indices: List of tuples: [(original_index, llm_syscall), ...]
+            model_idx: Index of the LLM configuration to use.
+            llm_syscall: LLMQuery object containing the request.
 
         Returns:
-            List of tuples: [(original_index, (llm_syscall, LLMResponse)), ...]
-            Raises exceptions if the inner execution fails critically.
+            A tuple (request, error_response). Exactly one of them is None: either the
+            prepared request parameters, or an LLMResponse describing why the syscall
+            cannot be executed.
         """
         model_config = self.llm_configs[model_idx]
-        logger.info(f"Starting processing for {len(tasks_with_indices)} tasks on model '{model_config.name}' (Index {model_idx}).")
-        
-        batch_results = []
-        max_workers = len(tasks_with_indices)
 
+        # --- Parameter Extraction and Validation ---
         try:
-            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"LLMWorker_M{model_idx}") as executor:
-                # Map future to original index for result correlation
-                future_to_original_index = {
-                    executor.submit(self.execute_llm_syscall, model_idx, llm_syscall): original_idx
-                    for original_idx, llm_syscall in enumerate(tasks_with_indices)
-                }
+            messages = llm_syscall.query.messages
+            tools = llm_syscall.query.tools
+            message_return_type = llm_syscall.query.message_return_type
+            response_format = llm_syscall.query.response_format
+            # temperature = llm_syscall.query.temperature if llm_syscall.query.temperature is not None else 1.0 # Default temp if not set
+            # max_tokens = llm_syscall.query.max_new_tokens if llm_syscall.query.max_new_tokens is not None else 1000 # Default max tokens
+            temperature = getattr(llm_syscall.query, "temperature", 0.8)
+            max_tokens  = getattr(llm_syscall.query, "max_new_tokens", 1000)
+
+            # Basic validation
+            if not messages or not isinstance(messages, list):
+                raise ValueError("Syscall query must contain a non-empty list of messages.")
+            # Add more validation as needed (e.g., role/content structure)
+
+        except AttributeError as e:
+            logger.error(f"Syscall object missing expected attributes: {e}", exc_info=True)
+            return None, LLMResponse(
+                response_message=None,
+                error=f"Missing attribute: {e}", finished=True, status_code=400
+            )
+        except ValueError as e:
+            logger.error(f"Syscall validation failed: {e}", exc_info=True)
+            return None, LLMResponse(
+                response_message=None,
+                error=str(e), finished=True, status_code=400
+            )
 
-                for future in concurrent.futures.as_completed(future_to_original_index):
-                    original_idx = future_to_original_index[future]
-                    syscall_obj = tasks_with_indices[original_idx]
+        # --- Tool Preparation ---
+        prepared_tools = None
+        if tools:
+            try:
+                prepared_tools = slash_to_double_underscore(tools)
+            except Exception as e:
+                logger.error(f"Error processing tools for syscall: {e}", exc_info=True)
+                return None, LLMResponse(
+                    response_message=None,
+                    error=f"Tool processing error: {e}", finished=True, status_code=400
+                )
 
-                    try:
-                        # execute_llm_syscall now returns (syscall_obj, LLMResponse)
-                        result_tuple = future.result()
-                        batch_results.append((original_idx, result_tuple))
-                    except Exception as exc:
-                        # Handle errors from individual execute_llm_syscall calls
-                        logger.error(f"Error executing syscall for original index {original_idx} on model '{model_config.name}': {exc}", exc_info=False) # Log less detail maybe
-                        # Create an error response for this specific task
-                        error_response = self._handle_completion_error(exc, model_config.name)
-                        batch_results.append((original_idx, (syscall_obj, error_response))) # Return error response associated with the syscall
-
-        except Exception as batch_exc:
-            # Handle errors during the inner ThreadPoolExecutor setup/management
-            logger.error(f"Critical error processing batch for model '{model_config.name}': {batch_exc}", exc_info=True)
-            # Re-raise the exception to be caught by the outer executor's error handling
-            raise batch_exc
-
-        logger.info(f"Finished processing batch for model '{model_config.name}'.")
-        return batch_results
+        return {
+            "model_name": model_config.name,
+            "model": self.llms[model_idx], # This is the actual model object or string ID
+            "api_base": model_config.hostname, # Use hostname from the validated config
+            "messages": messages,
+            "tools": tools,
+            "prepared_tools": prepared_tools,
+            "message_return_type": message_return_type,
+            "response_format": response_format,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }, None
+
+    def _finalize_response(
+        self,
+        request: Dict[str, Any],
+        completed_response: Union[str, List, Dict],
+        finished: bool
+    ) -> LLMResponse:
+        """
+        Turn a raw model response into an LLMResponse, mapping processing failures to errors.
+
+        Args:
+            request: Prepared request parameters from _prepare_llm_request.
+            completed_response: Raw response returned by the model call.
+            finished: Flag indicating if the generation finished.
+
+        Returns:
+            The processed LLMResponse.
+        """
+        try:
+            return self._process_response(
+                completed_response=completed_response,
+                finished=finished,
+                tools=request["tools"], # Pass original tools for context if needed by processing logic
+                model=request["model"], # Pass model identifier if needed
+                message_return_type=request["message_return_type"]
+            )
+        except Exception as e:
+            logger.error(f"Failed to process LLM response for {request['model_name']}: {e}", exc_info=True)
+            return LLMResponse(
+                response_message=None,
+                error=f"Response processing error: {e}",
+                finished=True, # Mark as finished even if processing failed
+                status_code=500
+            )
 
-    
     def execute_llm_syscall(
         self,
         model_idx,
@@ -563,70 +1163,30 @@ class LLMAdapter:
         Returns:
             A tuple containing the original LLMQuery object and the resulting LLMResponse.
         """
-        model_config = self.llm_configs[model_idx]
-        model_name = model_config.name
-        model_identifier = self.llms[model_idx] # This is the actual model object or string ID
-        api_base = model_config.hostname # Use hostname from the validated config
+        model_name = self.llm_configs[model_idx].name
 
         try:
-            # --- Parameter Extraction and Validation ---
-            try:
-                messages = llm_syscall.query.messages
-                tools = llm_syscall.query.tools
-                message_return_type = llm_syscall.query.message_return_type
-                response_format = llm_syscall.query.response_format
-                # temperature = llm_syscall.query.temperature if llm_syscall.query.temperature is not None else 1.0 # Default temp if not set
-                # max_tokens = llm_syscall.query.max_new_tokens if llm_syscall.query.max_new_tokens is not None else 1000 # Default max tokens
-                temperature = getattr(llm_syscall.query, "temperature", 0.8)
-                max_tokens  = getattr(llm_syscall.query, "max_new_tokens", 1000)
-
-                # Basic validation
-                if not messages or not isinstance(messages, list):
-                    raise ValueError("Syscall query must contain a non-empty list of messages.")
-                # Add more validation as needed (e.g., role/content structure)
-
-            except AttributeError as e:
-                logger.error(f"Syscall object missing expected attributes: {e}", exc_info=True)
-                return (llm_syscall, LLMResponse(
-                    response_message=None,
-                    error=f"Missing attribute: {e}", finished=True, status_code=400
-                ))
-            except ValueError as e:
-                logger.error(f"Syscall validation failed: {e}", exc_info=True)
-                return (llm_syscall, LLMResponse(
-                    response_message=None,
-                    error=str(e), finished=True, status_code=400
-                ))
-
+            request, error_response = self._prepare_llm_request(model_idx, llm_syscall)
+            if error_response is not None:
+                return (llm_syscall, error_response)
 
             llm_syscall.set_status("executing")
             llm_syscall.set_start_time(time.time())
+            llm_syscall.set_target(model_name)
 
-            # --- Tool Preparation ---
-            prepared_tools = None
-            if tools:
-                try:
-                    prepared_tools = slash_to_double_underscore(tools)
-                except Exception as e:
-                    logger.error(f"Error processing tools for syscall: {e}", exc_info=True)
-                    return (llm_syscall, LLMResponse(
-                        response_message=None,
-                        error=f"Tool processing error: {e}", finished=True, status_code=400
-                    ))
-            
             # --- Model Response Generation ---
             try:
                 completed_response, finished = self._get_model_response(
                     model_name=model_name,
-                    model=model_identifier,
-                    messages=messages,
-                    tools=prepared_tools, # Use prepared tools
+                    model=request["model"],
+                    messages=request["messages"],
+                    tools=request["prepared_tools"], # Use prepared tools
                     llm_syscall=llm_syscall,
-                    api_base=api_base,
-                    message_return_type=message_return_type,
-                    response_format=response_format,
-                    temperature=temperature,
-                    max_tokens=max_tokens
+                    api_base=request["api_base"],
+                    message_return_type=request["message_return_type"],
+                    response_format=request["response_format"],
+                    temperature=request["temperature"],
+                    max_tokens=request["max_tokens"]
                 )
             except Exception as e:
                 # Handle errors specifically from _get_model_response (API errors, timeouts etc.)
@@ -636,24 +1196,7 @@ class LLMAdapter:
                 return (llm_syscall, self._handle_completion_error(e, model_name))
 
             # --- Response Processing ---
-            try:
-                processed_response = self._process_response(
-                    completed_response=completed_response,
-                    finished=finished,
-                    tools=tools, # Pass original tools for context if needed by processing logic
-                    model=model_identifier, # Pass model identifier if needed
-                    message_return_type=message_return_type
-                )
-                return (llm_syscall, processed_response)
-
-            except Exception as e:
-                logger.error(f"Failed to process LLM response for {model_name}: {e}", exc_info=True)
-                return (llm_syscall, LLMResponse(
-                    response_message=None,
-                    error=f"Response processing error: {e}",
-                    finished=True, # Mark as finished even if processing failed
-                    status_code=500
-                ))
+            return (llm_syscall, self._finalize_response(request, completed_response, finished))
 
         except Exception as e:
             # Catch-all for unexpected errors within the execute_llm_syscall function itself
@@ -671,6 +1214,230 @@ class LLMAdapter:
                 status_code=500
             ))
 
+    async def aexecute_llm_syscall(
+        self,
+        model_idx,
+        llm_syscall
+    ) -> tuple[LLMQuery, LLMResponse]:
+        """
+        Execute a single LLM syscall on the async engine. Only valid for remote
+        models (LiteLLM identifiers and OpenAI-compatible clients); see
+        _uses_async_engine.
+
+        Args:
+            model_idx: Index of the LLM configuration to use.
+            llm_syscall: LLMQuery object containing the request.
+
+        Returns:
+            A tuple containing the original LLMQuery object and the resulting LLMResponse.
+        """
+        model_config = self.llm_configs[model_idx]
+        model_name = model_config.name
+        semaphore = self.async_engine.get_semaphore(model_idx, self._get_concurrency_limit(model_config))
+
+        async with semaphore:
+            try:
+                request, error_response = self._prepare_llm_request(model_idx, llm_syscall)
+                if error_response is not None:
+                    return (llm_syscall, error_response)
+
+                llm_syscall.set_status("executing")
+                llm_syscall.set_start_time(time.time())
+                llm_syscall.set_target(model_name)
+
+                model = request["model"]
+                completion_kwargs = self._build_completion_kwargs(
+                    model_name=model_name,
+                    model=model,
+                    messages=request["messages"],
+                    tools=request["prepared_tools"],
+                    api_base=request["api_base"],
+                    message_return_type=request["message_return_type"],
+                    response_format=request["response_format"],
+                    temperature=request["temperature"],
+                    max_tokens=request["max_tokens"]
+                )
+
+                try:
+                    if self._should_stream(llm_syscall, request["prepared_tools"]):
+                        if isinstance(model, str):
+                            response = await self.async_engine.acompletion(model, stream=True, **completion_kwargs)
+                        else:
+                            response = await self.async_engine.openai_completion(model, model_name, stream=True, **completion_kwargs)
+                        completed_response = await self._acollect_stream(response, llm_syscall)
+                        return (llm_syscall, self._finalize_response(request, completed_response, True))
+                    if isinstance(model, str):
+                        response = await self.async_engine.acompletion(model, **completion_kwargs)
+                        logger.info(f"Model usage: {response.usage}")
+                    else:
+                        response = await self.async_engine.openai_completion(model, model_name, **completion_kwargs)
+                    completed_response, finished = self._unpack_completion(response, request["prepared_tools"])
+                except Exception as e:
+                    logger.warning(f"Model response generation failed for {model_name}: {e}")
+                    return (llm_syscall, self._handle_completion_error(e, model_name))
+
+                return (llm_syscall, self._finalize_response(request, completed_response, finished))
+
+            except Exception as e:
+                logger.error(f"Unexpected critical error during async syscall execution for {model_name}: {e}", exc_info=True)
+                return (llm_syscall, LLMResponse(
+                    response_message=None,
+                    error=f"Unhandled exception: {str(e)}",
+                    finished=True,
+                    status_code=500
+                ))
+
+    def _uses_async_engine(self, model_idx: int) -> bool:
+        """
+        Check whether a model's requests can run on the async engine.
+
+        Remote models (LiteLLM identifiers and OpenAI-compatible clients) qualify;
+        local HF models and context-managed (time-sliced) generation stay on the
+        thread pools.
+
+        Args:
+            model_idx: Index of the model configuration
+
+        Returns:
+            True if requests to the model should be submitted to the async engine
+        """
+        if self.async_engine is None or self.use_context_manager:
+            return False
+        return isinstance(self.llms[model_idx], (str, OpenAI))
+
+    def _build_completion_kwargs(
+        self,
+        model_name: str,
+        model: Union[str, HfLocalBackend, OpenAI],
+        messages: List[Dict],
+        tools: Optional[List],
+        api_base: Optional[str] = None,
+        message_return_type: Optional[str] = "text",
+        response_format: Optional[Dict[str, Dict]] = None,
+        temperature: float = 1.0,
+        max_tokens: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Build the keyword arguments of a direct (non context-managed) completion call.
+
+        Args:
+            model_name: Name of the model (for logging).
+            model: The LLM model instance or LiteLLM identifier string.
+            messages: Prepared messages.
+            tools: Optional list of tools (with double underscores).
+            api_base: Optional API base URL.
+            message_return_type: Expected return type ("json" or "text").
+            response_format: Optional response format specification.
+            temperature: Temperature parameter.
+            max_tokens: Max tokens parameter.
+
+        Returns:
+            Dict of keyword arguments for the completion call.
+        """
+        completion_kwargs = {
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+
+        # Add tools if provided (use processed tool names)
+        if tools:
+            completion_kwargs["tools"] = tools
+            completion_kwargs["tool_choice"] = "auto" # Or "required" if always needed? Let model decide.
+
+        # Add JSON formatting if requested
+        # Note: Some models handle "format" kwarg, others "response_format". LiteLLM standardizes.
+        if message_return_type == "json":
+            # Standard way via response_format
+            completion_kwargs["response_format"] = {"type": "json_object"}
+            if response_format: # Allow more specific schema if provided
+                # Be careful: merging might be complex depending on provider support
+                logger.warning(f"[{model_name}] Overriding standard JSON format with provided response_format schema. Compatibility depends on model.")
+                completion_kwargs["response_format"] = response_format
+
+        # Add API base if provided (primarily for LiteLLM string models)
+        if api_base and isinstance(model, str):
+            completion_kwargs["api_base"] = api_base
+            logger.debug(f"[{model_name}] Using api_base: {api_base}")
+
+        return completion_kwargs
+
+    def _should_stream(self, llm_syscall, tools: Optional[List]) -> bool:
+        """
+        Check whether a direct completion should be requested as a stream.
+
+        Tool calls are only usable once complete, so requests with tools are
+        never streamed; their result is delivered with the final response.
+
+        Args:
+            llm_syscall: The syscall being executed
+            tools: Tools passed with the request, if any
+
+        Returns:
+            True if the caller asked for deltas and the request can be streamed
+        """
+        return llm_syscall.is_streaming() and not tools
+
+    def _collect_stream(self, response: Any, llm_syscall) -> str:
+        """
+        Forward the deltas of a streamed completion to the syscall and join them.
+
+        Args:
+            response: Iterator of completion chunks
+            llm_syscall: The streaming syscall
+
+        Returns:
+            The full completion text
+        """
+        parts = []
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                parts.append(delta)
+                llm_syscall.put_delta(delta)
+        return "".join(parts)
+
+    async def _acollect_stream(self, response: Any, llm_syscall) -> str:
+        """
+        Async counterpart of _collect_stream.
+
+        Args:
+            response: Async iterator of completion chunks
+            llm_syscall: The streaming syscall
+
+        Returns:
+            The full completion text
+        """
+        parts = []
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                parts.append(delta)
+                llm_syscall.put_delta(delta)
+        return "".join(parts)
+
+    def _unpack_completion(self, response: Any, tools: Optional[List]) -> tuple[Union[str, Any], bool]:
+        """
+        Extract the raw result from a LiteLLM or OpenAI chat completion.
+
+        Args:
+            response: The completion response object.
+            tools: Tools passed with the request, if any.
+
+        Returns:
+            Tuple of (model_response, finished_flag). When tools were requested the whole
+            response is returned so _process_response can decode the tool calls.
+        """
+        message = response.choices[0].message
+        if tools:
+            # Let _process_response decode the tool calls from the raw response
+            return response, True
+        return message.content, True
+
     def _get_model_response(
         self, 
         model_name: str,
@@ -728,7 +1495,9 @@ class LLMAdapter:
                     response_format=response_format,
                     temperature=temperature,
                     max_tokens=max_tokens,
-                    api_base=api_base # Pass api_base to context manager if needed
+                    api_base=api_base, # Pass api_base to context manager if needed
+                    on_delta=llm_syscall.put_delta if llm_syscall.is_streaming() else None,
+                    should_yield=llm_syscall.preemption_requested
                 )
                 # The context manager should return the raw response (str, dict, or tool call list)
                 # It might raise exceptions if interrupted or if the underlying call fails.
@@ -738,72 +1507,50 @@ class LLMAdapter:
             # --- Direct Model Call Handling (No Context Manager) ---
             else:
                 logger.debug(f"[{model_name}] Calling model directly.")
-                completion_kwargs = {
-                    "messages": messages,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens
-                }
-
-                # Add tools if provided (use processed tool names)
-                if tools:
-                    completion_kwargs["tools"] = tools
-                    completion_kwargs["tool_choice"] = "auto" # Or "required" if always needed? Let model decide.
-
-                # Add JSON formatting if requested
-                # Note: Some models handle "format" kwarg, others "response_format". LiteLLM standardizes.
-                if message_return_type == "json":
-                    # Standard way via response_format
-                    completion_kwargs["response_format"] = {"type": "json_object"}
-                    if response_format: # Allow more specific schema if provided
-                        # Be careful: merging might be complex depending on provider support
-                        logger.warning(f"[{model_name}] Overriding standard JSON format with provided response_format schema. Compatibility depends on model.")
-                        completion_kwargs["response_format"] = response_format
-
-                # Add API base if provided (primarily for LiteLLM string models)
-                if api_base and isinstance(model, str):
-                    completion_kwargs["api_base"] = api_base
-                    logger.debug(f"[{model_name}] Using api_base: {api_base}")
-
+                completion_kwargs = self._build_completion_kwargs(
+                    model_name=model_name,
+                    model=model,
+                    messages=messages,
+                    tools=tools,
+                    api_base=api_base,
+                    message_return_type=message_return_type,
+                    response_format=response_format,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
 
                 # --- Execute Call Based on Model Type ---
                 if isinstance(model, str):
                     # Use LiteLLM completion
                     logger.debug(f"[{model_name}] Calling litellm.completion for model: {model}")
                     # LiteLLM raises specific exceptions on failure
+                    if self._should_stream(llm_syscall, tools):
+                        response = litellm.completion(model=model, stream=True, **completion_kwargs)
+                        return self._collect_stream(response, llm_syscall), True
                     response = litellm.completion(model=model, **completion_kwargs)
                     logger.debug(f"[{model_name}] LiteLLM response received.")
                     
                     logger.info(f"Model usage: {response.usage}")
-                    # Extract content or tool calls from LiteLLM response
-                    message = response.choices[0].message
-                    if tools:
-                        # if message.tool_calls:
-                        # Decode directly here or let _process_response handle?
-                        # Let's return the raw tool calls for _process_response
-                        # logger.debug(f"[{model_name}] LiteLLM returned tool calls: {message.tool_calls}")
-                        # decoded_calls = decode_litellm_tool_calls(response) # Assuming this returns the desired list format
-                        return response, True # Return raw tool calls
-                    else:
-                        # logger.debug(f"[{model_name}] LiteLLM returned content: {message.content[:100]}...")
-                        return message.content, True
+                    # Tool calls are decoded from the raw response by _process_response
+                    return self._unpack_completion(response, tools)
 
                 elif isinstance(model, OpenAI):
                     # Use OpenAI client (for vLLM, SGLang, or direct OpenAI)
                     logger.debug(f"[{model_name}] Calling OpenAI client for model: {model_name}")
                     # OpenAI client raises specific exceptions
+                    if self._should_stream(llm_syscall, tools):
+                        response = model.chat.completions.create(
+                            model=model_name,
+                            stream=True,
+                            **completion_kwargs
+                        )
+                        return self._collect_stream(response, llm_syscall), True
                     response = model.chat.completions.create(
                         model=model_name, # Pass the specific model name if needed by the endpoint
                         **completion_kwargs
                     )
                     logger.debug(f"[{model_name}] OpenAI client response received.")
-
-                    message = response.choices[0].message
-                    if message.tool_calls:
-                        # logger.debug(f"[{model_name}] OpenAI client returned tool calls: {message.tool_calls}")
-                        return message.tool_calls, True # Return raw tool calls
-                    else:
-                        # logger.debug(f"[{model_name}] OpenAI client returned content: {message.content[:100]}...")
-                        return message.content, True
+                    return self._unpack_completion(response, tools)
 
                 elif isinstance(model, HfLocalBackend):
                     # Use Hugging Face local backend
@@ -823,7 +1570,10 @@ class LLMAdapter:
                     completion_kwargs.pop("response_format", None)
                     
                     # HfLocalBackend generate might raise its own errors
-                    generated_text = model.generate(**completion_kwargs)
+                    generated_text = model.generate(
+                        **completion_kwargs,
+                        on_delta=llm_syscall.put_delta if llm_syscall.is_streaming() else None
+                    )
                     # logger.debug(f"[{model_name}] HfLocalBackend generated: {generated_text[:100]}...")
                     # HfLocalBackend returns a single string. Tool/JSON decoding happens in _process_response.
                     return generated_text, True
@@ -0,0 +1,205 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+import litellm
+from openai import AsyncOpenAI, OpenAI
+
+logger = logging.getLogger(__name__)
+
+class AsyncLLMEngine:
+    """
+    Runs remote LLM completions as coroutines on a dedicated event loop.
+
+    The engine owns one background thread running an asyncio event loop.
+    Callers on any thread submit coroutines with `submit`, which returns a
+    `concurrent.futures.Future`, so in-flight remote requests cost coroutines
+    instead of threads. OpenAI-compatible endpoints share one pooled HTTP
+    client, and each model gets a semaphore bounding its concurrency.
+
+    Example:
+        ```python
+        engine = AsyncLLMEngine(max_connections=200)
+        engine.start()
+
+        future = engine.submit(
+            engine.acompletion("openai/gpt-4o-mini", messages=[{"role": "user", "content": "Hi"}])
+        )
+        response = future.result()
+
+        engine.stop()
+        ```
+    """
+
+    def __init__(self, max_connections: int = 256):
+        """
+        Initialize the engine. The event loop is started by `start`.
+
+        Args:
+            max_connections: Maximum number of pooled HTTP connections shared by
+                the OpenAI-compatible async clients
+        """
+        self.max_connections = max_connections
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.http_client = None
+        self.clients: Dict[Tuple[str, str], AsyncOpenAI] = {}
+        self.semaphores: Dict[Any, asyncio.Semaphore] = {}
+        self.ready = threading.Event()
+
+    def start(self) -> None:
+        """Start the event loop thread if it is not already running."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+
+        self.ready.clear()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="AsyncLLMEngine", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        logger.info("Async LLM engine started.")
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self.ready.set)
+        self.loop.run_forever()
+
+    def stop(self) -> None:
+        """
+        Cancel pending completions, close the shared clients and stop the event loop thread.
+
+        Futures of cancelled completions are cancelled as well, so their
+        callers are released instead of waiting on a loop that no longer runs.
+        """
+        if self.loop is None or not self.loop.is_running():
+            return
+
+        try:
+            self.submit(self._cancel_pending()).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error cancelling pending async LLM requests: {e}")
+
+        try:
+            self.submit(self._aclose()).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing async LLM clients: {e}")
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+        self.loop = None
+        self.thread = None
+        logger.info("Async LLM engine stopped.")
+
+    async def _cancel_pending(self) -> None:
+        current = asyncio.current_task()
+        pending = [task for task in asyncio.all_tasks() if task is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if pending:
+            logger.info(f"Cancelled {len(pending)} pending async LLM requests.")
+
+    async def _aclose(self) -> None:
+        for client in self.clients.values():
+            await client.close()
+        self.clients.clear()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    def submit(self, coroutine: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the engine's event loop from any thread.
+
+        Args:
+            coroutine: The coroutine to run
+
+        Returns:
+            A concurrent.futures.Future resolving to the coroutine's result
+        """
+        if self.loop is None:
+            raise RuntimeError("AsyncLLMEngine is not running. Call start() first.")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def get_semaphore(self, key: Any, limit: int) -> asyncio.Semaphore:
+        """
+        Get the semaphore bounding concurrent requests for a model.
+
+        Must be called from the engine's event loop.
+
+        Args:
+            key: Identifier of the model, e.g. its index
+            limit: Maximum number of concurrent requests
+
+        Returns:
+            The asyncio.Semaphore for that model
+        """
+        semaphore = self.semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(limit)
+            self.semaphores[key] = semaphore
+        return semaphore
+
+    def get_async_client(self, client: OpenAI) -> AsyncOpenAI:
+        """
+        Get the async counterpart of a synchronous OpenAI client.
+
+        Clients are cached per (base_url, api_key) and share one pooled
+        HTTP connection pool. Must be called from the engine's event loop.
+
+        Args:
+            client: The synchronous OpenAI client configured for an endpoint
+
+        Returns:
+            An AsyncOpenAI client for the same endpoint
+        """
+        key = (str(client.base_url), client.api_key)
+        async_client = self.clients.get(key)
+        if async_client is None:
+            if self.http_client is None:
+                import httpx
+                self.http_client = httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=10.0)
+                )
+            async_client = AsyncOpenAI(
+                base_url=str(client.base_url),
+                api_key=client.api_key,
+                http_client=self.http_client
+            )
+            self.clients[key] = async_client
+        return async_client
+
+    async def acompletion(self, model: str, **completion_kwargs) -> Any:
+        """
+        Run a LiteLLM completion without blocking a thread.
+
+        Args:
+            model: LiteLLM model identifier, e.g. "openai/gpt-4o-mini"
+            **completion_kwargs: Arguments forwarded to litellm.acompletion
+
+        Returns:
+            The LiteLLM ModelResponse
+        """
+        return await litellm.acompletion(model=model, **completion_kwargs)
+
+    async def openai_completion(self, client: OpenAI, model_name: str, **completion_kwargs) -> Any:
+        """
+        Run a chat completion against an OpenAI-compatible endpoint asynchronously.
+
+        Args:
+            client: The synchronous OpenAI client whose endpoint should be used
+            model_name: Model name expected by the endpoint
+            **completion_kwargs: Arguments forwarded to chat.completions.create
+
+        Returns:
+            The ChatCompletion response
+        """
+        async_client = self.get_async_client(client)
+        return await async_client.chat.completions.create(model=model_name, **completion_kwargs)
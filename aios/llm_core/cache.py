@@ -0,0 +1,281 @@
+# This implements the response cache of the LLM adapter.
+# Deterministic (temperature 0) completions are stored under a hash of
+# everything that determines them, in an in-memory LRU tier backed by an
+# optional SQLite tier on disk, so repeated prompts skip the model entirely.
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Normalize chat messages for cache keys.
+
+    Drops keys with empty values and strips surrounding whitespace from
+    string contents, so cosmetic differences do not cause cache misses.
+
+    Args:
+        messages: Chat messages as sent to the model
+
+    Returns:
+        The normalized messages
+    """
+    normalized = []
+    for message in messages or []:
+        item = {}
+        for key, value in dict(message).items():
+            if value is None or value == "" or value == []:
+                continue
+            item[key] = value.strip() if isinstance(value, str) else value
+        normalized.append(item)
+    return normalized
+
+
+def make_cache_key(
+    model_name: str,
+    messages: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    temperature: Optional[float] = None,
+    message_return_type: Optional[str] = None,
+    max_tokens: Optional[int] = None
+) -> str:
+    """
+    Hash the parameters that determine a completion into a cache key.
+
+    Args:
+        model_name: Name of the model serving the request
+        messages: Chat messages
+        tools: Tool definitions, if any
+        response_format: Response format specification, if any
+        temperature: Sampling temperature
+        message_return_type: Expected return type ("text" or "json")
+        max_tokens: Maximum number of generated tokens
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = {
+        "model": model_name,
+        "messages": normalize_messages(messages),
+        "tools": tools or None,
+        "response_format": response_format or None,
+        "temperature": temperature,
+        "message_return_type": message_return_type,
+        "max_tokens": max_tokens,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM responses with TTL and LRU eviction.
+
+    Values are JSON-serializable dicts (a dumped LLMResponse). The memory
+    tier is bounded by entry count and by the size of the serialized values;
+    the optional disk tier is a SQLite table bounded by entry count. Entries
+    older than `ttl` seconds are treated as misses and removed.
+
+    Example:
+        ```python
+        cache = ResponseCache(ttl=3600, max_entries=1024, disk_path="~/.aios/llm_cache.db")
+
+        key = make_cache_key("gpt-4o-mini", messages, temperature=0.0)
+        cached = cache.get(key)
+        if cached is None:
+            response = ...
+            cache.put(key, response.model_dump())
+        ```
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = 3600,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 10000
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds an entry stays valid, None for no expiry
+            max_entries: Maximum number of entries in memory
+            max_bytes: Maximum total size of serialized values in memory
+            disk_path: SQLite file for the disk tier, None to keep the cache in memory only
+            disk_max_entries: Maximum number of entries on disk
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+
+        # key -> (stored_at, serialized value)
+        self.memory: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+
+        self.db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._open_disk(os.path.expanduser(disk_path))
+
+        # Metrics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _open_disk(self, path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, stored_at REAL, accessed_at REAL, value TEXT)"
+            )
+            self.db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache disk tier disabled, cannot open {path}: {e}")
+            self.db = None
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            A fresh copy of the cached value, or None on a miss
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._expired(stored_at, now):
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(value)
+                self._remove_memory(key)
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT stored_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    stored_at, value = row
+                    if not self._expired(stored_at, now):
+                        self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self.db.commit()
+                        # Promote to the memory tier
+                        self._put_memory(key, stored_at, value)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(value)
+                    self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        Store a value in both tiers.
+
+        Args:
+            key: Cache key from make_cache_key
+            value: JSON-serializable value
+        """
+        try:
+            serialized = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Response not cacheable: {e}")
+            return
+
+        now = time.time()
+        with self.lock:
+            self._put_memory(key, now, serialized)
+            if self.db is not None:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO responses (key, stored_at, accessed_at, value) VALUES (?, ?, ?, ?)",
+                    (key, now, now, serialized)
+                )
+                self._evict_disk()
+                self.db.commit()
+
+    def _put_memory(self, key: str, stored_at: float, serialized: str) -> None:
+        if len(serialized) > self.max_bytes:
+            return
+        self._remove_memory(key)
+        self.memory[key] = (stored_at, serialized)
+        self.memory_bytes += len(serialized)
+        while self.memory and (len(self.memory) > self.max_entries or self.memory_bytes > self.max_bytes):
+            oldest = next(iter(self.memory))
+            self._remove_memory(oldest)
+            self.evictions += 1
+
+    def _remove_memory(self, key: str) -> None:
+        entry = self.memory.pop(key, None)
+        if entry is not None:
+            self.memory_bytes -= len(entry[1])
+
+    def _evict_disk(self) -> None:
+        if self.ttl is not None:
+            self.db.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.ttl,))
+        count = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.disk_max_entries:
+            self.db.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.disk_max_entries,)
+            )
+
+    def clear(self) -> None:
+        """Remove every entry from both tiers."""
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+
+    def close(self) -> None:
+        """Close the disk tier."""
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the cache's counters.
+
+        Returns:
+            Dict with hits, misses, hit rate, evictions and tier sizes
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_enabled": self.db is not None,
+        }
@@ -0,0 +1,429 @@
+# This implements continuous batching for locally loaded Hugging Face models.
+# Requests are prefilled one by one as they arrive and then decoded together,
+# one token per forward pass, in a single left-padded batch. Finished rows
+# leave the batch at once and waiting requests take their place, so the batch
+# stays full under load instead of draining between requests.
+
+import concurrent.futures
+import logging
+import threading
+from dataclasses import dataclass, field
+from queue import Queue, Empty
+from typing import Any, Callable, List, Optional, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# A legacy KV cache: one (key, value) pair per layer, each [batch, heads, seq, head_dim]
+LegacyCache = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+def cache_to_legacy(cache: Any) -> LegacyCache:
+    """
+    Convert a model's KV cache to the legacy tuple-of-tensors layout.
+
+    Args:
+        cache: A transformers Cache object or an already legacy tuple
+
+    Returns:
+        Tuple of (key, value) pairs, one per layer
+    """
+    if cache is None:
+        return ()
+    if hasattr(cache, "to_legacy_cache"):
+        return cache.to_legacy_cache()
+    if hasattr(cache, "layers"):
+        return tuple((layer.keys, layer.values) for layer in cache.layers)
+    return tuple(cache)
+
+
+def cache_from_legacy(legacy: LegacyCache) -> Any:
+    """
+    Build a DynamicCache from the legacy tuple-of-tensors layout.
+
+    Falls back to returning the tuple for transformers versions without
+    DynamicCache, which still accept legacy caches.
+
+    Args:
+        legacy: Tuple of (key, value) pairs, one per layer
+
+    Returns:
+        A cache object accepted as `past_key_values`
+    """
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return legacy
+
+    cache = DynamicCache()
+    for layer_idx, (key, value) in enumerate(legacy):
+        cache.update(key, value, layer_idx)
+    return cache
+
+
+def _left_pad(tensor: torch.Tensor, length: int, dim: int) -> torch.Tensor:
+    pad = length - tensor.shape[dim]
+    if pad <= 0:
+        return tensor
+    shape = list(tensor.shape)
+    shape[dim] = pad
+    return torch.cat([tensor.new_zeros(shape), tensor], dim=dim)
+
+
+@dataclass
+class _Request:
+    input_ids: torch.Tensor
+    max_new_tokens: int
+    temperature: float
+    top_k: Optional[int]
+    top_p: Optional[float]
+    on_delta: Optional[Callable[[str], None]]
+    future: concurrent.futures.Future
+    generated: List[int] = field(default_factory=list)
+    emitted_text: str = ""
+    # Sampled token that has not been fed through the model yet
+    pending_token: Optional[int] = None
+
+
+class ContinuousBatchingEngine:
+    """
+    Continuous-batching generation engine for a local Hugging Face causal LM.
+
+    Requests from any thread are queued with `submit`. A single engine thread
+    owns the model: it prefills each new request on its own, merges its KV
+    cache into the running batch (left-padded to a common length) and then
+    advances every row by one token per forward pass. Each row keeps its own
+    sampling parameters and stop conditions. Finished rows are removed from
+    the batch immediately so waiting requests can join on the next step.
+
+    Works on CPU as well as GPU. Models whose KV cache cannot be expressed as
+    per-layer (key, value) tensors are not supported.
+
+    Example:
+        ```python
+        engine = ContinuousBatchingEngine(model, tokenizer, max_batch_size=8)
+        engine.start()
+
+        input_ids = tokenizer("Hello", return_tensors="pt")["input_ids"]
+        future = engine.submit(input_ids, max_new_tokens=64, temperature=0.7)
+        print(future.result())
+
+        engine.stop()
+        ```
+    """
+
+    def __init__(self, model, tokenizer, max_batch_size: int = 8, prefix_cache=None):
+        """
+        Initialize the engine. The engine thread is started by `start`.
+
+        Args:
+            model: The loaded AutoModelForCausalLM
+            tokenizer: The tokenizer matching the model
+            max_batch_size: Maximum number of sequences decoded together
+            prefix_cache: Optional PrefixKVCache used to skip prefilling shared prompt prefixes
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.prefix_cache = prefix_cache
+        self.eos_token_ids = self._resolve_eos_token_ids()
+
+        self.waiting: Queue = Queue()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+        # Batch state, only touched by the engine thread
+        self.rows: List[_Request] = []
+        self.cache: LegacyCache = ()
+        self.attention_mask: Optional[torch.Tensor] = None
+
+        # Metrics
+        self.steps = 0
+        self.generated_tokens = 0
+
+    def _resolve_eos_token_ids(self) -> set:
+        eos = getattr(getattr(self.model, "generation_config", None), "eos_token_id", None)
+        if eos is None:
+            eos = self.tokenizer.eos_token_id
+        if eos is None:
+            return set()
+        return set(eos) if isinstance(eos, (list, tuple)) else {eos}
+
+    def start(self) -> None:
+        """Start the engine thread if it is not already running."""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="HfBatchingEngine", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the engine thread and fail the requests it still holds."""
+        self.running = False
+        self.waiting.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def submit(
+        self,
+        input_ids: torch.Tensor,
+        max_new_tokens: int,
+        temperature: float = 1.0,
+        top_k: Optional[int] = None,
+        top_p: Optional[float] = None,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> concurrent.futures.Future:
+        """
+        Queue a generation request.
+
+        Args:
+            input_ids: Prompt token ids, shape [1, seq] or [seq]
+            max_new_tokens: Maximum number of tokens to generate
+            temperature: Sampling temperature, 0 for greedy decoding
+            top_k: Optional top-k filter for sampling
+            top_p: Optional nucleus filter for sampling
+            on_delta: Optional callback receiving decoded text as it is generated
+
+        Returns:
+            A future resolving to the generated text
+        """
+        if not self.running:
+            raise RuntimeError("ContinuousBatchingEngine is not running. Call start() first.")
+
+        future = concurrent.futures.Future()
+        if input_ids.dim() == 1:
+            input_ids = input_ids.unsqueeze(0)
+        self.waiting.put(_Request(
+            input_ids=input_ids,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature,
+            top_k=top_k,
+            top_p=top_p,
+            on_delta=on_delta,
+            future=future
+        ))
+        return future
+
+    def get_metrics(self) -> dict:
+        """
+        Get the engine's counters.
+
+        Returns:
+            Dict with the active batch size, queued requests, decode steps and generated tokens
+        """
+        return {
+            "active": len(self.rows),
+            "waiting": self.waiting.qsize(),
+            "steps": self.steps,
+            "generated_tokens": self.generated_tokens,
+        }
+
+    def _run(self) -> None:
+        while self.running:
+            try:
+                self._admit(block=not self.rows)
+                if self.rows:
+                    self._step()
+            except Exception as e:
+                logger.error(f"Continuous batching step failed: {e}", exc_info=True)
+                self._fail_all(e, include_waiting=False)
+
+        self._fail_all(RuntimeError("ContinuousBatchingEngine stopped"), include_waiting=True)
+
+    def _admit(self, block: bool) -> None:
+        """Prefill waiting requests into free batch slots."""
+        while len(self.rows) < self.max_batch_size:
+            try:
+                request = self.waiting.get(block=block)
+            except Empty:
+                return
+            block = False
+            if request is None:
+                return
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._prefill(request)
+            except Exception as e:
+                logger.error(f"Prefill failed: {e}", exc_info=True)
+                request.future.set_exception(e)
+
+    @torch.no_grad()
+    def _prefill(self, request: _Request) -> None:
+        device = self.model.device
+        input_ids = request.input_ids.to(device)
+        attention_mask = torch.ones_like(input_ids)
+
+        prefix, reused = (None, 0)
+        if self.prefix_cache is not None:
+            prefix, reused = self.prefix_cache.lookup(input_ids)
+
+        outputs = self.model(
+            input_ids[:, reused:],
+            attention_mask=attention_mask,
+            past_key_values=cache_from_legacy(prefix) if prefix is not None else None,
+            use_cache=True,
+            return_dict=True
+        )
+        cache = cache_to_legacy(outputs.past_key_values)
+        if self.prefix_cache is not None:
+            self.prefix_cache.insert(input_ids, cache)
+
+        next_token = self._sample(outputs.logits[:, -1, :], request)
+        if self._accept_token(request, next_token):
+            return
+
+        self._merge(request, cache, attention_mask)
+
+    def _merge(self, request: _Request, cache: LegacyCache, attention_mask: torch.Tensor) -> None:
+        """Left-pad the new row and the batch to a common length and concatenate them."""
+        if not self.rows:
+            self.rows = [request]
+            self.cache = cache
+            self.attention_mask = attention_mask
+            return
+
+        length = max(self.attention_mask.shape[1], attention_mask.shape[1])
+        self.cache = tuple(
+            (
+                torch.cat([_left_pad(batch_k, length, 2), _left_pad(new_k, length, 2)], dim=0),
+                torch.cat([_left_pad(batch_v, length, 2), _left_pad(new_v, length, 2)], dim=0),
+            )
+            for (batch_k, batch_v), (new_k, new_v) in zip(self.cache, cache)
+        )
+        self.attention_mask = torch.cat(
+            [_left_pad(self.attention_mask, length, 1), _left_pad(attention_mask, length, 1)],
+            dim=0
+        )
+        self.rows.append(request)
+
+    @torch.no_grad()
+    def _step(self) -> None:
+        """Feed every row's pending token through the model in one forward pass."""
+        device = self.model.device
+        input_ids = torch.tensor(
+            [[row.pending_token] for row in self.rows], dtype=torch.long, device=device
+        )
+        # Position of the new token is the number of real tokens already cached
+        position_ids = self.attention_mask.sum(dim=1, keepdim=True).to(torch.long)
+        self.attention_mask = torch.cat(
+            [self.attention_mask, self.attention_mask.new_ones((len(self.rows), 1))], dim=1
+        )
+
+        outputs = self.model(
+            input_ids,
+            attention_mask=self.attention_mask,
+            position_ids=position_ids,
+            past_key_values=cache_from_legacy(self.cache),
+            use_cache=True,
+            return_dict=True
+        )
+        self.cache = cache_to_legacy(outputs.past_key_values)
+        self.steps += 1
+
+        logits = outputs.logits[:, -1, :]
+        keep = []
+        for idx, row in enumerate(self.rows):
+            next_token = self._sample(logits[idx:idx + 1], row)
+            if not self._accept_token(row, next_token):
+                keep.append(idx)
+
+        if len(keep) < len(self.rows):
+            self._select_rows(keep)
+
+    def _select_rows(self, keep: List[int]) -> None:
+        """Drop finished rows from the batch and trim padding no remaining row needs."""
+        if not keep:
+            self.rows = []
+            self.cache = ()
+            self.attention_mask = None
+            return
+
+        index = torch.tensor(keep, dtype=torch.long, device=self.attention_mask.device)
+        self.rows = [self.rows[i] for i in keep]
+        attention_mask = self.attention_mask.index_select(0, index)
+
+        # Leading columns that are padding for every remaining row can go
+        real_columns = attention_mask.any(dim=0).nonzero()
+        start = int(real_columns[0]) if len(real_columns) else 0
+
+        self.attention_mask = attention_mask[:, start:]
+        self.cache = tuple(
+            (
+                key.index_select(0, index.to(key.device))[:, :, start:],
+                value.index_select(0, index.to(value.device))[:, :, start:],
+            )
+            for key, value in self.cache
+        )
+
+    def _sample(self, logits: torch.Tensor, request: _Request) -> int:
+        """Pick the next token of one row with that row's sampling parameters."""
+        if request.temperature is None or request.temperature < 1e-6:
+            return int(torch.argmax(logits, dim=-1))
+
+        logits = logits.float() / request.temperature
+        if request.top_k:
+            top_k = min(request.top_k, logits.shape[-1])
+            threshold = torch.topk(logits, top_k, dim=-1).values[..., -1, None]
+            logits = logits.masked_fill(logits < threshold, float("-inf"))
+        if request.top_p is not None and request.top_p < 1.0:
+            sorted_logits, sorted_idx = torch.sort(logits, descending=True, dim=-1)
+            cumulative = torch.softmax(sorted_logits, dim=-1).cumsum(dim=-1)
+            remove = cumulative > request.top_p
+            # Always keep the most likely token
+            remove[..., 1:] = remove[..., :-1].clone()
+            remove[..., 0] = False
+            logits = logits.masked_fill(remove.scatter(-1, sorted_idx, remove), float("-inf"))
+
+        probs = torch.softmax(logits, dim=-1)
+        return int(torch.multinomial(probs, num_samples=1))
+
+    def _accept_token(self, request: _Request, token: int) -> bool:
+        """
+        Record a sampled token for a row.
+
+        Returns:
+            True if the row is finished and its future has been resolved
+        """
+        finished = token in self.eos_token_ids
+        if not finished:
+            request.generated.append(token)
+            request.pending_token = token
+            self.generated_tokens += 1
+            self._emit(request)
+            finished = len(request.generated) >= request.max_new_tokens
+
+        if finished:
+            request.future.set_result(
+                self.tokenizer.decode(request.generated, skip_special_tokens=True)
+            )
+        return finished
+
+    def _emit(self, request: _Request) -> None:
+        if request.on_delta is None:
+            return
+        text = self.tokenizer.decode(request.generated, skip_special_tokens=True)
+        if len(text) > len(request.emitted_text):
+            try:
+                request.on_delta(text[len(request.emitted_text):])
+            except Exception as e:
+                logger.warning(f"Streaming callback failed: {e}")
+            request.emitted_text = text
+
+    def _fail_all(self, error: Exception, include_waiting: bool) -> None:
+        for row in self.rows:
+            if not row.future.done():
+                row.future.set_exception(error)
+        self.rows = []
+        self.cache = ()
+        self.attention_mask = None
+
+        while include_waiting:
+            try:
+                request = self.waiting.get_nowait()
+            except Empty:
+                break
+            if request is not None and not request.future.done():
+                request.future.set_exception(error)
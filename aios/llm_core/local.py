@@ -15,6 +15,12 @@ class HfLocalBackend:
         """
         Initializes the Hugging Face local backend.
 
+        When `llms.hf_batching.enabled` is set in the configuration, concurrent
+        `generate` calls are served by a ContinuousBatchingEngine that decodes
+        them together instead of one conversation per call. When
+        `llms.hf_prefix_cache.enabled` is set, the KV state of shared prompt
+        prefixes is kept in a PrefixKVCache and reused across requests.
+
         Args:
             model_name (str): The name of the model to load.
             device (str, optional): The device to load the model on (default is "auto").
@@ -29,6 +35,8 @@ class HfLocalBackend:
         self.max_gpu_memory = max_gpu_memory
         self.eval_device = eval_device if eval_device is not None else "cuda"
         self.hostname = hostname
+        self.batching_engine = None
+        self.prefix_cache = None
 
         # If a hostname is given, then this HF instance is hosted as a web server.
         # Therefore, do not start the AIOS-based HF instance.
@@ -46,6 +54,26 @@ class HfLocalBackend:
         )
         self.tokenizer.chat_template = "{% for message in messages %}{% if message['role'] == 'user' %}{{ ' ' }}{% endif %}{{ message['content'] }}{% if not loop.last %}{{ ' ' }}{% endif %}{% endfor %}{{ eos_token }}"
 
+        prefix_cache_config = config.get_llms_config().get("hf_prefix_cache", {}) or {}
+        if prefix_cache_config.get("enabled", False):
+            from .prefix_cache import PrefixKVCache
+            self.prefix_cache = PrefixKVCache(
+                max_bytes=int(prefix_cache_config.get("max_memory_mb", 512)) * 1024 * 1024,
+                block_size=prefix_cache_config.get("block_size", 16)
+            )
+
+        batching_config = config.get_llms_config().get("hf_batching", {}) or {}
+        if batching_config.get("enabled", False):
+            from .hf_batching import ContinuousBatchingEngine
+            self.batching_engine = ContinuousBatchingEngine(
+                self.model,
+                self.tokenizer,
+                max_batch_size=batching_config.get("max_batch_size", 8),
+                prefix_cache=self.prefix_cache
+            )
+            self.batching_engine.start()
+            print(f"Continuous batching enabled (max batch size {self.batching_engine.max_batch_size})")
+
     def inference_online(self, messages, temperature, stream=False):
         """
         Sends inference requests to a remote Hugging Face model hosted at the specified hostname.
@@ -70,9 +98,10 @@ class HfLocalBackend:
         messages, 
         temperature, 
         max_tokens,
-        tools,
+        tools=None,
         stream=False, 
-        time_limit=None
+        time_limit=None,
+        on_delta=None
     ):
         
         """
@@ -82,6 +111,8 @@ class HfLocalBackend:
             messages (list): The chat messages for inference.
             temperature (float): Sampling temperature for response generation.
             stream (bool, optional): Whether to stream responses (default is False).
+            on_delta (callable, optional): Callback receiving generated text as it is produced.
+                Without the batching engine the full text is passed once at the end.
 
         Returns:
             str: The generated response.
@@ -100,6 +131,16 @@ class HfLocalBackend:
             return_tensors="pt"
         )
         
+        if self.batching_engine is not None:
+            future = self.batching_engine.submit(
+                inputs["input_ids"],
+                max_new_tokens=max_tokens,
+                temperature=temperature,
+                top_k=10,
+                on_delta=on_delta
+            )
+            return future.result()
+
         inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
         temperature = temperature if temperature > 0.5 else 0.5
         response  = self.model.generate(
@@ -118,8 +159,18 @@ class HfLocalBackend:
         # breakpoint()
         length = inputs["input_ids"].shape[1]
         result = self.tokenizer.decode(response[0][length:], skip_special_tokens=True)
+        if on_delta is not None:
+            on_delta(result)
         return result
 
+    def cleanup(self):
+        """Stops the continuous batching engine and drops cached prefixes."""
+        if self.batching_engine is not None:
+            self.batching_engine.stop()
+            self.batching_engine = None
+        if self.prefix_cache is not None:
+            self.prefix_cache.clear()
+
 class VLLMLocalBackend:
     """
     The VLLMLocalBackend class provides an interface for loading and interacting with vLLM models, 
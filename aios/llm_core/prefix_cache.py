@@ -0,0 +1,176 @@
+# This implements the prefix KV cache of the local Hugging Face backend.
+# Prompts that start with the same tokens (system prompts, tool-format
+# instructions, kernel helper prompts) share the attention state of that
+# prefix, so only the tokens after it have to be prefilled.
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+# One (key, value) pair per layer, each [1, heads, seq, head_dim]
+LegacyCache = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+
+
+class PrefixKVCache:
+    """
+    LRU cache of KV states keyed by block-aligned hashes of token prefixes.
+
+    A prompt is split into blocks of `block_size` tokens and every block
+    boundary gets a chained hash (the hash of a block covers all tokens
+    before it). Inserting a prompt stores its KV state once, truncated to
+    the last full block, and registers all of its boundary hashes. A lookup
+    walks the new prompt's boundary hashes from the longest down and returns
+    the cached state sliced to the longest shared prefix. Entries are evicted
+    least recently used first once their total size exceeds `max_bytes`.
+
+    Example:
+        ```python
+        prefix_cache = PrefixKVCache(max_bytes=512 * 1024 * 1024, block_size=16)
+
+        legacy, reused = prefix_cache.lookup(input_ids)
+        # ... prefill input_ids[:, reused:] on top of legacy ...
+        prefix_cache.insert(input_ids, prompt_cache)
+        ```
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, block_size: int = 16):
+        """
+        Initialize the prefix cache.
+
+        Args:
+            max_bytes: Memory budget for the cached KV tensors
+            block_size: Number of tokens per hashed block
+        """
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+
+        self.entries: "OrderedDict[int, Tuple[LegacyCache, int]]" = OrderedDict()
+        self.index: Dict[bytes, Tuple[int, int]] = {}
+        self.entry_keys: Dict[int, List[bytes]] = {}
+        self.next_entry_id = 0
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.reused_tokens = 0
+
+    def _block_hashes(self, input_ids: torch.Tensor, max_length: int) -> List[Tuple[int, bytes]]:
+        """Chained hashes of every full block boundary up to max_length tokens."""
+        tokens = input_ids.reshape(-1)[:max_length].to(torch.int64).cpu().numpy()
+        hashes = []
+        digest = b""
+        for end in range(self.block_size, len(tokens) + 1, self.block_size):
+            digest = hashlib.blake2b(
+                digest + tokens[end - self.block_size:end].tobytes(), digest_size=16
+            ).digest()
+            hashes.append((end, digest))
+        return hashes
+
+    def lookup(self, input_ids: torch.Tensor) -> Tuple[Optional[LegacyCache], int]:
+        """
+        Find the cached KV state of the longest block-aligned prefix of a prompt.
+
+        At least one prompt token is always left uncached so the caller's
+        prefill still produces logits for the next token.
+
+        Args:
+            input_ids: Prompt token ids, shape [1, seq]
+
+        Returns:
+            Tuple of (legacy cache sliced to the prefix, prefix length), or
+            (None, 0) if no prefix is cached
+        """
+        hashes = self._block_hashes(input_ids, input_ids.shape[-1] - 1)
+        with self.lock:
+            for length, digest in reversed(hashes):
+                hit = self.index.get(digest)
+                if hit is None or hit[0] not in self.entries:
+                    continue
+                entry_id, _ = hit
+                legacy, _ = self.entries[entry_id]
+                self.entries.move_to_end(entry_id)
+                self.hits += 1
+                self.reused_tokens += length
+                return tuple((k[:, :, :length], v[:, :, :length]) for k, v in legacy), length
+            self.misses += 1
+            return None, 0
+
+    def insert(self, input_ids: torch.Tensor, legacy: LegacyCache) -> None:
+        """
+        Cache the KV state of a prompt's full blocks.
+
+        Args:
+            input_ids: Prompt token ids, shape [1, seq]
+            legacy: KV state covering at least the prompt tokens, batch size 1
+        """
+        hashes = self._block_hashes(input_ids, input_ids.shape[-1])
+        if not hashes or not legacy:
+            return
+        length = hashes[-1][0]
+
+        with self.lock:
+            # Already cached up to the same boundary: just refresh it
+            hit = self.index.get(hashes[-1][1])
+            if hit is not None and hit[0] in self.entries and hit[1] >= length:
+                self.entries.move_to_end(hit[0])
+                return
+
+        # Copy the aligned part so the cache does not pin the caller's tensors
+        stored = tuple(
+            (k[:, :, :length].detach().clone(), v[:, :, :length].detach().clone())
+            for k, v in legacy
+        )
+        size = sum(k.numel() * k.element_size() + v.numel() * v.element_size() for k, v in stored)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            entry_id = self.next_entry_id
+            self.next_entry_id += 1
+            self.entries[entry_id] = (stored, size)
+            self.entry_keys[entry_id] = [digest for _, digest in hashes]
+            for boundary, digest in hashes:
+                self.index[digest] = (entry_id, boundary)
+            self.total_bytes += size
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            entry_id, (_, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            for digest in self.entry_keys.pop(entry_id, []):
+                # A newer entry may have taken over the key
+                if self.index.get(digest, (None,))[0] == entry_id:
+                    del self.index[digest]
+
+    def clear(self) -> None:
+        """Drop every cached prefix."""
+        with self.lock:
+            self.entries.clear()
+            self.index.clear()
+            self.entry_keys.clear()
+            self.total_bytes = 0
+
+    def get_metrics(self) -> dict:
+        """
+        Get the cache's counters.
+
+        Returns:
+            Dict with hits, misses, reused prompt tokens, entries and memory use
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "reused_tokens": self.reused_tokens,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
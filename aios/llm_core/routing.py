@@ -2,6 +2,7 @@ from enum import Enum
 from typing import List, Dict, Any
 import chromadb
 from chromadb.utils import embedding_functions
+import hashlib
 import json
 import numpy as np
 from typing import List, Dict, Any
@@ -10,7 +11,9 @@ from collections import defaultdict
 
 import json
 
-from threading import Lock
+from threading import Lock, Event, Thread
+import time
+from collections import deque
 
 import openai
 
@@ -22,6 +25,7 @@ from pulp import (
     LpVariable,
     lpSum,
     PULP_CBC_CMD,
+    LpStatus,
     value
 )
 
@@ -30,7 +34,7 @@ import litellm
 import tempfile
 import gdown
 
-from litellm import token_counter
+from .tokens import get_token_counter
 
 """
 Load balancing strategies. Each class represents a strategy which returns the
@@ -49,44 +53,264 @@ the specific LLM endpoint.
 class RouterStrategy:
     Sequential = "sequential"
     Smart = "smart"
+    LoadAware = "load_aware"
+
+class ModelLoadTracker:
+    """
+    Live load and performance of every model, fed by the LLM adapter and read by the routers.
+
+    Models are identified by their index in the adapter's ``llm_configs``, so
+    replicas of one model behind different hostnames are tracked separately.
+    Per model it keeps the in-flight count, the dispatch times of the last
+    minute, the concurrency and rate limits, and EWMAs of the latency, the
+    output tokens per second and the error and rate-limit (429) rates.
+
+    Example:
+        ```python
+        tracker = ModelLoadTracker()
+        tracker.set_limits(0, concurrency=32, requests_per_minute=500)
+
+        tracker.on_dispatch(0)
+        tracker.get_capacity(0)  # 31
+        tracker.on_complete(0, latency=1.4, output_tokens=120)
+        tracker.expected_completion_time(0, output_tokens=400)
+        ```
+    """
+
+    def __init__(self, rate_window: float = 60.0, smoothing: float = 0.2):
+        """
+        Args:
+            rate_window: Seconds of dispatch history counted against rate limits
+            smoothing: EWMA weight of the newest latency, throughput and error sample
+        """
+        self.rate_window = rate_window
+        self.smoothing = smoothing
+        self.inflight: Dict[int, int] = defaultdict(int)
+        self.dispatches: Dict[int, deque] = defaultdict(deque)
+        self.concurrency_limits: Dict[int, int] = {}
+        self.rate_limits: Dict[int, int] = {}
+        self.latency: Dict[int, float] = {}
+        self.tokens_per_second: Dict[int, float] = {}
+        self.error_rate: Dict[int, float] = defaultdict(float)
+        self.rate_limited_rate: Dict[int, float] = defaultdict(float)
+        self.completed: Dict[int, int] = defaultdict(int)
+        self.lock = Lock()
+
+    def set_limits(self, model_idx: int, concurrency: int | None = None, requests_per_minute: int | None = None):
+        with self.lock:
+            if concurrency:
+                self.concurrency_limits[model_idx] = int(concurrency)
+            if requests_per_minute:
+                self.rate_limits[model_idx] = int(requests_per_minute)
+
+    def on_dispatch(self, model_idx: int):
+        now = time.time()
+        with self.lock:
+            self.inflight[model_idx] += 1
+            self.dispatches[model_idx].append(now)
+            self._expire(model_idx, now)
+
+    def on_complete(
+        self,
+        model_idx: int,
+        latency: float | None = None,
+        output_tokens: int | None = None,
+        error: bool = False,
+        rate_limited: bool = False
+    ):
+        """Record the end of a request and fold its outcome into the model's EWMAs."""
+        alpha = self.smoothing
+        with self.lock:
+            self.inflight[model_idx] = max(0, self.inflight[model_idx] - 1)
+            self.completed[model_idx] += 1
+            self.error_rate[model_idx] = alpha * float(error) + (1 - alpha) * self.error_rate[model_idx]
+            self.rate_limited_rate[model_idx] = alpha * float(rate_limited) + (1 - alpha) * self.rate_limited_rate[model_idx]
+            if error or latency is None or latency < 0:
+                return
+            previous = self.latency.get(model_idx)
+            self.latency[model_idx] = latency if previous is None else alpha * latency + (1 - alpha) * previous
+            if output_tokens and latency > 0:
+                rate = output_tokens / latency
+                previous = self.tokens_per_second.get(model_idx)
+                self.tokens_per_second[model_idx] = rate if previous is None else alpha * rate + (1 - alpha) * previous
+
+    def _expire(self, model_idx: int, now: float):
+        dispatches = self.dispatches[model_idx]
+        while dispatches and now - dispatches[0] > self.rate_window:
+            dispatches.popleft()
+
+    def get_inflight(self, model_idx: int) -> int:
+        with self.lock:
+            return self.inflight[model_idx]
+
+    def get_capacity(self, model_idx: int) -> float:
+        """Number of further requests the model can take now without queueing or
+        exceeding its rate limit; ``inf`` for a model without limits."""
+        now = time.time()
+        with self.lock:
+            capacity = float("inf")
+            limit = self.concurrency_limits.get(model_idx)
+            if limit:
+                capacity = min(capacity, limit - self.inflight[model_idx])
+            rate_limit = self.rate_limits.get(model_idx)
+            if rate_limit:
+                self._expire(model_idx, now)
+                capacity = min(capacity, rate_limit - len(self.dispatches[model_idx]))
+            return max(0.0, capacity)
+
+    def get_utilization(self, model_idx: int) -> float:
+        """In-flight requests relative to the concurrency limit (0 when unlimited)."""
+        with self.lock:
+            limit = self.concurrency_limits.get(model_idx)
+            return self.inflight[model_idx] / limit if limit else 0.0
+
+    def expected_completion_time(
+        self,
+        model_idx: int,
+        extra_inflight: int = 0,
+        output_tokens: float | None = None
+    ) -> float:
+        """Expected seconds until a new request on the model completes.
+
+        A request expected to generate `output_tokens` takes that many tokens
+        over the model's throughput EWMA; without an expected length or a
+        throughput sample it takes the latency EWMA. It waits for the waves
+        of in-flight requests ahead of it (in-flight over concurrency), each
+        taking as long, and is stretched by the share of attempts lost to
+        errors and 429s. A model without latency samples yet scores 0 so it
+        gets explored.
+
+        Args:
+            model_idx: Index of the model
+            extra_inflight: Requests already assigned to the model but not yet dispatched
+            output_tokens: Expected output length of the request, if known
+        """
+        with self.lock:
+            latency = self.latency.get(model_idx)
+            if latency is None:
+                return 0.0
+            tokens_per_second = self.tokens_per_second.get(model_idx)
+            if output_tokens and tokens_per_second:
+                # Throughput is measured over whole requests, so this includes
+                # the time to the first token
+                latency = output_tokens / tokens_per_second
+            inflight = self.inflight[model_idx] + extra_inflight
+            limit = self.concurrency_limits.get(model_idx) or 1
+            waves = inflight // limit + 1
+            success = max(0.1, 1.0 - self.error_rate[model_idx] - self.rate_limited_rate[model_idx])
+            return waves * latency / success
+
+    def snapshot(self) -> Dict[int, Dict[str, Any]]:
+        with self.lock:
+            indices = set(self.inflight) | set(self.concurrency_limits) | set(self.rate_limits)
+        snapshot = {}
+        for idx in sorted(indices):
+            with self.lock:
+                stats = {
+                    "inflight": self.inflight[idx],
+                    "concurrency_limit": self.concurrency_limits.get(idx),
+                    "requests_per_minute": self.rate_limits.get(idx),
+                    "completed": self.completed[idx],
+                    "latency_ewma": self.latency.get(idx),
+                    "tokens_per_second": self.tokens_per_second.get(idx),
+                    "error_rate": self.error_rate[idx],
+                    "rate_limited_rate": self.rate_limited_rate[idx],
+                }
+            stats["capacity"] = self.get_capacity(idx)
+            snapshot[idx] = stats
+        return snapshot
 
 class SequentialRouting:
     """
-    The SequentialRouting class implements a round-robin selection strategy for load-balancing LLM requests. 
-    It iterates through a list of selected language models and returns their corresponding index based on 
-    the request count.
+    The SequentialRouting class routes each query to the first of its selected models that is
+    configured, and load-balances across the replicas of that model.
 
-    This strategy ensures that multiple models are utilized in sequence, distributing queries evenly across the available configurations.
+    Configurations sharing a model name (for example the same vLLM model served on several
+    hostnames) form a replica group. Within a group, traffic is spread with one of three
+    balancing policies:
+
+    - ``round_robin``: replicas take turns.
+    - ``weighted``: smooth weighted round-robin on each replica's ``weight`` (default 1).
+    - ``least_outstanding``: the replica with the fewest in-flight requests, as reported by
+      the shared ModelLoadTracker, counting queries assigned earlier in the same batch.
 
     Args:
         llm_configs (List[Dict[str, Any]]): A list of LLM configurations, where each dictionary contains model information such as name, backend, and other optional parameters.
+        load_tracker (ModelLoadTracker, optional): Live load of the models, needed for ``least_outstanding``.
+        balancing (str): One of ``round_robin``, ``weighted`` or ``least_outstanding``.
 
     Example:
         ```python
         configs = [
-            {"name": "gpt-4o-mini", "backend": "openai"},
-            {"name": "qwen2.5-7b", "backend": "ollama"}
+            {"name": "meta-llama/Llama-3.1-8B-Instruct", "backend": "vllm", "hostname": "http://gpu-0:8091"},
+            {"name": "meta-llama/Llama-3.1-8B-Instruct", "backend": "vllm", "hostname": "http://gpu-1:8091", "weight": 2},
+            {"name": "gpt-4o-mini", "backend": "openai"}
         ]
 
         selected_llms = [
-            {"name": "gpt-4o-mini"},
-            {"name": "qwen2.5-7b"}
+            {"name": "meta-llama/Llama-3.1-8B-Instruct"}
         ]
 
-        strategy = SimpleStrategy(llm_configs=configs)
-        model_idxs = strategy.get_model_idxs(selected_llms, n_queries=3)
+        strategy = SequentialRouting(llm_configs=configs, balancing="weighted")
+        model_idxs = strategy.get_model_idxs([selected_llms] * 3, queries)  # [1, 0, 1]
         ```
     """
-    def __init__(self, llm_configs: List[Dict[str, Any]]):
+    BALANCING_POLICIES = ("round_robin", "weighted", "least_outstanding")
+
+    def __init__(
+        self,
+        llm_configs: List[Dict[str, Any]],
+        load_tracker: ModelLoadTracker | None = None,
+        balancing: str = "round_robin"
+    ):
+        if balancing not in self.BALANCING_POLICIES:
+            raise ValueError(f"Invalid balancing policy: {balancing}. Expected one of {self.BALANCING_POLICIES}")
+        if balancing == "least_outstanding" and load_tracker is None:
+            raise ValueError("least_outstanding balancing requires a load tracker")
+
         self.llm_configs = llm_configs
-        self.idx = 0 # internal index to track the current model in the round-robin selection.
+        self.load_tracker = load_tracker
+        self.balancing = balancing
 
-    # def __call__(self):
-    #     return self.get_model()
+        # Replica groups: model name -> indices of its configurations
+        self.replica_groups: Dict[str, List[int]] = defaultdict(list)
+        for idx, llm in enumerate(llm_configs):
+            self.replica_groups[llm.name].append(idx)
+        self.weights = [max(0.0, float(getattr(llm, "weight", 1) or 0)) for llm in llm_configs]
+
+        self.next_replica: Dict[str, int] = defaultdict(int)   # round_robin position per group
+        self.current_weights = [0.0] * len(llm_configs)        # weighted round-robin state
+        self.lock = Lock()
+
+    def _pick_replica(self, name: str, assigned: Dict[int, int]) -> int:
+        replicas = self.replica_groups[name]
+        if len(replicas) == 1:
+            return replicas[0]
+
+        if self.balancing == "least_outstanding":
+            return min(
+                replicas,
+                key=lambda idx: (self.load_tracker.get_inflight(idx) + assigned[idx], assigned[idx])
+            )
+
+        if self.balancing == "weighted":
+            # Smooth weighted round-robin: every pick raises each replica by its
+            # weight and lowers the chosen one by the group total
+            total = sum(self.weights[idx] for idx in replicas)
+            if total > 0:
+                for idx in replicas:
+                    self.current_weights[idx] += self.weights[idx]
+                chosen = max(replicas, key=lambda idx: self.current_weights[idx])
+                self.current_weights[chosen] -= total
+                return chosen
+
+        position = self.next_replica[name]
+        self.next_replica[name] = (position + 1) % len(replicas)
+        return replicas[position % len(replicas)]
 
     def get_model_idxs(self, selected_llm_lists: List[List[Dict[str, Any]]], queries: List[List[Dict[str, Any]]]):
         """
-        Selects model indices from the available LLM configurations using a round-robin strategy.
+        Selects model indices from the available LLM configurations, balancing across replicas.
 
         Args:
             selected_llm_lists (List[List[str]]): A list of selected LLM names from which models will be chosen.
@@ -96,28 +320,99 @@ class SequentialRouting:
             List[int]: A list of indices corresponding to the selected models in `self.llm_configs`.
 
         """
-        # current  = self.selected_llms[self.idx]
         model_idxs = []
-        
-        available_models = [llm.name for llm in self.llm_configs]
-        
-        n_queries = len(queries)
-        
-        for i in range(n_queries):
-            selected_llm_list = selected_llm_lists[i]
-            
-            if not selected_llm_list or len(selected_llm_list) == 0:
+        assigned = defaultdict(int)
+
+        with self.lock:
+            for i in range(len(queries)):
+                selected_llm_list = selected_llm_lists[i]
+
+                if not selected_llm_list or len(selected_llm_list) == 0:
+                    model_idxs.append(0)
+                    continue
+
+                model_idx = -1
+                for selected_llm in selected_llm_list:
+                    if selected_llm["name"] in self.replica_groups:
+                        model_idx = self._pick_replica(selected_llm["name"], assigned)
+                        assigned[model_idx] += 1
+                        break
+
+                model_idxs.append(model_idx)
+
+        return model_idxs
+
+class LoadAwareRouting:
+    """
+    Routes each query to the candidate model with the lowest expected completion time.
+
+    Candidates are every configured model whose name the query allows, so
+    replicas of one model on different hostnames compete with each other.
+    The expected completion time comes from the live signals of a
+    ModelLoadTracker: the query's expected output length over the model's
+    throughput (tokens per second) EWMA, or its latency EWMA before the first
+    throughput sample, in-flight requests over concurrency, and recent error
+    and 429 rates. The expected output length is the query's max_tokens,
+    capped at `default_output_tokens`. Queries of one batch are assigned one
+    after another, each counting the earlier ones as in flight.
+
+    Args:
+        llm_configs (List[Dict[str, Any]]): Configurations of the available models.
+        load_tracker (ModelLoadTracker): Live load of the models, fed by the adapter.
+        default_output_tokens (int): Expected output length of a query without a smaller max_tokens.
+
+    Example:
+        ```python
+        tracker = ModelLoadTracker()
+        router = LoadAwareRouting(llm_configs=configs, load_tracker=tracker)
+        model_idxs = router.get_model_idxs(selected_llm_lists, queries, max_tokens=[1024, None])
+        ```
+    """
+    def __init__(self, llm_configs: List[Dict[str, Any]], load_tracker: ModelLoadTracker, default_output_tokens: int = 256):
+        self.llm_configs = llm_configs
+        self.load_tracker = load_tracker
+        self.default_output_tokens = default_output_tokens
+        self.available_models = [llm.name for llm in llm_configs]
+
+    def get_model_idxs(
+        self,
+        selected_llm_lists: List[List[Dict[str, Any]]],
+        queries: List[List[Dict[str, Any]]],
+        max_tokens: List[int | None] | None = None
+    ):
+        """
+        Selects, for every query, the allowed model expected to finish it first.
+
+        Args:
+            selected_llm_lists (List[List[Dict[str, Any]]]): Allowed models per query.
+            queries (List[List[Dict[str, Any]]]): The queries of the batch.
+            max_tokens (List[int | None], optional): Output token limit of every query.
+
+        Returns:
+            List[int]: Indices into `self.llm_configs`.
+        """
+        assigned = defaultdict(int)
+        model_idxs = []
+        for i, selected_llm_list in enumerate(selected_llm_lists):
+            limit = max_tokens[i] if max_tokens else None
+            output_tokens = min(limit, self.default_output_tokens) if limit else self.default_output_tokens
+            names = {llm["name"] for llm in selected_llm_list or []}
+            candidates = [j for j, name in enumerate(self.available_models) if not names or name in names]
+            if not candidates:
                 model_idxs.append(0)
                 continue
-            
-            model_idx = -1
-            for selected_llm in selected_llm_list:
-                if selected_llm["name"] in available_models:
-                    model_idx = available_models.index(selected_llm["name"])
-                    break
-            
-            model_idxs.append(model_idx)
 
+            best = min(
+                candidates,
+                key=lambda j: (
+                    self.load_tracker.expected_completion_time(
+                        j, extra_inflight=assigned[j], output_tokens=output_tokens
+                    ),
+                    self.load_tracker.get_inflight(j) + assigned[j],
+                )
+            )
+            assigned[best] += 1
+            model_idxs.append(best)
         return model_idxs
 
 def get_cost_per_token(model_name: str) -> tuple[float, float]:
@@ -131,11 +426,11 @@ def get_cost_per_token(model_name: str) -> tuple[float, float]:
     info = cost_map.get(model_name, {})
     return info.get("input_cost_per_token", 0.0), info.get("output_cost_per_token", 0.0)
 
-def get_token_lengths(queries: List[List[Dict[str, Any]]]):
+def get_token_lengths(queries: List[List[Dict[str, Any]]], model_name: str | None = None):
     """
-    Get the token lengths of a list of queries.
+    Get the token lengths of a list of queries with the shared token counter.
     """
-    return [token_counter(model="gpt-4o-mini", messages=query) for query in queries]
+    return get_token_counter().count_batch(queries, model=model_name)
 
 def messages_to_query(messages: List[Dict[str, str]],
                       strategy: str = "last_user") -> str:
@@ -213,6 +508,12 @@ class SmartRouting:
             # self.test_collection = self._get_or_create_collection("test_queries")
             self.collection = self._get_or_create_collection("historical_queries")
             
+            # Columnar side index of the per-model outcomes of the historical
+            # queries, persisted next to the collection and memory-mapped on load
+            self._stats_dir = os.path.join(self._persist_root, "model_stats")
+            self._stats = None
+            self._stats_lock = Lock()
+            
             # If DB is empty and we have a bootstrap URL – populate it.
             if bootstrap_url and self.collection.count() == 0:
                 self._bootstrap_from_drive(bootstrap_url)
@@ -276,37 +577,182 @@ class SmartRouting:
                 ids.append(f"{idx}")
 
             collection.add(documents=queries, metadatas=metadatas, ids=ids)
+            with self._stats_lock:
+                self._stats = self._save_stats(self._build_stats())
             print(f"[SmartRouting]: {total_count} historical queries ingested.")
 
+        # ..................................................................
+        def _get_stats(self) -> Dict[str, Any]:
+            """Return the side index, loading or building it on first use.
+
+            The index is a dict with ``row_of_id`` (Chroma id -> row),
+            ``model_index`` (model name -> column) and three
+            ``[n_queries, n_models]`` arrays indexed by ``[row, column]``:
+            ``present`` (the model answered the query), ``correct`` and
+            ``out_len``. It is rebuilt from the collection if the files are
+            missing or out of date.
+            """
+            with self._stats_lock:
+                if self._stats is None:
+                    self._stats = self._load_stats()
+                if self._stats is None:
+                    self._stats = self._save_stats(self._build_stats())
+                return self._stats
+
+        def _fingerprint(self, ids: List[str]) -> str:
+            """Identify the collection's contents: its UUID (new when it is rebuilt) and its ids."""
+            digest = hashlib.sha256(str(self.collection.id).encode("utf-8"))
+            for doc_id in sorted(ids):
+                digest.update(b"\0" + str(doc_id).encode("utf-8"))
+            return digest.hexdigest()
+
+        def _build_stats(self) -> Dict[str, Any]:
+            """Decode the JSON metadata of every historical query into the side index arrays."""
+            records = self.collection.get(include=["metadatas"])
+            row_of_id = {doc_id: row for row, doc_id in enumerate(records["ids"])}
+            model_index: dict[str, int] = {}
+            entries = []
+            for row, meta in enumerate(records["metadatas"]):
+                for m in json.loads(meta["models"]):
+                    col = model_index.setdefault(m["model_name"], len(model_index))
+                    entries.append((row, col, float(m["correctness"]), float(m["output_token_length"])))
+
+            shape = (len(row_of_id), max(len(model_index), 1))
+            present = np.zeros(shape, dtype=np.float32)
+            correct = np.zeros(shape, dtype=np.float32)
+            out_len = np.zeros(shape, dtype=np.float32)
+            if entries:
+                rows, cols, corr, lens = (np.array(v) for v in zip(*entries))
+                rows, cols = rows.astype(np.int64), cols.astype(np.int64)
+                np.add.at(present, (rows, cols), 1.0)
+                np.add.at(correct, (rows, cols), corr)
+                np.add.at(out_len, (rows, cols), lens)
+
+            return {
+                "fingerprint": self._fingerprint(records["ids"]),
+                "row_of_id": row_of_id,
+                "model_index": model_index,
+                "present": present,
+                "correct": correct,
+                "out_len": out_len,
+            }
+
+        def _save_stats(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+            """Write the side index next to the collection and return it memory-mapped.
+
+            Every file is written to a temporary file and renamed over the old
+            one (index.json last), so mappings of an earlier index, in this or
+            another kernel process, keep reading the old, intact files.
+            """
+            index = {
+                "fingerprint": stats["fingerprint"],
+                "ids": list(stats["row_of_id"]),
+                "model_index": stats["model_index"],
+            }
+            try:
+                os.makedirs(self._stats_dir, exist_ok=True)
+                for name in ("present", "correct", "out_len"):
+                    self._replace_file(f"{name}.npy", lambda f, array=stats[name]: np.save(f, array))
+                self._replace_file("index.json", lambda f: f.write(json.dumps(index).encode("utf-8")))
+            except OSError as e:
+                print(f"[SmartRouting] Could not persist the model stats index: {e}")
+                return stats
+            return self._load_stats() or stats
+
+        def _replace_file(self, name: str, write) -> None:
+            """Atomically replace a file of the side index with what write(file) writes."""
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=self._stats_dir)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    write(f)
+                os.replace(tmp_path, os.path.join(self._stats_dir, name))
+            except BaseException:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                raise
+
+        def _load_stats(self) -> Dict[str, Any] | None:
+            """Memory-map the persisted side index, or return None if it is missing or stale."""
+            index_path = os.path.join(self._stats_dir, "index.json")
+            if not os.path.exists(index_path):
+                return None
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+                # A rebuilt or replaced collection invalidates the index even
+                # when it has the same number of rows
+                if len(index["ids"]) != self.collection.count():
+                    return None
+                if index.get("fingerprint") != self._fingerprint(self.collection.get(include=[])["ids"]):
+                    return None
+                stats = {
+                    name: np.load(os.path.join(self._stats_dir, f"{name}.npy"), mmap_mode="r")
+                    for name in ("present", "correct", "out_len")
+                }
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[SmartRouting] Rebuilding the model stats index: {e}")
+                return None
+            stats["fingerprint"] = index["fingerprint"]
+            stats["row_of_id"] = {doc_id: row for row, doc_id in enumerate(index["ids"])}
+            stats["model_index"] = index["model_index"]
+            return stats
+
         # ..................................................................
         def query_similar(self, query: str | List[str], n_results: int = 16):
             collection = self.collection
             return collection.query(query_texts=query if isinstance(query, list) else [query], n_results=n_results)
 
+        # ..................................................................
+        def predict_batch(self, queries: List[str], model_names: List[str], n_similar: int = 16):
+            """Predict correctness and output length of every model for every query.
+
+            All queries are embedded and searched in a single ``collection.query``
+            call; the neighbours' outcomes are then averaged with NumPy over the
+            pre-decoded arrays of ``_get_stats``.
+
+            Returns two ``[len(queries), len(model_names)]`` arrays (performance,
+            output length), zero where no neighbour has data for the model.
+            """
+            n_queries, n_models = len(queries), len(model_names)
+            if n_queries == 0 or self.collection.count() == 0:
+                return np.zeros((n_queries, n_models)), np.zeros((n_queries, n_models))
+
+            similar = self.query_similar(queries, n_results=n_similar)
+            stats = self._get_stats()
+
+            # Neighbour rows, padded with -1 where Chroma returned fewer results
+            neighbours = np.full((n_queries, n_similar), -1, dtype=np.int64)
+            for i, ids in enumerate(similar["ids"]):
+                rows = [stats["row_of_id"].get(doc_id, -1) for doc_id in ids[:n_similar]]
+                neighbours[i, :len(rows)] = rows
+            valid = (neighbours >= 0)[:, :, None]
+            safe = np.where(neighbours >= 0, neighbours, 0)
+
+            # [n_queries, n_similar, n_known_models] -> sums over neighbours
+            count = (stats["present"][safe] * valid).sum(axis=1)
+            correct = (stats["correct"][safe] * valid).sum(axis=1)
+            total_len = (stats["out_len"][safe] * valid).sum(axis=1)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                perf_known = np.where(count > 0, correct / count, 0.0)
+                len_known = np.where(count > 0, total_len / count, 0.0)
+
+            # Select the requested models' columns; unknown models stay at zero
+            perf = np.zeros((n_queries, n_models))
+            out_len = np.zeros((n_queries, n_models))
+            cols = [stats["model_index"].get(name, -1) for name in model_names]
+            known = [j for j, col in enumerate(cols) if col >= 0]
+            if known:
+                perf[:, known] = perf_known[:, [cols[j] for j in known]]
+                out_len[:, known] = len_known[:, [cols[j] for j in known]]
+            return perf, out_len
+
         # ..................................................................
         def predict(self, query: str | List[str], model_configs: List[Dict[str, Any]], n_similar: int = 16):
-            similar = self.query_similar(query, n_results=n_similar)
-            perf_mat, len_mat = [], []
-            for meta_group in similar["metadatas"]:
-                model_stats: dict[str, dict[str, float]] = defaultdict(lambda: {"total_len": 0, "cnt": 0, "correct": 0})
-                for meta in meta_group:
-                    for m in json.loads(meta["models"]):
-                        s = model_stats[m["model_name"]]
-                        s["total_len"] += m["output_token_length"]
-                        s["cnt"] += 1
-                        s["correct"] += int(m["correctness"])
-                perf_row, len_row = [], []
-                for cfg in model_configs:
-                    stats = model_stats.get(cfg["name"], None)
-                    if stats and stats["cnt"]:
-                        perf_row.append(stats["correct"] / stats["cnt"])
-                        len_row.append(stats["total_len"] / stats["cnt"])
-                    else:
-                        perf_row.append(0.0)
-                        len_row.append(0.0)
-                perf_mat.append(perf_row)
-                len_mat.append(len_row)
-            return np.array(perf_mat), np.array(len_mat)
+            queries = query if isinstance(query, list) else [query]
+            return self.predict_batch(queries, [cfg["name"] for cfg in model_configs], n_similar=n_similar)
 
     # ---------------------------------------------------------------------
     # SmartRouting main methods
@@ -317,21 +763,98 @@ class SmartRouting:
                 bootstrap_url: str ,
                 performance_requirement: float = 0.7,
                 n_similar: int = 16,
+                load_tracker: ModelLoadTracker | None = None,
+                assignment: str = "greedy",
+                solver_time_limit: float = 0.05,
+                balance_weight: float = 0.1,
+                fallback: Any = None,
+                background_init: bool = True,
                 ):
+        """
+        Args:
+            llm_configs: Configurations of the available models
+            bootstrap_url: Drive link or ID of the historical-query corpus
+            performance_requirement: Minimum predicted correctness per query
+            n_similar: Number of neighbour queries used for predictions
+            load_tracker: Live model load, used by the "global" assignment
+            assignment: "greedy" picks a model per query; "global" solves one
+                assignment over the whole batch under capacity constraints
+            solver_time_limit: Seconds the ILP solver may spend on a batch
+                before the capacity-aware greedy fallback is used
+            balance_weight: Weight of current model utilisation in the global
+                objective, relative to normalised cost
+            fallback: Router serving requests until the query store is ready
+                (or if it fails to load); round-robin SequentialRouting by default
+            background_init: Open (and, if empty, bootstrap) the query store
+                in a background thread so the kernel accepts traffic at once
+        """
         self.llm_configs = llm_configs
         self.available_models = [llm.name for llm in llm_configs]
         self.bootstrap_url = bootstrap_url
         self.performance_requirement = performance_requirement
         self.n_similar = n_similar
+        self.load_tracker = load_tracker
+        self.assignment = assignment
+        self.solver_time_limit = solver_time_limit
+        self.balance_weight = balance_weight
         self.lock = Lock()
         self.max_output_limit = 1024
         self.num_buckets = 10
         self.bucket_size = self.max_output_limit / self.num_buckets
 
-        # Initialise query store – will self‑populate if empty
-        self.store = self.QueryStore(bootstrap_url=bootstrap_url)
-
-        print(f"[SmartRouting] Ready – performance threshold: {self.performance_requirement}\n")
+        self.fallback = fallback or SequentialRouting(llm_configs=llm_configs, load_tracker=load_tracker)
+
+        # Query store – opened (and self‑populated if empty) off the startup path
+        self.store = None
+        self.state = "initializing"
+        self.init_error: str | None = None
+        self.init_started = time.time()
+        self.init_finished: float | None = None
+        self.ready = Event()
+
+        if background_init:
+            Thread(target=self._initialize_store, name="SmartRoutingInit", daemon=True).start()
+            print("[SmartRouting] Warming up in the background – routing with the fallback strategy until ready\n")
+        else:
+            self._initialize_store()
+
+    def _initialize_store(self):
+        """Open the query store, bootstrapping it if empty, and load its side index."""
+        try:
+            store = self.QueryStore(bootstrap_url=self.bootstrap_url)
+            # Load (or build) the per-model statistics now rather than on the first request
+            store._get_stats()
+            self.store = store
+            self.state = "ready"
+            print(f"[SmartRouting] Ready – performance threshold: {self.performance_requirement}\n")
+        except Exception as e:
+            self.state = "failed"
+            self.init_error = str(e)
+            print(f"[SmartRouting] Query store failed to initialize, keeping the fallback strategy: {e}\n")
+        finally:
+            self.init_finished = time.time()
+            self.ready.set()
+
+    def is_ready(self) -> bool:
+        """Whether requests are routed by the query store rather than the fallback."""
+        return self.state == "ready"
+
+    def wait_until_ready(self, timeout: float | None = None) -> bool:
+        """Block until initialization has finished; returns whether the store is ready."""
+        self.ready.wait(timeout)
+        return self.is_ready()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Readiness of the router, as reported on ``/status``."""
+        elapsed = (self.init_finished or time.time()) - self.init_started
+        return {
+            "strategy": RouterStrategy.Smart,
+            "state": self.state,
+            "ready": self.is_ready(),
+            "fallback": type(self.fallback).__name__ if not self.is_ready() else None,
+            "init_seconds": round(elapsed, 3),
+            "error": self.init_error,
+        }
 
     # .....................................................................
     # Local (per‑query) optimisation helper
@@ -349,54 +872,171 @@ class SmartRouting:
     # Public API – batch selection
     # .....................................................................
 
+    def _predict_scores(self, selected_llm_lists: List[List[Dict[str, Any]]], queries: List[List[Dict[str, Any]]]):
+        """Score every available model for every query of a batch.
+
+        Returns ``perf`` and ``cost`` arrays of shape ``[n_queries, n_models]``
+        over ``self.available_models`` and a boolean ``candidates`` mask marking
+        the models each query may be routed to.
+        """
+        input_lens = np.array(get_token_lengths(queries), dtype=np.float64)
+        converted_queries = [messages_to_query(query) for query in queries]
+
+        perf, out_len = self.store.predict_batch(converted_queries, self.available_models, n_similar=self.n_similar)
+
+        # Dynamic price lookup via LiteLLM, once per model
+        prices = np.array([get_cost_per_token(name) for name in self.available_models], dtype=np.float64).reshape(-1, 2)
+        cost = input_lens[:, None] * prices[None, :, 0] + out_len * prices[None, :, 1]
+
+        model_pos = {name: j for j, name in enumerate(self.available_models)}
+        candidates = np.zeros(perf.shape, dtype=bool)
+        for i, candidate_cfgs in enumerate(selected_llm_lists):
+            for cfg in candidate_cfgs:
+                j = model_pos.get(cfg["name"])
+                if j is not None:
+                    candidates[i, j] = True
+        return perf, cost, candidates
+
     def get_model_idxs(self, selected_llm_lists: List[List[Dict[str, Any]]], queries: List[str]):
         if len(selected_llm_lists) != len(queries):
             raise ValueError("selected_llm_lists must have same length as queries")
+        if not queries:
+            return []
 
-        input_lens = get_token_lengths(queries)
-        chosen_indices: list[int] = []
-        
-        converted_queries = [messages_to_query(query) for query in queries]
+        if not self.is_ready():
+            return self.fallback.get_model_idxs(selected_llm_lists, queries)
 
-        for q, q_len, candidate_cfgs in zip(converted_queries, input_lens, selected_llm_lists):
-            perf, out_len = self.store.predict(q, candidate_cfgs, n_similar=self.n_similar)
-            perf, out_len = perf[0], out_len[0]  # unpack single query
+        perf, cost, candidates = self._predict_scores(selected_llm_lists, queries)
 
-            # Dynamic price lookup via LiteLLM
-            cost_scores = []
-            for cfg, pred_len in zip(candidate_cfgs, out_len):
-                in_cost_pt, out_cost_pt = get_cost_per_token(cfg["name"])
-                cost_scores.append(q_len * in_cost_pt + pred_len * out_cost_pt)
-            cost_scores = np.array(cost_scores)
+        if self.assignment == "global":
+            return self._assign_global(perf, cost, candidates).tolist()
 
-            sel_local_idx = self._select_model_single(candidate_cfgs, perf, cost_scores)
-            if sel_local_idx is None:
-                chosen_indices.append(0)  # safe fallback
-                continue
+        # Cheapest qualified candidate, else the best-performing candidate
+        qualified = candidates & (perf >= self.performance_requirement)
+        cheapest = np.argmin(np.where(qualified, cost, np.inf), axis=1)
+        best = np.argmax(np.where(candidates, perf, -np.inf), axis=1)
+        chosen = np.where(qualified.any(axis=1), cheapest, best)
+        chosen = np.where(candidates.any(axis=1), chosen, 0)  # safe fallback
 
-            # Map back to global llm_configs index
-            sel_name = candidate_cfgs[sel_local_idx]["name"]
-            
-            sel_idx = self.available_models.index(sel_name)
-            chosen_indices.append(sel_idx)
-
-        return chosen_indices
+        return chosen.tolist()
 
     # .....................................................................
-    # Global optimisation (unchanged except for cost lookup)
+    # Global optimisation over a whole batch
     # .....................................................................
 
-    def optimize_model_selection_global(self, perf_scores: np.ndarray, cost_scores: np.ndarray):
+    def _model_capacities(self) -> np.ndarray:
+        if self.load_tracker is None:
+            return np.full(len(self.available_models), np.inf)
+        return np.array([self.load_tracker.get_capacity(j) for j in range(len(self.available_models))], dtype=np.float64)
+
+    def _model_utilization(self) -> np.ndarray:
+        if self.load_tracker is None:
+            return np.zeros(len(self.available_models))
+        return np.array([self.load_tracker.get_utilization(j) for j in range(len(self.available_models))], dtype=np.float64)
+
+    def _assign_global(self, perf: np.ndarray, cost: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """Assign a batch with the ILP, falling back to capacity-aware greedy."""
+        capacities = self._model_capacities()
+        utilization = self._model_utilization()
+        routable = candidates.any(axis=1)
+        chosen = np.zeros(len(perf), dtype=np.int64)
+        if not routable.any():
+            return chosen
+
+        solution = self.optimize_model_selection_global(
+            perf[routable], cost[routable],
+            candidates=candidates[routable],
+            capacities=capacities,
+            utilization=utilization,
+            time_limit=self.solver_time_limit
+        )
+        if solution is None:
+            print("[SmartRouting] Global assignment not solved in time, using greedy assignment")
+            solution = self._assign_greedy(perf[routable], cost[routable], candidates[routable], capacities)
+        chosen[routable] = solution
+        return chosen
+
+    def _assign_greedy(self, perf: np.ndarray, cost: np.ndarray, candidates: np.ndarray, capacities: np.ndarray) -> np.ndarray:
+        """Cheapest qualified model with spare capacity per query, most constrained queries first."""
+        remaining = capacities.astype(np.float64).copy()
+        assigned = np.zeros(len(perf), dtype=np.int64)
+        qualified = candidates & (perf >= self.performance_requirement)
+
+        for i in np.argsort(candidates.sum(axis=1), kind="stable"):
+            has_room = candidates[i] & (remaining > 0)
+            for pool, key in ((qualified[i] & has_room, cost[i]), (has_room, -perf[i]), (qualified[i], cost[i]), (candidates[i], -perf[i])):
+                if pool.any():
+                    j = int(np.argmin(np.where(pool, key, np.inf)))
+                    break
+            assigned[i] = j
+            remaining[j] -= 1
+        return assigned
+
+    def optimize_model_selection_global(
+        self,
+        perf_scores: np.ndarray,
+        cost_scores: np.ndarray,
+        candidates: np.ndarray | None = None,
+        capacities: np.ndarray | None = None,
+        utilization: np.ndarray | None = None,
+        time_limit: float | None = None
+    ):
+        """Solve the batch assignment as an ILP.
+
+        Minimises normalised cost plus a load-balancing term, with every
+        query assigned to exactly one candidate model, the batch's mean
+        predicted performance at least ``performance_requirement`` and at
+        most ``capacities[j]`` queries on model ``j``. The performance floor
+        and capacities are soft (heavily penalised slack), so the problem is
+        always feasible.
+
+        Returns the chosen model index per query, or None if the solver did
+        not find an optimal solution within ``time_limit`` seconds.
+        """
         n_queries, n_models = perf_scores.shape
+        if candidates is None:
+            candidates = np.ones((n_queries, n_models), dtype=bool)
+        if capacities is None:
+            capacities = np.full(n_models, np.inf)
+        if utilization is None:
+            utilization = np.zeros(n_models)
+
+        # Normalise costs so the penalty weights are meaningful across providers
+        max_cost = float(cost_scores[candidates].max()) if candidates.any() else 0.0
+        norm_cost = cost_scores / max_cost if max_cost > 0 else np.zeros_like(cost_scores)
+
+        pairs = [(i, j) for i in range(n_queries) for j in range(n_models) if candidates[i, j]]
         prob = LpProblem("LLM_Scheduling", LpMinimize)
-        x = LpVariable.dicts("assign", ((i, j) for i in range(n_queries) for j in range(n_models)), cat="Binary")
-        prob += lpSum(x[i, j] * cost_scores[i, j] for i in range(n_queries) for j in range(n_models))
-        prob += lpSum(x[i, j] * perf_scores[i, j] for i in range(n_queries) for j in range(n_models)) >= self.performance_requirement * n_queries
+        x = LpVariable.dicts("assign", pairs, cat="Binary")
+        perf_slack = LpVariable("perf_slack", lowBound=0)
+        overflow = {
+            j: LpVariable(f"overflow_{j}", lowBound=0)
+            for j in range(n_models) if np.isfinite(capacities[j])
+        }
+
+        prob += (
+            lpSum(x[i, j] * (norm_cost[i, j] + self.balance_weight * utilization[j]) for i, j in pairs)
+            + 100.0 * perf_slack
+            + 10.0 * lpSum(overflow.values())
+        )
+        prob += lpSum(x[i, j] * perf_scores[i, j] for i, j in pairs) + perf_slack >= self.performance_requirement * n_queries
         for i in range(n_queries):
-            prob += lpSum(x[i, j] for j in range(n_models)) == 1
-        prob.solve(PULP_CBC_CMD(msg=False))
+            prob += lpSum(x[i, j] for j in range(n_models) if candidates[i, j]) == 1
+        for j, over in overflow.items():
+            prob += lpSum(x[i, jj] for i, jj in pairs if jj == j) <= float(capacities[j]) + over
+
+        solver = PULP_CBC_CMD(msg=False, timeLimit=time_limit) if time_limit else PULP_CBC_CMD(msg=False)
+        try:
+            prob.solve(solver)
+        except Exception as e:
+            print(f"[SmartRouting] ILP solver failed: {e}")
+            return None
+        if LpStatus[prob.status] != "Optimal":
+            return None
+
         sol = np.zeros((n_queries, n_models))
-        for i in range(n_queries):
-            for j in range(n_models):
-                sol[i, j] = value(x[i, j])
+        for i, j in pairs:
+            sol[i, j] = value(x[i, j]) or 0.0
+        if (sol.max(axis=1) < 0.5).any():
+            return None  # incomplete assignment
         return np.argmax(sol, axis=1)
@@ -0,0 +1,292 @@
+# This implements the semantic response cache of the LLM adapter.
+# The last user turn of a request is embedded with the same MiniLM model the
+# memory retrievers use, and a cached answer is returned when a previous
+# request in the same scope was close enough in embedding space.
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _ScopeIndex:
+    """Fixed-capacity embedding matrix of one cache scope."""
+
+    def __init__(self, dim: int, capacity: int):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.values: List[Optional[Dict[str, Any]]] = [None] * capacity
+        self.size = 0
+
+    def search(self, vector: np.ndarray) -> Tuple[int, float]:
+        if self.size == 0:
+            return -1, 0.0
+        similarities = self.vectors[:self.size] @ vector
+        idx = int(np.argmax(similarities))
+        return idx, float(similarities[idx])
+
+    def add(self, vector: np.ndarray, value: Dict[str, Any], now: float) -> None:
+        if self.size < len(self.values):
+            idx = self.size
+            self.size += 1
+        else:
+            # Full: replace the least recently used entry
+            idx = int(np.argmin(self.last_used))
+        self.vectors[idx] = vector
+        self.values[idx] = value
+        self.last_used[idx] = now
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache of LLM responses.
+
+    Requests are grouped into scopes (for example per agent and model, and
+    always per system prompt, earlier turns of the conversation, return type
+    and response format, so only the last user turn may differ). Within a
+    scope, the embedding of the last user turn is compared by cosine similarity with the cached ones, and the
+    answer of the closest is returned if the similarity reaches `threshold`.
+    Each scope keeps at most `max_entries_per_scope` entries, replacing the
+    least recently used, and at most `max_scopes` scopes are kept.
+
+    Example:
+        ```python
+        cache = SemanticCache(threshold=0.95, scope="agent_model")
+
+        hit = cache.lookup("agent_1", "gpt-4o-mini", messages)
+        if hit is None:
+            response = ...
+            cache.store("agent_1", "gpt-4o-mini", messages, response.model_dump(), saved_tokens=120)
+        ```
+    """
+
+    SCOPES = ("global", "agent", "model", "agent_model")
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        threshold: float = 0.95,
+        scope: str = "agent_model",
+        max_entries_per_scope: int = 1000,
+        max_scopes: int = 256,
+        ttl: Optional[float] = None
+    ):
+        """
+        Initialize the cache and load the embedding model.
+
+        Args:
+            model_name: SentenceTransformer model used to embed user turns
+            threshold: Minimum cosine similarity for a hit
+            scope: One of "global", "agent", "model" or "agent_model"
+            max_entries_per_scope: Maximum number of cached answers per scope
+            max_scopes: Maximum number of scopes, least recently used dropped first
+            ttl: Seconds an entry stays valid, None for no expiry
+        """
+        if scope not in self.SCOPES:
+            raise ValueError(f"Invalid semantic cache scope: {scope}. Expected one of {self.SCOPES}")
+
+        from sentence_transformers import SentenceTransformer
+        self.encoder = SentenceTransformer(model_name)
+        self.dim = self.encoder.get_sentence_embedding_dimension()
+
+        self.threshold = threshold
+        self.scope = scope
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+        self.ttl = ttl
+
+        self.indexes: Dict[str, _ScopeIndex] = {}
+        self.scope_last_used: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.lookups = 0
+        self.hits = 0
+        self.saved_tokens = 0
+
+    def _scope_key(
+        self,
+        agent_name: str,
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        message_return_type: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        # Answers only carry over between requests with the same system prompt,
+        # the same conversation before the last user turn (a bare "yes" means
+        # something else in every conversation) and the same expected output
+        system_prompt = [m.get("content") for m in messages if m.get("role") == "system"]
+        history = [
+            [m.get("role"), m.get("content"), m.get("tool_calls"), m.get("name")]
+            for m in messages[:self._last_user_index(messages)]
+            if m.get("role") != "system"
+        ]
+        parts = {
+            "global": [],
+            "agent": [agent_name],
+            "model": [model_name],
+            "agent_model": [agent_name, model_name],
+        }[self.scope]
+        encoded = json.dumps(
+            [parts, system_prompt, history, message_return_type or "text", response_format or None],
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _last_user_index(messages: List[Dict[str, Any]]) -> int:
+        """Index of the last user turn, or the number of messages if there is none."""
+        for idx in range(len(messages or []) - 1, -1, -1):
+            if messages[idx].get("role") == "user":
+                return idx
+        return len(messages or [])
+
+    @staticmethod
+    def _last_user_turn(messages: List[Dict[str, Any]]) -> Optional[str]:
+        for message in reversed(messages or []):
+            if message.get("role") == "user" and isinstance(message.get("content"), str):
+                return message["content"].strip() or None
+        return None
+
+    def embed(self, messages: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Embed the last user turn of a conversation.
+
+        Args:
+            messages: Chat messages
+
+        Returns:
+            Normalized embedding, or None if there is no user turn
+        """
+        text = self._last_user_turn(messages)
+        if text is None:
+            return None
+        return self.encoder.encode(text, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(
+        self,
+        agent_name: str,
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        embedding: Optional[np.ndarray] = None,
+        message_return_type: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a semantically equivalent request.
+
+        Args:
+            agent_name: Name of the agent making the request
+            model_name: Name of the model the request was routed to
+            messages: Chat messages
+            embedding: Precomputed embedding from `embed`, computed if omitted
+            message_return_type: Expected return type ("text" or "json")
+            response_format: Response format specification, if any
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        if embedding is None:
+            embedding = self.embed(messages)
+        if embedding is None:
+            return None
+
+        scope_key = self._scope_key(agent_name, model_name, messages, message_return_type, response_format)
+        now = time.time()
+        with self.lock:
+            self.lookups += 1
+            index = self.indexes.get(scope_key)
+            if index is None:
+                return None
+            idx, similarity = index.search(embedding)
+            if idx < 0 or similarity < self.threshold:
+                return None
+
+            entry = index.values[idx]
+            if self.ttl is not None and now - entry["stored_at"] > self.ttl:
+                return None
+
+            index.last_used[idx] = now
+            self.scope_last_used[scope_key] = now
+            self.hits += 1
+            self.saved_tokens += entry["tokens"]
+            logger.debug(f"Semantic cache hit (similarity {similarity:.3f})")
+            return json.loads(entry["value"])
+
+    def store(
+        self,
+        agent_name: str,
+        model_name: str,
+        messages: List[Dict[str, Any]],
+        value: Dict[str, Any],
+        saved_tokens: int = 0,
+        embedding: Optional[np.ndarray] = None,
+        message_return_type: Optional[str] = None,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Cache the answer of a request.
+
+        Args:
+            agent_name: Name of the agent that made the request
+            model_name: Name of the model that served it
+            messages: Chat messages
+            value: JSON-serializable answer
+            saved_tokens: Tokens a future hit saves, counted in the metrics
+            embedding: Precomputed embedding from `embed`, computed if omitted
+            message_return_type: Expected return type ("text" or "json")
+            response_format: Response format specification, if any
+        """
+        if embedding is None:
+            embedding = self.embed(messages)
+        if embedding is None:
+            return
+        try:
+            serialized = json.dumps(value, default=str)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Response not cacheable: {e}")
+            return
+
+        scope_key = self._scope_key(agent_name, model_name, messages, message_return_type, response_format)
+        now = time.time()
+        with self.lock:
+            index = self.indexes.get(scope_key)
+            if index is None:
+                if len(self.indexes) >= self.max_scopes:
+                    oldest = min(self.scope_last_used, key=self.scope_last_used.get)
+                    self.indexes.pop(oldest, None)
+                    self.scope_last_used.pop(oldest, None)
+                index = _ScopeIndex(self.dim, self.max_entries_per_scope)
+                self.indexes[scope_key] = index
+            index.add(embedding, {"value": serialized, "tokens": saved_tokens, "stored_at": now}, now)
+            self.scope_last_used[scope_key] = now
+
+    def clear(self) -> None:
+        """Drop every cached answer."""
+        with self.lock:
+            self.indexes.clear()
+            self.scope_last_used.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the cache's counters.
+
+        Returns:
+            Dict with lookups, hits, hit rate, saved tokens and cache size
+        """
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "saved_tokens": self.saved_tokens,
+            "scopes": len(self.indexes),
+            "entries": sum(index.size for index in self.indexes.values()),
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,347 @@
+# This implements the token counting service of the kernel.
+# Tokenizers are loaded once per model family, in the background, and the
+# token count of every message is cached by content hash, so a growing
+# conversation only pays for its new messages. Routing, response caching and
+# cost accounting share one instance through get_token_counter().
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Chat formatting overhead per message and per conversation, as in OpenAI's
+# accounting (role markers and the primed assistant reply)
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_NAME = 1
+TOKENS_PER_REPLY = 3
+
+# Characters per token of the fallback estimate when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+DEFAULT_FAMILY = "o200k_base"
+
+# Provider prefixes of LiteLLM model names ("gemini/gemini-1.5-flash"); the
+# rest of such a name is not a Hugging Face repository
+LITELLM_PROVIDERS = frozenset({
+    "openai", "azure", "azure_ai", "anthropic", "gemini", "vertex_ai", "ollama", "ollama_chat",
+    "groq", "mistral", "cohere", "bedrock", "sagemaker", "together_ai", "fireworks_ai", "deepseek",
+    "xai", "openrouter", "perplexity", "replicate", "deepinfra", "anyscale", "cerebras", "sambanova",
+    "ai21", "nvidia_nim", "cloudflare", "databricks", "watsonx", "huggingface", "hosted_vllm",
+    "novita", "nebius", "lm_studio", "text-completion-openai",
+})
+
+# Seconds before a tokenizer that failed to load is tried again
+RETRY_INTERVAL = 300.0
+
+
+def resolve_tokenizer_family(model_name: Optional[str], hf_models: Iterable[str] = ()) -> str:
+    """
+    Map a model name to the tokenizer family that counts its tokens.
+
+    Models registered as served from Hugging Face weights (local or vLLM
+    backends) map to their repository's tokenizer, OpenAI models (with or
+    without a LiteLLM provider prefix) to their tiktoken encoding, everything
+    else, including other LiteLLM provider names, to the default encoding.
+
+    Args:
+        model_name: Name of the model, as in the LLM configs
+        hf_models: Names of the models whose tokenizer is a Hugging Face repository
+
+    Returns:
+        "o200k_base", "cl100k_base" or "hf:<repository>"
+    """
+    if not model_name:
+        return DEFAULT_FAMILY
+    if model_name in hf_models:
+        return f"hf:{model_name}"
+    provider, _, rest = model_name.partition("/")
+    name = rest if rest and provider.lower() in LITELLM_PROVIDERS else model_name
+    lowered = name.lower()
+    if lowered.startswith(("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4", "chatgpt-4o")):
+        return "o200k_base"
+    if lowered.startswith(("gpt-4", "gpt-3.5", "text-embedding")):
+        return "cl100k_base"
+    return DEFAULT_FAMILY
+
+
+def _estimate_counts(texts: List[str]) -> List[int]:
+    return [(len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN for text in texts]
+
+
+class TokenCounter:
+    """
+    Token counter with per-family tokenizers and a per-message count cache.
+
+    Counts follow the chat accounting of OpenAI models: the tokens of every
+    message's content (tool calls and names included) plus a fixed
+    per-message overhead, plus the overhead of the primed reply. Per-message
+    counts are cached under a hash of the tokenizer family and the message,
+    bounded to `max_cached_messages` entries (least recently used dropped
+    first).
+
+    Tokenizers are loaded on a background thread, since tiktoken encodings
+    and Hugging Face tokenizers may be downloaded on first use, so counting
+    never blocks on the network. Until a family's tokenizer is loaded, or if
+    it failed to load (retried after `retry_interval` seconds), counts are
+    estimated at one token per four characters and not cached. Hugging Face
+    tokenizers are only used for models registered with register_hf_model.
+
+    Example:
+        ```python
+        counter = get_token_counter()
+        counter.register_hf_model("meta-llama/Llama-3.1-8B-Instruct")
+
+        counter.count_messages(messages, model="gpt-4o-mini")
+        counter.count_batch([messages_1, messages_2], model="meta-llama/Llama-3.1-8B-Instruct")
+        counter.count_text("Hello world")
+        ```
+    """
+
+    def __init__(self, max_cached_messages: int = 100000, retry_interval: float = RETRY_INTERVAL):
+        """
+        Initialize the counter. Tokenizers are loaded on first use.
+
+        Args:
+            max_cached_messages: Maximum number of cached per-message counts
+            retry_interval: Seconds before a tokenizer that failed to load is tried again
+        """
+        self.max_cached_messages = max_cached_messages
+        self.retry_interval = retry_interval
+        self.hf_models: set = set()
+        self.tokenizers: Dict[str, Callable[[List[str]], List[int]]] = {}
+        self.loading: set = set()
+        self.load_failures: Dict[str, float] = {}
+        self.tokenizer_lock = threading.Lock()
+        self.counts: "OrderedDict[bytes, int]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.estimated = 0
+
+    def register_hf_model(self, model_name: str, tokenizer: Any = None) -> None:
+        """
+        Count the tokens of a model with its Hugging Face tokenizer.
+
+        Args:
+            model_name: Name of the model, which is its Hugging Face repository
+            tokenizer: The model's already loaded tokenizer; loaded in the background if omitted
+        """
+        family = f"hf:{model_name}"
+        with self.tokenizer_lock:
+            self.hf_models.add(model_name)
+            if tokenizer is not None:
+                self.tokenizers[family] = self._hf_counter(tokenizer)
+                self.load_failures.pop(family, None)
+        if tokenizer is None:
+            self._get_tokenizer(family)
+
+    @staticmethod
+    def _hf_counter(tokenizer: Any) -> Callable[[List[str]], List[int]]:
+        return lambda texts: [len(ids) for ids in tokenizer(texts, add_special_tokens=False)["input_ids"]]
+
+    def _load_tokenizer(self, family: str) -> None:
+        """Load the batch counting function of a family; runs on a background thread."""
+        try:
+            if family.startswith("hf:"):
+                from transformers import AutoTokenizer
+                tokenizer = self._hf_counter(AutoTokenizer.from_pretrained(family[3:]))
+            else:
+                import tiktoken
+                encoding = tiktoken.get_encoding(family)
+
+                def tokenizer(texts: List[str]) -> List[int]:
+                    return [len(ids) for ids in encoding.encode_ordinary_batch(texts)]
+        except Exception as e:
+            logger.warning(
+                f"Tokenizer for {family} unavailable, estimating token counts "
+                f"(retrying in {self.retry_interval:.0f}s): {e}"
+            )
+            with self.tokenizer_lock:
+                self.load_failures[family] = time.time()
+                self.loading.discard(family)
+            return
+        with self.tokenizer_lock:
+            self.tokenizers[family] = tokenizer
+            self.load_failures.pop(family, None)
+            self.loading.discard(family)
+
+    def _get_tokenizer(self, family: str) -> Optional[Callable[[List[str]], List[int]]]:
+        """The family's counting function, or None (starting a load) if it is not loaded yet."""
+        tokenizer = self.tokenizers.get(family)
+        if tokenizer is not None:
+            return tokenizer
+        with self.tokenizer_lock:
+            tokenizer = self.tokenizers.get(family)
+            if tokenizer is not None or family in self.loading:
+                return tokenizer
+            failed_at = self.load_failures.get(family)
+            if failed_at is not None and time.time() - failed_at < self.retry_interval:
+                return None
+            self.loading.add(family)
+        threading.Thread(
+            target=self._load_tokenizer, args=(family,), name=f"TokenizerLoader-{family}", daemon=True
+        ).start()
+        return None
+
+    def _count_texts(self, family: str, texts: List[str]) -> Tuple[List[int], bool]:
+        """Token counts of texts, and whether they are exact (not estimated)."""
+        tokenizer = self._get_tokenizer(family)
+        if tokenizer is not None:
+            try:
+                return tokenizer(texts), True
+            except Exception as e:
+                logger.warning(f"Token counting with {family} failed, estimating: {e}")
+        self.estimated += len(texts)
+        return _estimate_counts(texts), False
+
+    @staticmethod
+    def _message_text(message: Dict[str, Any]) -> Tuple[str, bool]:
+        """Flatten the countable parts of a message into one text."""
+        parts = [str(message.get("role") or "")]
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            # Multimodal content: only text parts are counted
+            parts.extend(
+                part.get("text", "") for part in content
+                if isinstance(part, dict) and part.get("type") == "text"
+            )
+        if message.get("tool_calls"):
+            parts.append(json.dumps(message["tool_calls"], sort_keys=True, default=str))
+        if message.get("name"):
+            parts.append(str(message["name"]))
+        return "\n".join(parts), bool(message.get("name"))
+
+    @staticmethod
+    def _message_key(family: str, message: Dict[str, Any]) -> bytes:
+        encoded = json.dumps([family, message], sort_keys=True, default=str)
+        return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest()
+
+    def count_batch(self, queries: List[List[Dict[str, Any]]], model: Optional[str] = None) -> List[int]:
+        """
+        Count the prompt tokens of several conversations at once.
+
+        Messages missing from the cache are tokenized in a single batch call.
+
+        Args:
+            queries: Conversations as lists of chat messages
+            model: Model whose tokenizer to count with, None for the default family
+
+        Returns:
+            Token count of every conversation
+        """
+        family = resolve_tokenizer_family(model, self.hf_models)
+        keys = [[self._message_key(family, message) for message in messages or []] for messages in queries]
+
+        known: Dict[bytes, int] = {}
+        missing: Dict[bytes, Tuple[str, bool]] = {}
+        with self.lock:
+            for messages, message_keys in zip(queries, keys):
+                for message, key in zip(messages or [], message_keys):
+                    if key in known or key in missing:
+                        continue
+                    count = self.counts.get(key)
+                    if count is None:
+                        missing[key] = self._message_text(message)
+                        self.misses += 1
+                    else:
+                        self.counts.move_to_end(key)
+                        known[key] = count
+                        self.hits += 1
+
+        if missing:
+            texts = [text for text, _ in missing.values()]
+            counts, exact = self._count_texts(family, texts)
+            with self.lock:
+                for (key, (_, has_name)), count in zip(missing.items(), counts):
+                    count += TOKENS_PER_MESSAGE + (TOKENS_PER_NAME if has_name else 0)
+                    known[key] = count
+                    if exact:
+                        self.counts[key] = count
+                while len(self.counts) > self.max_cached_messages:
+                    self.counts.popitem(last=False)
+
+        return [
+            sum(known[key] for key in message_keys) + (TOKENS_PER_REPLY if message_keys else 0)
+            for message_keys in keys
+        ]
+
+    def count_messages(self, messages: List[Dict[str, Any]], model: Optional[str] = None) -> int:
+        """
+        Count the prompt tokens of a conversation.
+
+        Args:
+            messages: Chat messages
+            model: Model whose tokenizer to count with, None for the default family
+
+        Returns:
+            Token count of the conversation
+        """
+        return self.count_batch([messages], model=model)[0]
+
+    def count_text(self, text: str, model: Optional[str] = None) -> int:
+        """
+        Count the tokens of a plain text (e.g. a completion), without caching.
+
+        Args:
+            text: The text
+            model: Model whose tokenizer to count with, None for the default family
+
+        Returns:
+            Token count of the text
+        """
+        if not text:
+            return 0
+        return self._count_texts(resolve_tokenizer_family(model, self.hf_models), [text])[0][0]
+
+    def clear(self) -> None:
+        """Drop every cached per-message count."""
+        with self.lock:
+            self.counts.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the counter's statistics.
+
+        Returns:
+            Dict with cache hits, misses, hit rate, cached messages, texts counted by
+            estimate, and loaded, loading and failed tokenizer families
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "cached_messages": len(self.counts),
+            "estimated": self.estimated,
+            "tokenizers": sorted(self.tokenizers),
+            "loading": sorted(self.loading),
+            "failed": sorted(self.load_failures),
+        }
+
+
+_token_counter: Optional[TokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """
+    Get the kernel-wide token counter, creating it on first use.
+
+    Returns:
+        The shared TokenCounter
+    """
+    global _token_counter
+    if _token_counter is None:
+        with _token_counter_lock:
+            if _token_counter is None:
+                _token_counter = TokenCounter()
+    return _token_counter
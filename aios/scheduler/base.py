@@ -1,12 +1,16 @@
 from abc import ABC, abstractmethod
-from threading import Thread
+from threading import Thread, Lock
+from queue import Empty
 from typing import List, Callable, Dict, Any
 import logging
+import time
 
 from aios.hooks.types.llm import LLMRequestQueueGetMessage
 from aios.hooks.types.memory import MemoryRequestQueueGetMessage
 from aios.hooks.types.tool import ToolRequestQueueGetMessage
 from aios.hooks.types.storage import StorageRequestQueueGetMessage
+from aios.hooks.stores import queue as QueueStore
+from aios.hooks.stores.queue import QueueShutdown
 from aios.utils.logger import SchedulerLogger
 from aios.memory.manager import MemoryManager
 from aios.storage.storage import StorageManager
@@ -76,6 +80,10 @@ class BaseScheduler(ABC):
         self.logger = self._setup_logger()
         
         self.processing_threads: Dict[str, Thread] = {}
+        
+        # Syscalls dispatched to asynchronous executors but not yet completed
+        self.inflight_count = 0
+        self.inflight_lock = Lock()
 
     def _setup_logger(self) -> SchedulerLogger:
         """
@@ -111,15 +119,125 @@ class BaseScheduler(ABC):
         """
         Stop all processing threads gracefully.
         
+        The processing threads block on their queues, so a shutdown marker is
+        pushed onto every request queue to wake them before joining.
+        
         Example:
             ```python
             scheduler.stop_processing_threads()
             ```
         """
+        QueueStore.shutdownAll()
         for thread in self.processing_threads.values():
             thread.join()
         self.processing_threads.clear()
 
+    def collect_batch(
+        self,
+        get_syscall: Callable,
+        max_batch_size: int,
+        max_wait: float
+    ) -> List[Any]:
+        """
+        Collect a batch of syscalls using a deadline-based window.
+        
+        Blocks until the first syscall arrives and takes every syscall that is
+        already queued, then keeps collecting until either max_batch_size
+        syscalls are gathered or max_wait seconds have passed since the first
+        arrival. A zero window therefore still batches a backlog.
+        
+        Args:
+            get_syscall: Blocking queue getter that accepts a timeout
+            max_batch_size: Maximum number of syscalls in one batch
+            max_wait: Maximum time in seconds to hold the batch open
+            
+        Returns:
+            List of collected syscalls
+            
+        Raises:
+            QueueShutdown: If the queue is shut down before anything arrives
+            
+        Example:
+            ```python
+            batch = self.collect_batch(self.get_llm_syscall, 32, 0.05)
+            ```
+        """
+        batch = [get_syscall()]
+        deadline = time.time() + max_wait
+
+        # Drain the backlog without waiting
+        while len(batch) < max_batch_size:
+            try:
+                batch.append(get_syscall(timeout=0))
+            except Empty:
+                break
+            except QueueShutdown:
+                return batch
+
+        while len(batch) < max_batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(get_syscall(timeout=remaining))
+            except Empty:
+                break
+            except QueueShutdown:
+                # Dispatch what we have; the caller exits on the next loop check
+                break
+
+        return batch
+
+    def track_completions(self, futures: List[Any], syscall_type: str) -> None:
+        """
+        Follow dispatched syscalls until each one completes on its own.
+        
+        The executor completes every syscall independently as its response
+        arrives; this only keeps the in-flight count and logs each completion,
+        so the processing thread never waits on a batch.
+        
+        Args:
+            futures: Futures returned by the executor, each resolving to a syscall
+            syscall_type: Type of the syscalls for logging
+        """
+        with self.inflight_lock:
+            self.inflight_count += len(futures)
+
+        for future in futures:
+            future.add_done_callback(
+                lambda f: self._on_syscall_completed(f, syscall_type)
+            )
+
+    def _on_syscall_completed(self, future: Any, syscall_type: str) -> None:
+        with self.inflight_lock:
+            self.inflight_count -= 1
+
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logging.getLogger(__name__).error(
+                f"{syscall_type} syscall worker failed: {future.exception()}"
+            )
+            return
+
+        syscall = future.result()
+        self.logger.log(
+            f"Completed {syscall_type} syscall for {syscall.agent_name}. "
+            f"Thread ID: {syscall.get_pid()}\n",
+            "done"
+        )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get scheduler metrics for monitoring.
+        
+        Returns:
+            Dict of metrics, including the number of in-flight syscalls
+        """
+        return {
+            "inflight": self.inflight_count,
+        }
+
     @abstractmethod
     def process_llm_requests(self) -> None:
         """Process LLM requests from the queue."""
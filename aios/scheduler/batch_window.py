@@ -0,0 +1,162 @@
+# This implements the adaptive batching window used by the FIFO scheduler.
+# The window shrinks to zero under light load so a lone request is dispatched
+# at once, and grows towards a ceiling as the arrival rate and the observed
+# service time of the models increase.
+
+from collections import deque
+from threading import Lock
+from typing import Dict, Any, Optional
+import math
+import time
+
+
+class AdaptiveBatchWindow:
+    """
+    Adaptive batching policy for LLM syscalls.
+
+    The policy keeps a sliding record of syscall arrival times and an EWMA of
+    the service time of every model. From these it estimates the offered load
+    (arrival rate x service time), i.e. how many requests arrive while one is
+    being served. Under a load below one request there is nothing to batch
+    with, so the window is zero. Otherwise the window is the time needed to
+    collect that many requests, capped at max_window.
+
+    Example:
+        ```python
+        window = AdaptiveBatchWindow(max_window=0.5, max_batch_size=32)
+        window.record_arrival(time.time())
+        window.record_service_time("gpt-4o-mini", 1.2)
+        wait = window.next_window()  # seconds to hold the next batch open
+        ```
+    """
+
+    def __init__(
+        self,
+        max_window: float = 0.1,
+        max_batch_size: int = 32,
+        rate_horizon: float = 5.0,
+        smoothing: float = 0.2,
+    ):
+        """
+        Initialize the adaptive batching window.
+
+        Args:
+            max_window: Ceiling for the batching window in seconds
+            max_batch_size: Maximum number of syscalls in one batch
+            rate_horizon: Length in seconds of the arrival-rate sliding window
+            smoothing: EWMA weight given to the newest service-time sample
+        """
+        self.max_window = max_window
+        self.max_batch_size = max_batch_size
+        self.rate_horizon = rate_horizon
+        self.smoothing = smoothing
+
+        self.arrivals = deque()
+        self.service_times: Dict[str, float] = {}
+        self.lock = Lock()
+
+        # Last values handed out, exposed as metrics
+        self.current_window = 0.0
+        self.last_batch_size = 0
+
+    def record_arrival(self, arrival_time: Optional[float] = None) -> None:
+        """
+        Record the arrival of a syscall.
+
+        Args:
+            arrival_time: Timestamp of the arrival, defaults to now
+        """
+        with self.lock:
+            self.arrivals.append(arrival_time if arrival_time is not None else time.time())
+            self._expire_arrivals(time.time())
+
+    def record_batch(self, batch_size: int) -> None:
+        """
+        Record the size of the batch that was just dispatched.
+
+        Args:
+            batch_size: Number of syscalls in the batch
+        """
+        self.last_batch_size = batch_size
+
+    def record_service_time(self, model_name: Optional[str], service_time: float) -> None:
+        """
+        Fold a completed request's service time into the model's EWMA.
+
+        Args:
+            model_name: Name of the model that served the request
+            service_time: Time in seconds the request took to execute
+        """
+        if service_time is None or service_time < 0:
+            return
+        model_name = model_name or "default"
+        with self.lock:
+            previous = self.service_times.get(model_name)
+            if previous is None:
+                self.service_times[model_name] = service_time
+            else:
+                self.service_times[model_name] = (
+                    self.smoothing * service_time + (1 - self.smoothing) * previous
+                )
+
+    def arrival_rate(self) -> float:
+        """
+        Get the arrival rate over the sliding horizon.
+
+        Returns:
+            Arrivals per second
+        """
+        with self.lock:
+            self._expire_arrivals(time.time())
+            return len(self.arrivals) / self.rate_horizon
+
+    def service_time(self) -> float:
+        """
+        Get the mean service time across the models seen so far.
+
+        Returns:
+            Service time in seconds, 0.0 if nothing has completed yet
+        """
+        with self.lock:
+            if not self.service_times:
+                return 0.0
+            return sum(self.service_times.values()) / len(self.service_times)
+
+    def next_window(self) -> float:
+        """
+        Compute how long the next batch should be held open.
+
+        Returns:
+            Window in seconds, between 0 and max_window
+        """
+        rate = self.arrival_rate()
+        load = rate * self.service_time()
+
+        if load < 1.0 or rate <= 0:
+            window = 0.0
+        else:
+            target_size = min(self.max_batch_size, math.ceil(load))
+            window = min(self.max_window, (target_size - 1) / rate)
+
+        self.current_window = window
+        return window
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the current state of the batching policy.
+
+        Returns:
+            Dict with the current window, last batch size and load estimates
+        """
+        return {
+            "batch_window": self.current_window,
+            "batch_size": self.last_batch_size,
+            "max_batch_window": self.max_window,
+            "max_batch_size": self.max_batch_size,
+            "arrival_rate": self.arrival_rate(),
+            "service_times": dict(self.service_times),
+        }
+
+    def _expire_arrivals(self, now: float) -> None:
+        while self.arrivals and now - self.arrivals[0] > self.rate_horizon:
+            self.arrivals.popleft()
@@ -0,0 +1,271 @@
+# This implements a fair-share scheduler for LLM requests.
+# Every agent gets its own sub-queue, and the sub-queues are served by
+# deficit round robin with costs measured in tokens, so one chatty agent
+# cannot flood the LLM queue and starve the others.
+
+from aios.config.config_manager import config
+from aios.llm_core.tokens import get_token_counter
+
+from .priority_scheduler import PriorityScheduler
+
+import time
+import logging
+from collections import OrderedDict, defaultdict, deque
+from typing import Optional, Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FairShareScheduler(PriorityScheduler):
+    """
+    A weighted fair-queuing scheduler for LLM requests (deficit round robin).
+
+    LLM syscalls are queued per agent. Each round, every agent with waiting
+    requests earns `quantum_tokens * share` tokens of credit (its deficit)
+    and dispatches requests from the head of its queue while their cost fits
+    the credit. The cost of a request is its prompt tokens plus an expected
+    output of `default_output_tokens` (capped by max_new_tokens); once it
+    completes, the difference to the tokens actually generated is charged or
+    refunded.
+
+    Unused credit carries over up to the agent's burst allowance, so a
+    briefly idle agent can catch up, and is dropped when its queue empties.
+    A request costing more than the allowance is dispatched once the credit
+    is full and leaves the agent in debt. Dispatch capacity (max_inflight)
+    is shared with PriorityScheduler; preemption is not used.
+
+    Example:
+        ```python
+        scheduler = FairShareScheduler(
+            llm=llm_adapter,
+            memory_manager=memory_mgr,
+            storage_manager=storage_mgr,
+            tool_manager=tool_mgr,
+            log_mode="console",
+            get_llm_syscall=llm_queue.get,
+            get_memory_syscall=memory_queue.get,
+            get_storage_syscall=storage_queue.get,
+            get_tool_syscall=tool_queue.get,
+            quantum_tokens=1024
+        )
+        scheduler.set_agent_share("example/academic_agent", share=2, burst_tokens=16384)
+        scheduler.start()
+        ```
+    """
+
+    def __init__(
+        self,
+        *args,
+        quantum_tokens: Optional[int] = None,
+        default_share: Optional[float] = None,
+        default_burst_tokens: Optional[int] = None,
+        default_output_tokens: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Initialize the Fair Share Scheduler.
+
+        Args:
+            *args: Arguments passed to PriorityScheduler
+            quantum_tokens: Tokens of credit per round for an agent of share 1.
+                Defaults to scheduler.fair_share.quantum_tokens in config.yaml, or 1024.
+            default_share: Share of agents without one. Defaults to
+                scheduler.fair_share.default_share in config.yaml, or 1.
+            default_burst_tokens: Credit an agent of share 1 may accumulate. Defaults
+                to scheduler.fair_share.default_burst_tokens in config.yaml, or 8192.
+            default_output_tokens: Output length charged upfront, capped by the
+                request's max_new_tokens. Defaults to scheduler.fair_share.default_output_tokens
+                in config.yaml, or 256.
+            **kwargs: Keyword arguments passed to PriorityScheduler
+        """
+        kwargs.setdefault("preemption", False)
+        super().__init__(*args, **kwargs)
+        fair_config = config.get_scheduler_config().get("fair_share", {}) or {}
+        self.quantum_tokens = quantum_tokens if quantum_tokens is not None else fair_config.get("quantum_tokens", 1024)
+        self.default_share = default_share if default_share is not None else fair_config.get("default_share", 1.0)
+        self.default_burst_tokens = default_burst_tokens if default_burst_tokens is not None else fair_config.get("default_burst_tokens", 8192)
+        self.default_output_tokens = default_output_tokens if default_output_tokens is not None else fair_config.get("default_output_tokens", 256)
+
+        # agent name -> (share, burst tokens)
+        self.agent_shares: Dict[str, Tuple[float, float]] = {}
+        for agent_name, settings in (fair_config.get("agents", {}) or {}).items():
+            settings = settings or {}
+            self.agent_shares[agent_name] = self._share_settings(settings.get("share"), settings.get("burst_tokens"))
+
+        # Per-agent sub-queues of (syscall, charged cost), in round-robin order
+        self.agent_queues: "OrderedDict[str, deque]" = OrderedDict()
+        self.deficits: Dict[str, float] = defaultdict(float)
+        # Agent whose turn was cut short by dispatch capacity; it continues
+        # without a new quantum once capacity frees up
+        self.in_turn: Optional[str] = None
+        # id(syscall) -> (agent name, prompt tokens, charged cost) of each queued
+        # or running slice, oldest first
+        self.charges: Dict[int, deque] = defaultdict(deque)
+
+        # Metrics
+        self.served_tokens: Dict[str, float] = defaultdict(float)
+        self.served_requests: Dict[str, int] = defaultdict(int)
+        self.wait_times: Dict[str, float] = defaultdict(float)
+
+    def _share_settings(self, share: Optional[float], burst_tokens: Optional[float]) -> Tuple[float, float]:
+        share = float(share) if share is not None else float(self.default_share)
+        if share <= 0:
+            raise ValueError(f"Agent share must be positive, got {share}")
+        burst = float(burst_tokens) if burst_tokens is not None else self.default_burst_tokens * share
+        return share, max(burst, self.quantum_tokens * share)
+
+    def set_agent_share(self, agent_name: str, share: Optional[float] = None, burst_tokens: Optional[float] = None) -> None:
+        """
+        Set the share and burst allowance of an agent.
+
+        Args:
+            agent_name: Name of the agent
+            share: Relative share of the LLM tokens; None for the default share
+            burst_tokens: Credit the agent may accumulate; None for default_burst_tokens * share
+        """
+        with self.lock:
+            self.agent_shares[agent_name] = self._share_settings(share, burst_tokens)
+
+    def _get_share(self, agent_name: str) -> Tuple[float, float]:
+        settings = self.agent_shares.get(agent_name)
+        if settings is None:
+            settings = self._share_settings(None, None)
+        return settings
+
+    def _has_waiting(self) -> bool:
+        return bool(self.agent_queues)
+
+    def _prepare(self, syscalls: List[Any]) -> List[int]:
+        """Count the prompt tokens of newly arrived syscalls outside the lock."""
+        return get_token_counter().count_batch([syscall.query.messages for syscall in syscalls])
+
+    def _admit(self, syscalls: List[Any], prepared: Optional[List[int]] = None) -> None:
+        prompt_tokens = prepared if prepared is not None else self._prepare(syscalls)
+        for syscall, n_prompt in zip(syscalls, prompt_tokens):
+            self.arrivals.setdefault(syscall.get_pid(), syscall.get_created_time() or time.time())
+            max_tokens = getattr(syscall.query, "max_new_tokens", None)
+            cost = n_prompt + (min(max_tokens, self.default_output_tokens) if max_tokens else self.default_output_tokens)
+            self.charges[id(syscall)].append((syscall.agent_name, n_prompt, float(cost)))
+            queue = self.agent_queues.get(syscall.agent_name)
+            if queue is None:
+                queue = self.agent_queues[syscall.agent_name] = deque()
+            queue.append((syscall, float(cost)))
+
+    def _pop_ready(self) -> List[Any]:
+        """Serve the agents' sub-queues by deficit round robin until capacity is used."""
+        free = self._free_slots()
+        batch = []
+        while free > 0 and self.agent_queues:
+            agent_name, queue = next(iter(self.agent_queues.items()))
+            share, burst = self._get_share(agent_name)
+            if agent_name != self.in_turn:
+                self.deficits[agent_name] = min(self.deficits[agent_name] + self.quantum_tokens * share, burst)
+            self.in_turn = None
+
+            while queue and free > 0:
+                syscall, cost = queue[0]
+                if cost > self.deficits[agent_name] and self.deficits[agent_name] < burst:
+                    break
+                queue.popleft()
+                self.deficits[agent_name] -= cost
+                self.served_requests[agent_name] += 1
+                self.wait_times[agent_name] += time.time() - (syscall.get_created_time() or time.time())
+                batch.append(syscall)
+                free -= 1
+
+            if not queue:
+                # Idle agents do not bank credit (debt is kept)
+                del self.agent_queues[agent_name]
+                self.deficits[agent_name] = min(self.deficits[agent_name], 0.0)
+            elif free == 0 and queue[0][1] <= self.deficits[agent_name]:
+                self.in_turn = agent_name
+            else:
+                # Turn over: move the agent to the back of the round
+                self.agent_queues.move_to_end(agent_name)
+        return batch
+
+    def _forget_arrival(self, future: Any) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        syscall = future.result()
+        # Count the generated tokens before taking the lock
+        text = getattr(syscall.get_response(), "response_message", None)
+        output_tokens = get_token_counter().count_text(text) if isinstance(text, str) else None
+        with self.lock:
+            charges = self.charges.get(id(syscall))
+            charge = charges.popleft() if charges else None
+            if not charges:
+                self.charges.pop(id(syscall), None)
+            if charge is not None:
+                agent_name, n_prompt, cost = charge
+                if output_tokens is not None:
+                    actual = n_prompt + output_tokens
+                    # Charge or refund the difference to the estimate; a refund
+                    # never exceeds the burst allowance, nor banks credit for an
+                    # agent with nothing queued
+                    _, burst = self._get_share(agent_name)
+                    limit = burst if agent_name in self.agent_queues else 0.0
+                    self.deficits[agent_name] = min(self.deficits[agent_name] - (actual - cost), limit)
+                    cost = actual
+                self.served_tokens[agent_name] += cost
+        super()._forget_arrival(future)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the per-agent fair-share metrics of the scheduler.
+
+        Returns:
+            Dict containing, per agent, its share, queue depth, credit, served
+            tokens and requests, share of the served tokens and mean wait
+
+        Example:
+            ```python
+            scheduler.get_metrics()
+            # Returns:
+            # {
+            #     "waiting": 12,
+            #     "running": 16,
+            #     "quantum_tokens": 1024,
+            #     "agents": {
+            #         "example/academic_agent": {
+            #             "share": 1.0,
+            #             "queue_depth": 10,
+            #             "deficit": 312.0,
+            #             "served_tokens": 48210.0,
+            #             "served_requests": 40,
+            #             "service_share": 0.49,
+            #             "mean_wait": 1.8
+            #         },
+            #         ...
+            #     },
+            #     "inflight": 16
+            # }
+            ```
+        """
+        with self.lock:
+            total_tokens = sum(self.served_tokens.values())
+            agent_names = set(self.agent_queues) | set(self.served_requests) | set(self.agent_shares)
+            agents = {}
+            for agent_name in sorted(agent_names):
+                share, burst = self._get_share(agent_name)
+                served = self.served_requests.get(agent_name, 0)
+                agents[agent_name] = {
+                    "share": share,
+                    "burst_tokens": burst,
+                    "queue_depth": len(self.agent_queues.get(agent_name, ())),
+                    "deficit": self.deficits.get(agent_name, 0.0),
+                    "served_tokens": self.served_tokens.get(agent_name, 0.0),
+                    "served_requests": served,
+                    "service_share": self.served_tokens.get(agent_name, 0.0) / total_tokens if total_tokens else 0.0,
+                    "mean_wait": self.wait_times.get(agent_name, 0.0) / served if served else 0.0,
+                }
+            metrics = {
+                "waiting": sum(len(queue) for queue in self.agent_queues.values()),
+                "running": len([syscall for syscall in self.running.values() if self._is_running(syscall)]),
+                "dispatched": self.dispatched,
+                "quantum_tokens": self.quantum_tokens,
+                "max_inflight": self.max_inflight,
+                "agents": agents,
+            }
+        metrics["inflight"] = self.inflight_count
+        return metrics
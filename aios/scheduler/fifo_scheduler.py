@@ -1,6 +1,7 @@
 # This implements a (mostly) FIFO task queue using threads and queue, in a
-# similar fashion to the round robin scheduler. However, the timeout is 1 second
-# instead of 0.05 seconds.
+# similar fashion to the round robin scheduler. LLM requests are grouped into
+# batches whose window opens when the first request arrives and is sized
+# adaptively from the observed load.
 
 from aios.hooks.types.llm import LLMRequestQueueGetMessage
 from aios.hooks.types.memory import MemoryRequestQueueGetMessage
@@ -16,10 +17,13 @@ from aios.memory.manager import MemoryManager
 from aios.storage.storage import StorageManager
 from aios.llm_core.adapter import LLMAdapter
 from aios.tool.manager import ToolManager
+from aios.config.config_manager import config
 
 from .base import BaseScheduler
+from .batch_window import AdaptiveBatchWindow
 
 from queue import Empty
+from aios.hooks.stores.queue import QueueShutdown
 
 import traceback
 import time
@@ -35,8 +39,11 @@ class FIFOScheduler(BaseScheduler):
     A FIFO (First-In-First-Out) task scheduler implementation.
     
     This scheduler processes tasks in the order they arrive.
-    LLM tasks are batched based on a time interval. Other tasks (Memory, Storage, Tool)
-    are processed individually as they arrive.
+    LLM tasks are batched: the batch window opens when the first request arrives
+    and closes once max_batch_size requests are collected or the window expires.
+    With adaptive batching the window is zero under light load and grows up to
+    batch_interval as the arrival rate and model service times increase.
+    Other tasks (Memory, Storage, Tool) are processed individually as they arrive.
     
     Example:
         ```python
@@ -50,7 +57,9 @@ class FIFOScheduler(BaseScheduler):
             get_memory_syscall=memory_queue.get,
             get_storage_syscall=storage_queue.get,
             get_tool_syscall=tool_queue.get,
-            batch_interval=0.1  # Process LLM requests every 100ms
+            batch_interval=0.1,  # Hold a batch open for at most 100ms
+            max_batch_size=32,
+            adaptive_batching=True
         )
         scheduler.start()
         ```
@@ -67,7 +76,9 @@ class FIFOScheduler(BaseScheduler):
         get_memory_syscall: MemoryRequestQueueGetMessage,
         get_storage_syscall: StorageRequestQueueGetMessage,
         get_tool_syscall: ToolRequestQueueGetMessage,
-        batch_interval: float = 1.0,
+        batch_interval: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        adaptive_batching: Optional[bool] = None,
     ):
         """
         Initialize the FIFO Scheduler.
@@ -82,7 +93,14 @@ class FIFOScheduler(BaseScheduler):
             get_memory_syscall: Function to get Memory syscalls
             get_storage_syscall: Function to get Storage syscalls
             get_tool_syscall: Function to get Tool syscalls
-            batch_interval: Time interval in seconds to batch LLM requests. Defaults to 0.1.
+            batch_interval: Maximum time in seconds a batch is held open after its
+                first LLM request arrives. Defaults to scheduler.batching.max_window
+                in config.yaml, or 0.1.
+            max_batch_size: Maximum number of LLM requests in one batch. Defaults to
+                scheduler.batching.max_batch_size in config.yaml, or 32.
+            adaptive_batching: Whether to size the window from the observed load
+                instead of always waiting batch_interval. Defaults to
+                scheduler.batching.adaptive in config.yaml, or True.
         """
         super().__init__(
             llm,
@@ -95,7 +113,14 @@ class FIFOScheduler(BaseScheduler):
             get_storage_syscall,
             get_tool_syscall,
         )
-        self.batch_interval = batch_interval
+        batching_config = config.get_scheduler_config().get("batching", {}) or {}
+        self.batch_interval = batch_interval if batch_interval is not None else batching_config.get("max_window", 0.1)
+        self.max_batch_size = max_batch_size if max_batch_size is not None else batching_config.get("max_batch_size", 32)
+        self.adaptive_batching = adaptive_batching if adaptive_batching is not None else batching_config.get("adaptive", True)
+        self.batch_window = AdaptiveBatchWindow(
+            max_window=self.batch_interval,
+            max_batch_size=self.max_batch_size
+        )
         
     def _execute_syscall(
         self, 
@@ -157,17 +182,23 @@ class FIFOScheduler(BaseScheduler):
         batch: List[Any],
         executor: Any,
         syscall_type: str
-    ) -> None:
+    ) -> List[Any]:
         """
-        Execute a batch of system calls with proper status tracking and error handling.
+        Dispatch a batch of system calls with proper status tracking and error handling.
+
+        The executor submits the batch and returns without waiting for it, so the
+        syscalls are completed asynchronously by the executor's workers.
 
         Args:
             batch: The list of system calls to execute
-            executor: Function to execute the batch of syscalls
+            executor: Function to dispatch the batch of syscalls
             syscall_type: Type of the syscalls for logging
+
+        Returns:
+            List of futures returned by the executor, one per dispatched syscall
         """
         if not batch:
-            return
+            return []
 
         start_time = time.time()
         for syscall in batch:
@@ -182,7 +213,7 @@ class FIFOScheduler(BaseScheduler):
 
         if not batch:
             logger.warning(f"Empty batch after preparation for {syscall_type}, skipping execution.")
-            return
+            return []
 
         # self.logger.log(
         #     f"Executing batch of {len(batch)} {syscall_type} syscalls.\n",
@@ -191,25 +222,30 @@ class FIFOScheduler(BaseScheduler):
         logger.info(f"Executing batch of {len(batch)} {syscall_type} syscalls.")
 
         try:
-            responses = executor(batch)
+            futures = executor(batch) or []
 
             for i, syscall in enumerate(batch):
-                logger.info(f"Completed batched {syscall_type} syscall for {syscall.agent_name}. "
+                logger.info(f"Dispatched batched {syscall_type} syscall for {syscall.agent_name}. "
                     f"Thread ID: {syscall.get_pid()}\n")
 
+            self.track_completions(futures, syscall_type)
+            return futures
 
         except Exception as e:
             logger.error(f"Error executing {syscall_type} syscall batch: {str(e)}")
             traceback.print_exc()
+            return []
 
 
     def process_llm_requests(self) -> None:
         """
-        Process LLM requests from the queue in batches based on batch_interval.
+        Process LLM requests from the queue in adaptively sized batches.
         
         Example:
             ```python
-            # Collects LLM requests for 0.1 seconds (default) then processes them:
+            # Waits for the first LLM request, collects more until the current
+            # window (at most batch_interval) expires or max_batch_size is reached,
+            # then processes them:
             # Batch = [
             #   {"messages": [{"role": "user", "content": "Hello"}]},
             #   {"messages": [{"role": "user", "content": "World"}]}
@@ -218,21 +254,76 @@ class FIFOScheduler(BaseScheduler):
             ```
         """
         while self.active:
-            time.sleep(self.batch_interval)
-
-            batch = []
-            while True:
-                try:
-                    llm_syscall = self.get_llm_syscall()
-                    # Add logging here: print(f"Retrieved syscall: {llm_syscall.pid}, Queue size now: {self.llm_queue.qsize()}")
-                    batch.append(llm_syscall)
-                except Empty:
-                    # This is the expected way to finish collecting the batch
-                    # print(f"Queue empty, finishing batch collection with {len(batch)} items.")
-                    break
+            if self.adaptive_batching:
+                window = self.batch_window.next_window()
+            else:
+                window = self.batch_interval
+
+            try:
+                batch = self.collect_batch(
+                    self.get_llm_syscall,
+                    self.max_batch_size,
+                    window
+                )
+            except QueueShutdown:
+                break
 
             if batch:
-                self._execute_batch_syscalls(batch, self.llm.execute_llm_syscalls, "LLM")
+                for llm_syscall in batch:
+                    self.batch_window.record_arrival(llm_syscall.get_created_time())
+                self.batch_window.record_batch(len(batch))
+
+                # The adapter returns as soon as the batch is submitted to the
+                # model worker pools, so the next batch is collected while this
+                # one is in flight. Service times are recorded on completion.
+                futures = self._execute_batch_syscalls(batch, self.llm.execute_llm_syscalls, "LLM")
+                for future in futures:
+                    future.add_done_callback(self._record_service_time)
+
+    def _record_service_time(self, future: Any) -> None:
+        """
+        Feed a completed LLM syscall's execution time into the batching policy.
+        
+        Args:
+            future: Completed future resolving to the LLM syscall, whose target
+                is the model that served it
+        """
+        if future.cancelled() or future.exception() is not None:
+            return
+        llm_syscall = future.result()
+        start_time = llm_syscall.get_start_time()
+        end_time = llm_syscall.get_end_time()
+        if start_time is None or end_time is None:
+            return
+        self.batch_window.record_service_time(llm_syscall.get_target(), end_time - start_time)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the LLM batching metrics of the scheduler.
+        
+        Returns:
+            Dict containing the current batch window, batch size and in-flight count
+            
+        Example:
+            ```python
+            scheduler.get_metrics()
+            # Returns:
+            # {
+            #     "batch_window": 0.04,
+            #     "batch_size": 6,
+            #     "max_batch_window": 0.1,
+            #     "max_batch_size": 32,
+            #     "arrival_rate": 12.4,
+            #     "service_times": {"gpt-4o-mini": 0.8},
+            #     "inflight": 3,
+            #     "adaptive_batching": True
+            # }
+            ```
+        """
+        metrics = super().get_metrics()
+        metrics.update(self.batch_window.get_metrics())
+        metrics["adaptive_batching"] = self.adaptive_batching
+        return metrics
 
     def process_memory_requests(self) -> None:
         """
@@ -258,6 +349,8 @@ class FIFOScheduler(BaseScheduler):
                 )
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def process_storage_requests(self) -> None:
         """
@@ -284,6 +377,8 @@ class FIFOScheduler(BaseScheduler):
                 )
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def process_tool_requests(self) -> None:
         """
@@ -312,6 +407,8 @@ class FIFOScheduler(BaseScheduler):
                 )
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def start(self) -> None:
         """
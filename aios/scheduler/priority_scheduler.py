@@ -0,0 +1,345 @@
+# This implements a preemptive priority scheduler for LLM requests.
+# Waiting LLM syscalls are kept in a heap ordered by priority with aging, so
+# interactive agents are served before batch agents without starving them,
+# and long Hugging Face generations of lower priority are preempted through
+# the context-save path when higher-priority work is waiting.
+# Memory, Storage and Tool requests are processed as in the FIFO scheduler.
+
+from aios.config.config_manager import config
+
+from .fifo_scheduler import FIFOScheduler
+
+from queue import Empty
+from aios.hooks.stores.queue import QueueShutdown
+
+import heapq
+import itertools
+import threading
+import time
+import logging
+from typing import Optional, Any, Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Named priority classes; lower values are served first
+PRIORITY_CLASSES: Dict[str, int] = {
+    "realtime": 0,
+    "interactive": 1,
+    "normal": 2,
+    "batch": 3,
+}
+
+
+def resolve_priority(priority: Union[int, float, str, None], default: float) -> float:
+    """
+    Convert a priority class name or number into a numeric priority.
+
+    Args:
+        priority: Class name from PRIORITY_CLASSES, a number, or None
+        default: Priority used when none is given
+
+    Returns:
+        Numeric priority, lower is served first
+
+    Raises:
+        ValueError: If the class name is unknown
+    """
+    if priority is None:
+        return default
+    if isinstance(priority, str):
+        if priority.lower() not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}. Expected one of {list(PRIORITY_CLASSES)}")
+        return PRIORITY_CLASSES[priority.lower()]
+    return float(priority)
+
+
+class PriorityScheduler(FIFOScheduler):
+    """
+    A preemptive priority scheduler for LLM requests.
+
+    Every waiting LLM syscall has a priority: its own `Syscall.priority` if
+    set, else the priority class registered for its agent, else the default
+    class. Lower values are served first. Waiting syscalls age: their
+    effective priority improves by `aging_rate` per second of waiting, so
+    low-priority work is never starved. Because all waiting syscalls age at
+    the same rate, ordering by ``priority + aging_rate * arrival_time`` is
+    exact and the heap never has to be re-sorted.
+
+    At most `max_inflight` LLM syscalls are dispatched at a time, which keeps
+    the waiting ones in the heap where priorities apply. When the limit is
+    reached and a syscall of a better priority class waits, the worst-class
+    running syscall that has run for at least `min_run_time` is asked to
+    yield. Hugging Face generations under the context manager save their KV
+    state and come back as suspended; the caller re-submits them and they
+    resume from the saved context, keeping their original arrival time.
+
+    Example:
+        ```python
+        scheduler = PriorityScheduler(
+            llm=llm_adapter,
+            memory_manager=memory_mgr,
+            storage_manager=storage_mgr,
+            tool_manager=tool_mgr,
+            log_mode="console",
+            get_llm_syscall=llm_queue.get,
+            get_memory_syscall=memory_queue.get,
+            get_storage_syscall=storage_queue.get,
+            get_tool_syscall=tool_queue.get,
+            aging_rate=0.1,   # one class per 10 seconds of waiting
+            max_inflight=16
+        )
+        scheduler.set_agent_priority("example/academic_agent", "batch")
+        scheduler.start()
+        ```
+    """
+
+    def __init__(
+        self,
+        *args,
+        aging_rate: Optional[float] = None,
+        max_inflight: Optional[int] = None,
+        default_priority: Union[int, str, None] = None,
+        preemption: Optional[bool] = None,
+        min_run_time: Optional[float] = None,
+        poll_interval: float = 0.05,
+        **kwargs
+    ):
+        """
+        Initialize the Priority Scheduler.
+
+        Args:
+            *args: Arguments passed to FIFOScheduler
+            aging_rate: Priority levels gained per second of waiting. Defaults to
+                scheduler.priority.aging_rate in config.yaml, or 0.1.
+            max_inflight: Maximum number of LLM syscalls dispatched at once. Defaults
+                to scheduler.priority.max_inflight in config.yaml, or 16.
+            default_priority: Priority class of agents without one. Defaults to
+                scheduler.priority.default_class in config.yaml, or "normal".
+            preemption: Whether running syscalls may be asked to yield. Defaults to
+                scheduler.priority.preemption in config.yaml, or True.
+            min_run_time: Seconds a syscall runs before it may be preempted. Defaults
+                to scheduler.priority.min_run_time in config.yaml, or 0.5.
+            poll_interval: Seconds between checks for freed capacity while saturated
+            **kwargs: Keyword arguments passed to FIFOScheduler
+        """
+        super().__init__(*args, **kwargs)
+        priority_config = config.get_scheduler_config().get("priority", {}) or {}
+        self.aging_rate = aging_rate if aging_rate is not None else priority_config.get("aging_rate", 0.1)
+        self.max_inflight = max_inflight if max_inflight is not None else priority_config.get("max_inflight", 16)
+        self.default_priority = resolve_priority(
+            default_priority if default_priority is not None else priority_config.get("default_class", "normal"),
+            PRIORITY_CLASSES["normal"]
+        )
+        self.preemption_enabled = preemption if preemption is not None else priority_config.get("preemption", True)
+        self.min_run_time = min_run_time if min_run_time is not None else priority_config.get("min_run_time", 0.5)
+        self.poll_interval = poll_interval
+
+        self.agent_priorities: Dict[str, float] = {
+            agent_name: resolve_priority(priority, self.default_priority)
+            for agent_name, priority in (priority_config.get("agents", {}) or {}).items()
+        }
+        self.heap: List[Tuple[float, int, Any]] = []
+        self.counter = itertools.count()
+        # Dispatched syscalls by id; a suspended syscall is re-queued as the same object
+        self.running: Dict[int, Any] = {}
+        # First arrival of every request (by pid), kept across preempted slices
+        self.arrivals: Dict[Any, float] = {}
+        self.lock = threading.Lock()
+
+        # Metrics
+        self.dispatched = 0
+        self.preemptions = 0
+
+    def set_agent_priority(self, agent_name: str, priority: Union[int, str, None]) -> None:
+        """
+        Set the priority class of an agent's future LLM syscalls.
+
+        Args:
+            agent_name: Name of the agent
+            priority: Class name from PRIORITY_CLASSES or a number; None resets to the default
+        """
+        with self.lock:
+            if priority is None:
+                self.agent_priorities.pop(agent_name, None)
+            else:
+                self.agent_priorities[agent_name] = resolve_priority(priority, self.default_priority)
+
+    def _base_priority(self, syscall: Any) -> float:
+        if syscall.get_priority() is None:
+            syscall.set_priority(self.agent_priorities.get(syscall.agent_name, self.default_priority))
+        return float(syscall.get_priority())
+
+    def _priority_key(self, syscall: Any, arrival: float) -> float:
+        """Heap key of a waiting syscall; subclasses change the ordering here."""
+        return self._base_priority(syscall) + self.aging_rate * arrival
+
+    def _rank(self, syscall: Any) -> float:
+        """Un-aged rank used to decide preemption; lower is more urgent."""
+        return self._base_priority(syscall)
+
+    def _should_preempt(self, waiting: Any, running: Any) -> bool:
+        return self._rank(running) > self._rank(waiting)
+
+    def _push(self, syscall: Any) -> None:
+        arrival = self.arrivals.setdefault(syscall.get_pid(), syscall.get_created_time() or time.time())
+        heapq.heappush(self.heap, (self._priority_key(syscall, arrival), next(self.counter), syscall))
+
+    def _has_waiting(self) -> bool:
+        return bool(self.heap)
+
+    def _prepare(self, syscalls: List[Any]) -> Any:
+        """Work on newly arrived syscalls done before taking the lock (e.g. sizing
+        them); the result is passed to _admit."""
+        return None
+
+    def _admit(self, syscalls: List[Any], prepared: Any = None) -> None:
+        """Add newly arrived syscalls to the heap."""
+        for syscall in syscalls:
+            self._push(syscall)
+
+    def _free_slots(self) -> int:
+        """Number of syscalls that can be dispatched now."""
+        self.running = {key: syscall for key, syscall in self.running.items() if self._is_running(syscall)}
+        return min(self.max_inflight - len(self.running), self.max_batch_size)
+
+    @staticmethod
+    def _is_running(syscall: Any) -> bool:
+        return syscall.get_status() == "executing" and not syscall.is_done()
+
+    @staticmethod
+    def _is_final(syscall: Any) -> bool:
+        """Whether a completed slice ended its request (not suspended and re-queued)."""
+        return syscall.get_status() in ("done", "error")
+
+    def _pop_ready(self) -> List[Any]:
+        """Pop the best waiting syscalls that fit into the free dispatch capacity."""
+        free = self._free_slots()
+        batch = []
+        while self.heap and len(batch) < free:
+            batch.append(heapq.heappop(self.heap)[2])
+        return batch
+
+    def _maybe_preempt(self) -> None:
+        """Ask one running syscall of a worse class than the best waiting one to yield."""
+        if not self.preemption_enabled or not self.heap:
+            return
+        waiting = self.heap[0][2]
+        now = time.time()
+        victims = [
+            syscall for syscall in self.running.values()
+            if self._is_running(syscall)
+            and not syscall.preemption_requested()
+            and self._should_preempt(waiting, syscall)
+            and syscall.get_start_time() is not None
+            and now - syscall.get_start_time() >= self.min_run_time
+        ]
+        if not victims:
+            return
+        victim = max(victims, key=lambda syscall: (self._rank(syscall), syscall.get_start_time()))
+        victim.request_preemption()
+        self.preemptions += 1
+        logger.info(f"Preempting LLM syscall of {victim.agent_name} (pid {victim.get_pid()}) for higher-priority work.")
+
+    def _forget_arrival(self, future: Any) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        syscall = future.result()
+        if self._is_final(syscall):
+            with self.lock:
+                self.arrivals.pop(syscall.get_pid(), None)
+
+    def process_llm_requests(self) -> None:
+        """
+        Process LLM requests in priority order with aging and preemption.
+
+        Example:
+            ```python
+            # An interactive agent's request arriving while batch requests wait
+            # is dispatched first; if the scheduler is saturated, a running
+            # batch generation is asked to yield and resumes later.
+            scheduler.process_llm_requests()
+            ```
+        """
+        shutdown = False
+        while self.active and not shutdown:
+            try:
+                if self._has_waiting():
+                    syscall = self.get_llm_syscall(timeout=self.poll_interval)
+                else:
+                    syscall = self.get_llm_syscall()
+                # Take everything else that is already queued; syscalls taken
+                # before a shutdown are still admitted and dispatched
+                arrived = [syscall]
+                while True:
+                    try:
+                        arrived.append(self.get_llm_syscall(timeout=0))
+                    except Empty:
+                        break
+                    except QueueShutdown:
+                        shutdown = True
+                        break
+                prepared = self._prepare(arrived)
+                with self.lock:
+                    self._admit(arrived, prepared)
+            except Empty:
+                pass
+            except QueueShutdown:
+                break
+
+            with self.lock:
+                batch = self._pop_ready()
+                if not batch:
+                    self._maybe_preempt()
+            if not batch:
+                continue
+
+            self.dispatched += len(batch)
+            futures = self._execute_batch_syscalls(batch, self.llm.execute_llm_syscalls, "LLM")
+            with self.lock:
+                self.running.update((id(syscall), syscall) for syscall in batch if self._is_running(syscall))
+            for future in futures:
+                future.add_done_callback(self._record_service_time)
+                future.add_done_callback(self._forget_arrival)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the LLM priority scheduling metrics of the scheduler.
+
+        Returns:
+            Dict containing waiting and running counts, waiting syscalls per
+            priority, preemptions and the agents' priority classes
+
+        Example:
+            ```python
+            scheduler.get_metrics()
+            # Returns:
+            # {
+            #     "waiting": 5,
+            #     "running": 16,
+            #     "waiting_by_priority": {"1.0": 1, "3.0": 4},
+            #     "dispatched": 240,
+            #     "preemptions": 3,
+            #     "aging_rate": 0.1,
+            #     "max_inflight": 16,
+            #     "agent_priorities": {"example/academic_agent": 3.0},
+            #     "inflight": 16
+            # }
+            ```
+        """
+        with self.lock:
+            waiting_by_priority: Dict[str, int] = {}
+            for _, _, syscall in self.heap:
+                key = str(syscall.get_priority())
+                waiting_by_priority[key] = waiting_by_priority.get(key, 0) + 1
+            metrics = {
+                "waiting": len(self.heap),
+                "running": len([syscall for syscall in self.running.values() if self._is_running(syscall)]),
+                "waiting_by_priority": waiting_by_priority,
+                "dispatched": self.dispatched,
+                "preemptions": self.preemptions,
+                "aging_rate": self.aging_rate,
+                "max_inflight": self.max_inflight,
+                "agent_priorities": dict(self.agent_priorities),
+            }
+        metrics["inflight"] = self.inflight_count
+        return metrics
@@ -6,6 +6,7 @@ from .base import BaseScheduler
 
 # allows for memory to be shared safely between threads
 from queue import Queue, Empty
+from aios.hooks.stores.queue import QueueShutdown
 
 from ..context.simple_context import SimpleContextManager
 
@@ -118,17 +119,23 @@ class RRScheduler(BaseScheduler):
         batch: List[Any],
         executor: Any,
         syscall_type: str
-    ) -> None:
+    ) -> List[Any]:
         """
-        Execute a batch of system calls with proper status tracking and error handling.
+        Dispatch a batch of system calls with proper status tracking and error handling.
+
+        The executor submits the batch and returns without waiting for it, so the
+        syscalls are completed asynchronously by the executor's workers.
 
         Args:
             batch: The list of system calls to execute
-            executor: Function to execute the batch of syscalls
+            executor: Function to dispatch the batch of syscalls
             syscall_type: Type of the syscalls for logging
+
+        Returns:
+            List of futures returned by the executor, one per dispatched syscall
         """
         if not batch:
-            return
+            return []
 
         start_time = time.time()
         for syscall in batch:
@@ -145,21 +152,24 @@ class RRScheduler(BaseScheduler):
         if not batch:
             message = f"Empty batch after preparation for {syscall_type}, skipping execution."
             logger.warning(message)
-            return
+            return []
 
         logger.info(f"Executing batch of {len(batch)} {syscall_type} syscalls.")
 
         try:
-            responses = executor(batch)
+            futures = executor(batch) or []
 
             for i, syscall in enumerate(batch):
-                logger.info(f"Completed batched {syscall_type} syscall for {syscall.agent_name}. "
+                logger.info(f"Dispatched batched {syscall_type} syscall for {syscall.agent_name}. "
                     f"Thread ID: {syscall.get_pid()}\n")
 
+            self.track_completions(futures, syscall_type)
+            return futures
 
         except Exception as e:
             logger.error(f"Error executing {syscall_type} syscall batch: {str(e)}")
             traceback.print_exc()
+            return []
 
     def process_llm_requests(self) -> None:
         """
@@ -178,9 +188,12 @@ class RRScheduler(BaseScheduler):
         while self.active:
             try:
                 llm_syscall = self.get_llm_syscall()
-                self._execute_batch_syscalls(llm_syscall, self.llm.execute_llm_syscalls, "LLM")
+                # Dispatch returns immediately; the slice runs on the model's worker pool
+                self._execute_batch_syscalls([llm_syscall], self.llm.execute_llm_syscalls, "LLM")
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def process_memory_requests(self) -> None:
         """
@@ -206,6 +219,8 @@ class RRScheduler(BaseScheduler):
                 )
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def process_storage_requests(self) -> None:
         """
@@ -232,6 +247,8 @@ class RRScheduler(BaseScheduler):
                 )
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def process_tool_requests(self) -> None:
         """
@@ -260,6 +277,8 @@ class RRScheduler(BaseScheduler):
                 )
             except Empty:
                 pass
+            except QueueShutdown:
+                break
 
     def start(self) -> None:
         """
@@ -0,0 +1,226 @@
+# This implements a shortest-job-first scheduler for LLM requests.
+# Waiting LLM syscalls are ordered by their predicted size in tokens (prompt
+# plus expected output, minus what earlier slices already generated), using
+# the output lengths SmartRouting's query store has seen for similar queries.
+# A maximum wait bounds how long a large request can be passed over.
+
+from aios.config.config_manager import config
+from aios.llm_core.routing import SmartRouting, messages_to_query
+from aios.llm_core.tokens import get_token_counter
+
+from .priority_scheduler import PriorityScheduler
+
+import heapq
+import time
+import logging
+from typing import Optional, Any, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SJFScheduler(PriorityScheduler):
+    """
+    A shortest-job-first (shortest-remaining-time) scheduler for LLM requests.
+
+    Every LLM syscall is sized as its prompt tokens plus its predicted output
+    tokens. The output prediction is the mean output length of the query's
+    nearest historical neighbours, averaged over the models the query may be
+    routed to, when the adapter routes with a ready SmartRouting store.
+    Otherwise (or for queries without history) it is `default_output_tokens`,
+    capped by the query's max_new_tokens, so requests are effectively ordered by
+    prompt length. Tokens generated by earlier, preempted slices of a request
+    are subtracted, so resumed requests are ranked by their remaining work.
+
+    Smaller jobs are dispatched first; a syscall that has waited longer than
+    `max_wait` seconds is dispatched before any smaller one. Dispatch
+    capacity and preemption work as in PriorityScheduler, preempting a
+    running request whose remaining size is more than `preempt_ratio` times
+    the smallest waiting one.
+
+    Example:
+        ```python
+        scheduler = SJFScheduler(
+            llm=llm_adapter,
+            memory_manager=memory_mgr,
+            storage_manager=storage_mgr,
+            tool_manager=tool_mgr,
+            log_mode="console",
+            get_llm_syscall=llm_queue.get,
+            get_memory_syscall=memory_queue.get,
+            get_storage_syscall=storage_queue.get,
+            get_tool_syscall=tool_queue.get,
+            max_wait=30.0
+        )
+        scheduler.start()
+        ```
+    """
+
+    def __init__(
+        self,
+        *args,
+        max_wait: Optional[float] = None,
+        default_output_tokens: Optional[int] = None,
+        preempt_ratio: Optional[float] = None,
+        **kwargs
+    ):
+        """
+        Initialize the SJF Scheduler.
+
+        Args:
+            *args: Arguments passed to PriorityScheduler
+            max_wait: Seconds after which a waiting syscall is served regardless of
+                its size. Defaults to scheduler.sjf.max_wait in config.yaml, or 30.
+            default_output_tokens: Output length assumed without history. Defaults to
+                scheduler.sjf.default_output_tokens in config.yaml, or 256.
+            preempt_ratio: How many times larger than the smallest waiting job a
+                running job must be to be preempted. Defaults to
+                scheduler.sjf.preempt_ratio in config.yaml, or 4.
+            **kwargs: Keyword arguments passed to PriorityScheduler
+        """
+        super().__init__(*args, **kwargs)
+        sjf_config = config.get_scheduler_config().get("sjf", {}) or {}
+        self.max_wait = max_wait if max_wait is not None else sjf_config.get("max_wait", 30.0)
+        self.default_output_tokens = default_output_tokens if default_output_tokens is not None else sjf_config.get("default_output_tokens", 256)
+        self.preempt_ratio = preempt_ratio if preempt_ratio is not None else sjf_config.get("preempt_ratio", 4.0)
+
+        # Per request (pid): predicted prompt and output tokens, and tokens
+        # already generated by preempted slices
+        self.estimates: Dict[Any, Dict[str, float]] = {}
+
+        # Metrics
+        self.predicted = 0
+        self.heuristic = 0
+        self.max_wait_overrides = 0
+
+    def _predict_output_tokens(self, syscalls: List[Any]) -> List[Optional[float]]:
+        """Predicted output tokens of every syscall, None where there is no history."""
+        router = getattr(self.llm, "router", None)
+        if not isinstance(router, SmartRouting) or not router.is_ready():
+            return [None] * len(syscalls)
+        try:
+            queries = [messages_to_query(syscall.query.messages) for syscall in syscalls]
+            _, out_len = router.store.predict_batch(queries, router.available_models, n_similar=router.n_similar)
+        except Exception as e:
+            logger.warning(f"Output length prediction failed, using the prompt-length heuristic: {e}")
+            return [None] * len(syscalls)
+
+        predictions = []
+        for i, syscall in enumerate(syscalls):
+            allowed = {llm["name"] for llm in syscall.query.llms or []}
+            columns = [j for j, name in enumerate(router.available_models) if not allowed or name in allowed]
+            lengths = out_len[i, columns]
+            lengths = lengths[lengths > 0]
+            predictions.append(float(np.mean(lengths)) if len(lengths) else None)
+        return predictions
+
+    def _prepare(self, syscalls: List[Any]) -> Dict[Any, Tuple[Dict[str, float], bool]]:
+        """Size newly arrived requests (token counting and a query store lookup)
+        outside the lock; returns pid -> (estimate, predicted from history)."""
+        new = [syscall for syscall in syscalls if syscall.get_pid() not in self.estimates]
+        if not new:
+            return {}
+        input_tokens = get_token_counter().count_batch([syscall.query.messages for syscall in new])
+        output_tokens = self._predict_output_tokens(new)
+        sized = {}
+        for syscall, n_input, n_output in zip(new, input_tokens, output_tokens):
+            max_tokens = getattr(syscall.query, "max_new_tokens", None) or float("inf")
+            predicted = n_output is not None
+            if not predicted:
+                n_output = self.default_output_tokens
+            sized[syscall.get_pid()] = ({
+                "input": n_input,
+                "output": min(n_output, max_tokens),
+                "generated": 0,
+            }, predicted)
+        return sized
+
+    def _admit(self, syscalls: List[Any], prepared: Optional[Dict[Any, Tuple[Dict[str, float], bool]]] = None) -> None:
+        if prepared is None:
+            prepared = self._prepare(syscalls)
+        for pid, (estimate, predicted) in prepared.items():
+            if pid in self.estimates:
+                continue
+            self.estimates[pid] = estimate
+            if predicted:
+                self.predicted += 1
+            else:
+                self.heuristic += 1
+        super()._admit(syscalls)
+
+    def _rank(self, syscall: Any) -> float:
+        """Predicted remaining tokens of the syscall's request."""
+        estimate = self.estimates.get(syscall.get_pid())
+        if estimate is None:
+            return float(self.default_output_tokens)
+        return estimate["input"] + max(0.0, estimate["output"] - estimate["generated"])
+
+    def _priority_key(self, syscall: Any, arrival: float) -> float:
+        return self._rank(syscall)
+
+    def _should_preempt(self, waiting: Any, running: Any) -> bool:
+        return self._rank(running) > self.preempt_ratio * self._rank(waiting)
+
+    def _pop_ready(self) -> List[Any]:
+        # Requests waiting longer than max_wait go first, oldest first: they
+        # are re-keyed by their (negative) arrival offset, below every job size
+        now = time.time()
+        overdue = False
+        for i, (key, count, syscall) in enumerate(self.heap):
+            arrival = self.arrivals.get(syscall.get_pid(), now)
+            if now - arrival >= self.max_wait:
+                if key >= 0:
+                    self.max_wait_overrides += 1
+                self.heap[i] = (arrival - now, count, syscall)
+                overdue = True
+        if overdue:
+            heapq.heapify(self.heap)
+        return super()._pop_ready()
+
+    def _forget_arrival(self, future: Any) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        syscall = future.result()
+        with self.lock:
+            estimate = self.estimates.get(syscall.get_pid())
+            if not self._is_final(syscall) and estimate is not None:
+                response = syscall.get_response()
+                text = getattr(response, "response_message", None)
+                if isinstance(text, str):
+                    estimate["generated"] = get_token_counter().count_text(text)
+            elif self._is_final(syscall):
+                self.estimates.pop(syscall.get_pid(), None)
+        super()._forget_arrival(future)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get the LLM shortest-job-first scheduling metrics of the scheduler.
+
+        Returns:
+            Dict containing the PriorityScheduler metrics plus how many requests
+            were sized from history or by the heuristic, and max-wait overrides
+
+        Example:
+            ```python
+            scheduler.get_metrics()
+            # Returns:
+            # {
+            #     "waiting": 5,
+            #     "running": 16,
+            #     ...
+            #     "predicted": 180,
+            #     "heuristic": 60,
+            #     "max_wait_overrides": 2,
+            #     "max_wait": 30.0
+            # }
+            ```
+        """
+        metrics = super().get_metrics()
+        metrics.update({
+            "predicted": self.predicted,
+            "heuristic": self.heuristic,
+            "max_wait_overrides": self.max_wait_overrides,
+            "max_wait": self.max_wait,
+        })
+        return metrics
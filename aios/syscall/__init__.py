@@ -1,13 +1,19 @@
-from threading import Event, Thread
-from typing import Optional, Any, Dict
+from queue import Queue, Empty
+from threading import Event
+from typing import Optional, Any, Dict, Iterator
 from datetime import datetime
 from cerebrum.utils.communication import Query
 
-class Syscall(Thread):
+# Marker pushed to the incremental response channel once a call completes
+_END_OF_STREAM = object()
+
+class Syscall:
     """
     Base class for system calls in the AIOS framework.
     
-    This class extends Thread to handle asynchronous system calls and provides
+    A syscall is a lightweight request object. It carries a completion event
+    that the scheduler sets once a response is available, so the caller can
+    block on it without a dedicated thread per call. It also provides
     functionality for tracking call status, timing, and response handling.
     
     Example:
@@ -17,8 +23,8 @@ class Syscall(Thread):
                 super().__init__(agent_name, query)
                 
         syscall = LLMSyscall("agent_1", LLMQuery(...))
-        syscall.start()
-        syscall.join()
+        global_llm_req_queue_add_message(syscall)
+        syscall.wait()
         response = syscall.get_response()
         ```
     """
@@ -36,7 +42,6 @@ class Syscall(Thread):
             syscall = Syscall("agent_1", Query(operation="read"))
             ```
         """
-        super().__init__()
         self.agent_name = agent_name
         self.query = query
         self.event = Event()
@@ -59,6 +64,15 @@ class Syscall(Thread):
         self.source: Optional[str] = None  # Source of the call
         self.target: Optional[str] = None  # Target of the call
         self.priority: Optional[int] = None  # Call priority
+        
+        # Incremental response channel, only created for streaming calls
+        self.stream: Optional[Queue] = None
+        
+        # Set by a preemptive scheduler to ask the executor to save and yield
+        self.preemption = Event()
+        
+        # Number of earlier time slices of the call (suspended and re-queued)
+        self.slices = 0
 
     def set_created_time(self, time: float) -> None:
         """
@@ -294,21 +308,176 @@ class Syscall(Thread):
         """
         self.time_limit = time_limit
 
-    def run(self) -> None:
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block the caller until the scheduler completes the system call.
+        
+        Args:
+            timeout: Maximum time in seconds to wait, or None to wait forever
+            
+        Returns:
+            True if the call completed, False if the timeout expired
+            
+        Example:
+            ```python
+            global_llm_req_queue_add_message(syscall)
+            syscall.wait()  # Returns once the scheduler calls syscall.event.set()
+            ```
+        """
+        return self.event.wait(timeout)
+
+    def is_done(self) -> bool:
+        """
+        Check whether the system call has been completed by the scheduler.
+        
+        Returns:
+            True if the completion event is set, False otherwise
+        """
+        return self.event.is_set()
+
+    def prepare_next_slice(self) -> None:
         """
-        Execute the system call.
+        Reset the completion state of a suspended system call so it can be queued again.
         
-        This method is called when the thread starts. It sets the process ID
-        and waits for the event to be set.
+        The last (partial) response is kept until the next slice replaces it,
+        and the saved generation context stays keyed by the call's pid.
         
         Example:
             ```python
-            syscall.start()  # Calls run() internally
-            syscall.event.set()  # Triggers execution
+            if syscall.get_status() == "suspend":
+                syscall.prepare_next_slice()
+                global_llm_req_queue_add_message(syscall)
+            ```
+        """
+        self.event.clear()
+        self.preemption.clear()
+        self.status = "active"
+        self.start_time = None
+        self.end_time = None
+        self.slices += 1
+
+    def is_resumed(self) -> bool:
+        """
+        Check whether the system call continues a suspended earlier slice.
+        
+        Returns:
+            True if the call was re-queued by prepare_next_slice
+        """
+        return self.slices > 0
+
+    def request_preemption(self) -> None:
+        """
+        Ask the executor of the system call to save its context and yield.
+        
+        Executors that support it (time-limited Hugging Face generation with
+        the context manager) stop at the next step and complete the call as
+        suspended, so it is re-queued and resumed later. Others ignore it.
+        
+        Example:
+            ```python
+            syscall.request_preemption()
+            ```
+        """
+        self.preemption.set()
+
+    def preemption_requested(self) -> bool:
+        """
+        Check whether a scheduler asked the system call to yield.
+        
+        Returns:
+            True if preemption was requested
+        """
+        return self.preemption.is_set()
+
+    def enable_streaming(self) -> None:
+        """
+        Open the incremental response channel of the system call.
+        
+        The executor of the call pushes partial results with `put_delta`
+        while it runs; the caller consumes them with `iter_stream`.
+        
+        Example:
+            ```python
+            syscall.enable_streaming()
+            global_llm_req_queue_add_message(syscall)
+            for delta in syscall.iter_stream():
+                print(delta, end="")
+            ```
+        """
+        if self.stream is None:
+            self.stream = Queue()
+
+    def is_streaming(self) -> bool:
+        """
+        Check whether the caller asked for incremental responses.
+        
+        Returns:
+            True if the incremental response channel is open
+        """
+        return self.stream is not None
+
+    def put_delta(self, delta: Any) -> None:
+        """
+        Push a partial result to the incremental response channel.
+        
+        Does nothing if the call is not streaming.
+        
+        Example:
+            ```python
+            syscall.put_delta("Hel")
+            syscall.put_delta("lo")
+            ```
+        """
+        if self.stream is not None and delta:
+            self.stream.put(delta)
+
+    def close_stream(self) -> None:
+        """
+        Mark the end of the incremental responses of the system call.
+        
+        Example:
+            ```python
+            syscall.close_stream()
+            syscall.event.set()
+            ```
+        """
+        if self.stream is not None:
+            self.stream.put(_END_OF_STREAM)
+
+    def iter_stream(self, poll_interval: float = 0.5) -> Iterator[Any]:
+        """
+        Yield partial results as they arrive until the system call completes.
+        
+        The iterator ends at the end-of-stream marker, or once the call is
+        completed and every pushed delta has been consumed, so a call that is
+        completed without closing its stream does not block the caller.
+        
+        Args:
+            poll_interval: Seconds to wait for a delta before re-checking completion
+            
+        Returns:
+            Iterator over the partial results
+            
+        Example:
+            ```python
+            for delta in syscall.iter_stream():
+                print(delta, end="")
+            response = syscall.get_response()
             ```
         """
-        # self.set_pid(self.native_id)
-        self.event.wait()
+        if self.stream is None:
+            self.wait()
+            return
+        while True:
+            try:
+                delta = self.stream.get(timeout=poll_interval)
+            except Empty:
+                if self.is_done() and self.stream.empty():
+                    return
+                continue
+            if delta is _END_OF_STREAM:
+                return
+            yield delta
 
     def get_source(self) -> Optional[str]:
         """
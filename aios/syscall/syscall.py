@@ -1,6 +1,6 @@
 import time
 import json
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Iterator
 
 # Update import to use the new location
 from aios.memory.note import MemoryNote
@@ -88,44 +88,17 @@ class SyscallExecutor:
         start_times, end_times = [], []
         waiting_times, turnaround_times = [], []
 
-        with self.id_lock:
-            self.id += 1
-            syscall_id = self.id
+        syscall_id = self._next_syscall_id()
+        syscall = self._submit_syscall(agent_name, query, syscall_id)
         
         while True:
-            # syscall = copy.deepcopy(syscall)
-            syscall = self.create_syscall(agent_name, query)
-            syscall.set_status("active")
-            
-            current_time = time.time()
-            syscall.set_created_time(current_time)
-            syscall.set_response(None)
-
-            if not syscall.get_source():
-                syscall.set_source(syscall.agent_name)
-            
-            if not syscall.get_pid():
-                syscall.set_pid(syscall_id)
-            
-            if isinstance(syscall, LLMSyscall):
-                global_llm_req_queue_add_message(syscall)
-                print(f"Syscall {syscall.agent_name} added to LLM queue")
-                
-            elif isinstance(syscall, StorageSyscall):
-                global_storage_req_queue_add_message(syscall)
-            elif isinstance(syscall, MemorySyscall):
-                global_memory_req_queue_add_message(syscall)
-            elif isinstance(syscall, ToolSyscall):
-                global_tool_req_queue_add_message(syscall)
-            
-            syscall.start()
-            syscall.join()
-            
-            # breakpoint()
+            syscall.wait()
 
             completed_response = syscall.get_response()
             
-            if syscall.get_status() == "done":
+            # Only a time-sliced call comes back suspended; anything else
+            # (done or error) is final
+            if syscall.get_status() != "suspend":
                 break
             
             # breakpoint()
@@ -140,6 +113,9 @@ class SyscallExecutor:
             end_times.append(end_time)
             waiting_times.append(waiting_time)
             turnaround_times.append(turnaround_time)
+            
+            # Queue the same syscall again; it resumes from its saved context
+            self._resubmit_syscall(syscall)
 
         return {
             "response": completed_response,
@@ -149,6 +125,132 @@ class SyscallExecutor:
             "turnaround_times": turnaround_times,
         }
 
+    def _next_syscall_id(self) -> int:
+        with self.id_lock:
+            self.id += 1
+            return self.id
+
+    def _submit_syscall(self, agent_name: str, query, syscall_id: int, stream: bool = False) -> Syscall:
+        """
+        Create a syscall for a query and add it to the queue of its type.
+        
+        Args:
+            agent_name: Name of the agent making the request
+            query: Query to execute
+            syscall_id: Process ID shared by all slices of the request
+            stream: Whether to open the incremental response channel
+            
+        Returns:
+            The enqueued syscall
+        """
+        # syscall = copy.deepcopy(syscall)
+        syscall = self.create_syscall(agent_name, query)
+        syscall.set_status("active")
+        if stream:
+            syscall.enable_streaming()
+        
+        current_time = time.time()
+        syscall.set_created_time(current_time)
+        syscall.set_response(None)
+
+        if not syscall.get_source():
+            syscall.set_source(syscall.agent_name)
+        
+        if not syscall.get_pid():
+            syscall.set_pid(syscall_id)
+        
+        self._enqueue_syscall(syscall)
+        return syscall
+
+    def _resubmit_syscall(self, syscall: Syscall) -> None:
+        """
+        Queue a suspended syscall again for its next time slice.
+        
+        Args:
+            syscall: The suspended syscall
+        """
+        syscall.prepare_next_slice()
+        syscall.set_created_time(time.time())
+        self._enqueue_syscall(syscall)
+
+    def _enqueue_syscall(self, syscall: Syscall) -> None:
+        """
+        Add a syscall to the queue of its type.
+        
+        Args:
+            syscall: The syscall to enqueue
+        """
+        if isinstance(syscall, LLMSyscall):
+            global_llm_req_queue_add_message(syscall)
+            print(f"Syscall {syscall.agent_name} added to LLM queue")
+            
+        elif isinstance(syscall, StorageSyscall):
+            global_storage_req_queue_add_message(syscall)
+        elif isinstance(syscall, MemorySyscall):
+            global_memory_req_queue_add_message(syscall)
+        elif isinstance(syscall, ToolSyscall):
+            global_tool_req_queue_add_message(syscall)
+
+    def stream_llm_syscall(self, agent_name: str, query: LLMQuery) -> Iterator[Dict[str, Any]]:
+        """
+        Execute an LLM system call and yield its output incrementally.
+        
+        Text deltas are yielded as soon as the model produces them. The last
+        event carries the same result dict that execute_llm_syscall returns.
+        When the scheduler time-slices the call, deltas of every slice are
+        forwarded in order.
+        
+        Args:
+            agent_name: Name of the agent making the request
+            query: LLM query to execute
+            
+        Returns:
+            Iterator of {"type": "delta", "content": str} events followed by
+            one {"type": "result", "result": Dict} event
+            
+        Example:
+            ```python
+            query = LLMQuery(messages=[{"role": "user", "content": "Hello"}], action_type="chat")
+            for event in executor.stream_llm_syscall("agent_1", query):
+                if event["type"] == "delta":
+                    print(event["content"], end="")
+            ```
+        """
+        start_times, end_times = [], []
+        waiting_times, turnaround_times = [], []
+        syscall_id = self._next_syscall_id()
+        syscall = self._submit_syscall(agent_name, query, syscall_id, stream=True)
+        
+        while True:
+            for delta in syscall.iter_stream():
+                yield {"type": "delta", "content": delta}
+            syscall.wait()
+            
+            completed_response = syscall.get_response()
+            
+            if syscall.get_status() != "suspend":
+                break
+            
+            start_time = syscall.get_start_time()
+            end_time = syscall.get_end_time()
+            start_times.append(start_time)
+            end_times.append(end_time)
+            waiting_times.append(start_time - syscall.get_created_time())
+            turnaround_times.append(end_time - syscall.get_created_time())
+            
+            self._resubmit_syscall(syscall)
+        
+        yield {
+            "type": "result",
+            "result": {
+                "response": completed_response,
+                "start_times": start_times,
+                "end_times": end_times,
+                "waiting_times": waiting_times,
+                "turnaround_times": turnaround_times,
+            }
+        }
+
     def execute_storage_syscall(self, agent_name: str, query: StorageQuery) -> Dict[str, Any]:
         """
         Execute a storage system call.
@@ -716,6 +818,7 @@ def create_syscall_executor():
     class SyscallWrapper:
         """Wrapper class providing direct access to syscall methods."""
         llm = executor.execute_llm_syscall
+        llm_stream = executor.stream_llm_syscall
         storage = executor.execute_storage_syscall
         memory = executor.execute_memory_syscall
         tool = executor.execute_tool_syscall
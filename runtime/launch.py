@@ -1,5 +1,7 @@
 from typing_extensions import Literal
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, model_validator
 from typing import Optional, Dict, Any, Union
 from dotenv import load_dotenv
@@ -18,6 +20,9 @@ from aios.hooks.modules.tool import useToolManager
 from aios.hooks.modules.agent import useFactory
 from aios.hooks.modules.scheduler import fifo_scheduler_nonblock as fifo_scheduler
 from aios.hooks.modules.scheduler import rr_scheduler_nonblock as rr_scheduler
+from aios.hooks.modules.scheduler import priority_scheduler_nonblock as priority_scheduler
+from aios.hooks.modules.scheduler import sjf_scheduler_nonblock as sjf_scheduler
+from aios.hooks.modules.scheduler import fair_share_scheduler_nonblock as fair_share_scheduler
 
 from aios.syscall.syscall import useSysCall
 from aios.config.config_manager import config
@@ -225,31 +230,32 @@ def initialize_scheduler(components: dict, scheduler_config: dict) -> Any:
         # if use_context and isinstance(scheduler_config.get("scheduler_type"), str) and scheduler_config.get("scheduler_type").lower() == "fifo":
         #     raise ValueError("FIFO scheduler cannot be used with context management enabled. Please either disable context management or use Round Robin scheduler.")
 
-        # Round Robin scheduler
-        if use_context:
-            scheduler = rr_scheduler(
-                llm=components["llms"],   
-                memory_manager=components["memory"],
-                storage_manager=components["storage"],
-                tool_manager=components["tool"],
-                log_mode=scheduler_config.get("log_mode", "console"),
-                get_llm_syscall=None,
-                get_memory_syscall=None,
-                get_storage_syscall=None,
-                get_tool_syscall=None,
-            )
-        else:
-            scheduler = fifo_scheduler(
-                llm=components["llms"],   
-                memory_manager=components["memory"],
-                storage_manager=components["storage"],
-                tool_manager=components["tool"],
-                log_mode=scheduler_config.get("log_mode", "console"),
-                get_llm_syscall=None,
-                get_memory_syscall=None,
-                get_storage_syscall=None,
-                get_tool_syscall=None,
-            )
+        # scheduler.type picks the scheduler; "auto" keeps Round Robin with
+        # context management and FIFO without it
+        scheduler_type = (scheduler_config.get("type") or "auto").lower()
+        if scheduler_type == "auto":
+            scheduler_type = "rr" if use_context else "fifo"
+        schedulers = {
+            "fifo": fifo_scheduler,
+            "rr": rr_scheduler,
+            "priority": priority_scheduler,
+            "sjf": sjf_scheduler,
+            "fair_share": fair_share_scheduler,
+        }
+        if scheduler_type not in schedulers:
+            raise ValueError(f"Invalid scheduler type: {scheduler_type}. Expected one of {['auto', *schedulers]}")
+
+        scheduler = schedulers[scheduler_type](
+            llm=components["llms"],   
+            memory_manager=components["memory"],
+            storage_manager=components["storage"],
+            tool_manager=components["tool"],
+            log_mode=scheduler_config.get("log_mode", "console"),
+            get_llm_syscall=None,
+            get_memory_syscall=None,
+            get_storage_syscall=None,
+            get_tool_syscall=None,
+        )
         scheduler.start()
         print("✅ Scheduler initialized and started")
         return scheduler
@@ -355,14 +361,17 @@ async def get_server_status():
     inactive_components = [
         component for component, instance in active_components.items() if not instance
     ]
+    llm = active_components.get("llms")
+    router_status = llm.get_router_status() if llm else None
     
     if not inactive_components:
-        return {"status": "ok", "message": "All core components are active."}
+        return {"status": "ok", "message": "All core components are active.", "router": router_status}
     else:
         return {
             "status": "warning",
             "message": f"Server is running, but some components are inactive: {', '.join(inactive_components)}",
-            "inactive_components": inactive_components
+            "inactive_components": inactive_components,
+            "router": router_status
         }
 
 
@@ -416,6 +425,37 @@ async def get_status():
     }
 
 
+@app.get("/core/llms/metrics")
+async def get_llm_metrics():
+    """Get the metrics reported by the LLM adapter, such as its cache counters."""
+    llm = active_components.get("llms")
+    if not llm:
+        return {
+            "status": "warning",
+            "message": "LLM adapter not initialized",
+            "metrics": {}
+        }
+    return {
+        "status": "success",
+        "metrics": llm.get_metrics()
+    }
+
+@app.get("/core/scheduler/metrics")
+async def get_scheduler_metrics():
+    """Get the metrics reported by the active scheduler."""
+    scheduler = active_components.get("scheduler")
+    if not scheduler:
+        return {
+            "status": "warning",
+            "message": "Scheduler not initialized",
+            "metrics": {}
+        }
+    return {
+        "status": "success",
+        "scheduler": scheduler.__class__.__name__,
+        "metrics": scheduler.get_metrics()
+    }
+
 @app.get("/core/llms/check")
 async def check_llms():
     """Check if what LLM cores are initialized."""
@@ -529,6 +569,23 @@ async def submit_agent(config: AgentSubmit):
         print(f"[DEBUG] Agent ID: {config.agent_id}")
         print(f"[DEBUG] Task: {config.agent_config.get('task', 'No task specified')}")
         
+        # Optional priority class of the agent's LLM requests, honored by the priority scheduler
+        priority = config.agent_config.get("priority")
+        scheduler = active_components.get("scheduler")
+        if priority is not None:
+            if hasattr(scheduler, "set_agent_priority"):
+                scheduler.set_agent_priority(config.agent_id, priority)
+            else:
+                print(f"[WARNING] Agent priority ignored: the {scheduler.__class__.__name__} does not schedule by priority")
+        
+        # Optional fair share of the agent's LLM tokens, honored by the fair-share scheduler
+        share = config.agent_config.get("share")
+        if share is not None or config.agent_config.get("burst_tokens") is not None:
+            if hasattr(scheduler, "set_agent_share"):
+                scheduler.set_agent_share(config.agent_id, share, config.agent_config.get("burst_tokens"))
+            else:
+                print(f"[WARNING] Agent share ignored: the {scheduler.__class__.__name__} does not schedule by share")
+        
         _submit_agent = active_components["factory"]["submit"]
         execution_id = _submit_agent(
             agent_name=config.agent_id, task_input=config.agent_config["task"]
@@ -637,30 +694,34 @@ async def cleanup_components():
         )
 
 
+def build_llm_query(request: QueryRequest) -> LLMQuery:
+    """Build the kernel-side LLMQuery of an LLM request, checking the required LLMs are selected."""
+    query_required_llms = request.query_data.llms
+    if query_required_llms is None:
+        if len(selected_llms["llms"]) > 0:
+            query_required_llms = copy.deepcopy(selected_llms["llms"])
+        
+    else:
+        if len(selected_llms["llms"]) > 0:
+            # Check if selected LLMs contain all required LLMs
+            for required_llm in query_required_llms:
+                if not any(required_llm["name"] == sel["name"] and required_llm["provider"] == sel["provider"] 
+                        for sel in selected_llms["llms"]):
+                    raise ValueError(f"Required LLM {required_llm['name']} from {required_llm['provider']} is not selected")
+                
+    return LLMQuery(
+        llms=query_required_llms,
+        messages=request.query_data.messages,
+        tools=request.query_data.tools,
+        action_type=request.query_data.action_type,
+        message_return_type=request.query_data.message_return_type,
+    )
+
 @app.post("/query")
 async def handle_query(request: QueryRequest):
     try:
         if request.query_type == "llm":
-            query_required_llms = request.query_data.llms
-            if query_required_llms is None:
-                if len(selected_llms["llms"]) > 0:
-                    query_required_llms = copy.deepcopy(selected_llms["llms"])
-                
-            else:
-                if len(selected_llms["llms"]) > 0:
-                    # Check if selected LLMs contain all required LLMs
-                    for required_llm in query_required_llms:
-                        if not any(required_llm["name"] == sel["name"] and required_llm["provider"] == sel["provider"] 
-                                for sel in selected_llms["llms"]):
-                            raise ValueError(f"Required LLM {required_llm['name']} from {required_llm['provider']} is not selected")
-                        
-            query = LLMQuery(
-                llms=query_required_llms,
-                messages=request.query_data.messages,
-                tools=request.query_data.tools,
-                action_type=request.query_data.action_type,
-                message_return_type=request.query_data.message_return_type,
-            )
+            query = build_llm_query(request)
             result_dict = await asyncio.to_thread(
                 execute_request, # The method to call
                 request.agent_name,               # First arg to execute_request
@@ -690,6 +751,44 @@ async def handle_query(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+async def handle_query_stream(request: QueryRequest):
+    """
+    Streaming variant of /query for LLM requests, served as Server-Sent Events.
+
+    Each text delta is sent as a `delta` event as soon as the model produces it.
+    A final `result` event carries the same payload /query would have returned,
+    and an `error` event is sent if the request fails after streaming started.
+    """
+    if request.query_type != "llm":
+        raise HTTPException(status_code=400, detail="Streaming is only supported for LLM queries")
+
+    try:
+        query = build_llm_query(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def format_event(event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+    def event_stream():
+        # Runs in Starlette's threadpool, so blocking on the syscall is fine here
+        try:
+            for event in SysCallWrapper.llm_stream(request.agent_name, query):
+                if event["type"] == "delta":
+                    yield format_event("delta", {"content": event["content"]})
+                else:
+                    yield format_event("result", event["result"])
+        except Exception as e:
+            logger.error(f"Streaming query failed: {str(e)}")
+            yield format_event("error", {"error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/core/config/update")
 async def update_config(request: Request):
     """Update configuration and API keys"""
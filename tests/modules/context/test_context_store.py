@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import torch
+
+from aios.context.context_store import ContextStore, context_nbytes
+
+
+def make_context(n_tokens, fill=0.0):
+    # 4 bytes per float32 element, so a context of n tokens holds 8 * n bytes
+    return {
+        "generated_tokens": torch.arange(n_tokens, dtype=torch.int32),
+        "past_key_values": ((torch.full((n_tokens,), fill),),),
+        "start_idx": n_tokens,
+    }
+
+
+class TestContextNbytes(unittest.TestCase):
+    def test_counts_tensors_and_text(self):
+        self.assertEqual(context_nbytes(make_context(16)), 128)
+        self.assertEqual(context_nbytes({"partial": "héllo", "start_idx": 3}), 6)
+
+
+class TestContextStore(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+
+    def test_spills_coldest_and_reloads(self):
+        store = ContextStore(max_memory_bytes=200, spill_dir=self.tmp, ttl=None)
+        store.put(1, make_context(16, fill=1.0))
+        store.put(2, make_context(16, fill=2.0))
+        # 256 bytes exceed the budget, so the coldest context goes to disk
+        metrics = store.get_metrics()
+        self.assertEqual(metrics["spilled_contexts"], 1)
+        self.assertEqual(metrics["resident_bytes"], 128)
+        self.assertEqual(len(os.listdir(store.spill_dir)), 1)
+
+        context = store.get(1)
+        self.assertTrue(torch.equal(context["past_key_values"][0][0], torch.full((16,), 1.0)))
+        self.assertEqual(context["start_idx"], 16)
+        metrics = store.get_metrics()
+        self.assertEqual(metrics["reloads"], 1)
+        # Reloading made the other context the coldest one
+        self.assertIn(2, store)
+        self.assertEqual(metrics["spilled_contexts"], 1)
+        self.assertTrue(torch.equal(store.get(2)["past_key_values"][0][0], torch.full((16,), 2.0)))
+
+    def test_drops_without_spill_dir(self):
+        store = ContextStore(max_memory_bytes=200, ttl=None)
+        store.put(1, make_context(16))
+        store.put(2, make_context(16))
+        self.assertIsNone(store.get(1))
+        self.assertIsNotNone(store.get(2))
+        self.assertEqual(store.get_metrics()["dropped"], 1)
+
+    def test_put_replaces_and_pop_removes(self):
+        store = ContextStore(max_memory_bytes=200, spill_dir=self.tmp, ttl=None)
+        store.put(1, make_context(16))
+        store.put(2, make_context(16))
+        store.put(1, make_context(4))
+        self.assertEqual(store.get(1)["start_idx"], 4)
+        store.pop(2)
+        self.assertNotIn(2, store)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(os.listdir(store.spill_dir), [])
+
+    def test_contexts_expire_after_ttl(self):
+        store = ContextStore(max_memory_bytes=200, spill_dir=self.tmp, ttl=10)
+        with mock.patch("aios.context.context_store.time.time", return_value=1000.0):
+            store.put(1, make_context(16))
+            store.put(2, make_context(16))
+        with mock.patch("aios.context.context_store.time.time", return_value=1005.0):
+            store.put(3, make_context(4))
+        with mock.patch("aios.context.context_store.time.time", return_value=1011.0):
+            store.collect_garbage()
+            # Both the spilled and the resident context of the first put expired
+            self.assertEqual(len(store), 1)
+            self.assertIsNotNone(store.get(3))
+            self.assertEqual(store.get_metrics()["expired"], 2)
+        self.assertEqual(os.listdir(store.spill_dir), [])
+
+    def test_stale_spill_dirs_are_removed(self):
+        stale = os.path.join(self.tmp, "spill-old")
+        os.makedirs(stale)
+        os.utime(stale, (0, 0))
+        store = ContextStore(spill_dir=self.tmp, ttl=10)
+        self.assertFalse(os.path.exists(stale))
+        self.assertTrue(os.path.isdir(store.spill_dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from aios.config.config_manager import config
+from aios.context import simple_context
+from aios.context.simple_context import CONTINUATION_PROMPT, SimpleContextManager
+
+
+MESSAGES = [{"role": "user", "content": "Write a story"}]
+
+
+def chunk(content, finish_reason=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+
+class FakeClient:
+    """Stands in for an OpenAI client, streaming the given chunks and recording each request."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        return iter(self.chunks)
+
+
+class FakeCounter:
+    def count_text(self, text, model=None):
+        return len(text.split())
+
+
+class FakeClock:
+    """Advances by `step` seconds on every reading."""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def time(self):
+        self.now += self.step
+        return self.now
+
+
+class TestResumeFromPartial(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(config, "get_llms_config", return_value={"context_store": {"spill": False}}):
+            self.manager = SimpleContextManager()
+        patcher = mock.patch.object(simple_context, "get_token_counter", return_value=FakeCounter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, client, pid=1, max_tokens=100, time_limit=None):
+        return self.manager.generate_response_with_interruption(
+            model_name="meta-llama/Llama-3.1-8B-Instruct",
+            model=client,
+            messages=MESSAGES,
+            tools=None,
+            message_return_type="text",
+            temperature=0.0,
+            max_tokens=max_tokens,
+            pid=pid,
+            time_limit=time_limit,
+        )
+
+    def test_resumes_with_the_partial_as_assistant_prefix(self):
+        self.manager.context_store.put(1, "Once upon a time")
+        client = FakeClient([chunk(" there was"), chunk(" a fox.", finish_reason="stop")])
+
+        response, finished = self.generate(client)
+
+        self.assertTrue(finished)
+        self.assertEqual(response, "Once upon a time there was a fox.")
+        request = client.requests[0]
+        self.assertEqual(request["messages"], MESSAGES + [{"role": "assistant", "content": "Once upon a time"}])
+        self.assertEqual(request["extra_body"], {"continue_final_message": True, "add_generation_prompt": False})
+        # Only what is left of the budget is generated: 100 - 4 tokens of partial output
+        self.assertEqual(request["max_tokens"], 96)
+        self.assertIsNone(self.manager.load_context(1))
+
+    def test_first_slice_sends_the_original_request(self):
+        client = FakeClient([chunk("Once upon a time", finish_reason="stop")])
+
+        response, finished = self.generate(client)
+
+        self.assertTrue(finished)
+        request = client.requests[0]
+        self.assertEqual(request["messages"], MESSAGES)
+        self.assertNotIn("extra_body", request)
+        self.assertEqual(request["max_tokens"], 100)
+
+    def test_interrupted_slice_saves_the_partial(self):
+        client = FakeClient([chunk("Once upon"), chunk(" a time"), chunk(" there was", finish_reason="stop")])
+
+        with mock.patch.object(simple_context, "time", FakeClock(step=1.0)):
+            response, finished = self.generate(client, time_limit=1.5)
+
+        self.assertFalse(finished)
+        self.assertEqual(response, "Once upon a time")
+        self.assertEqual(self.manager.load_context(1), "Once upon a time")
+
+    def test_remaining_tokens_never_drop_below_one(self):
+        self.manager.context_store.put(1, "one two three")
+        client = FakeClient([chunk(" four", finish_reason="stop")])
+
+        self.generate(client, max_tokens=2)
+
+        self.assertEqual(client.requests[0]["max_tokens"], 1)
+
+
+class TestContinuationRequest(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(config, "get_llms_config", return_value={"context_store": {"spill": False}}):
+            self.manager = SimpleContextManager()
+
+    def test_litellm_prefill(self):
+        with mock.patch.object(simple_context.litellm, "get_model_info", return_value={"supports_assistant_prefill": True}):
+            messages, extra_body = self.manager._continuation_request("deepseek/deepseek-chat", MESSAGES, "Once")
+        self.assertEqual(messages[-1], {"role": "assistant", "content": "Once", "prefix": True})
+        self.assertIsNone(extra_body)
+
+    def test_litellm_without_prefill_asks_to_continue(self):
+        with mock.patch.object(simple_context.litellm, "get_model_info", side_effect=Exception("unknown model")):
+            messages, extra_body = self.manager._continuation_request("gpt-4o-mini", MESSAGES, "Once")
+        self.assertEqual(messages[-2:], [
+            {"role": "assistant", "content": "Once"},
+            {"role": "user", "content": CONTINUATION_PROMPT},
+        ])
+        self.assertIsNone(extra_body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import concurrent.futures
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cerebrum.llm.apis import LLMResponse
+
+from aios.config.config_manager import config
+from aios.llm_core.adapter import LLMAdapter
+from aios.syscall.syscall import LLMSyscall
+
+
+def make_syscall(content="What is 2 + 2?", temperature=0.0, agent_name="agent"):
+    query = SimpleNamespace(
+        messages=[{"role": "user", "content": content}],
+        llms=None,
+        tools=None,
+        response_format=None,
+        message_return_type="text",
+        temperature=temperature,
+        max_new_tokens=None,
+    )
+    return LLMSyscall(agent_name, query)
+
+
+def make_adapter(**llms_config):
+    llms_config.setdefault("use_async_engine", False)
+    with mock.patch.object(config, "get_llms_config", return_value=llms_config), \
+            mock.patch.object(config, "get_router_config", return_value={"strategy": "sequential"}):
+        return LLMAdapter(llm_configs=[{"name": "gpt-4o-mini", "backend": "openai", "api_key": "sk-test"}])
+
+
+class FakeSemanticCache:
+    """Answers every lookup with a fixed response, recording the calling thread."""
+
+    def __init__(self, cached=None):
+        self.cached = cached
+        self.lookup_threads = []
+
+    def embed(self, messages):
+        return [1.0]
+
+    def lookup(self, agent_name, model_name, messages, embedding=None, **kwargs):
+        self.lookup_threads.append(threading.current_thread())
+        return self.cached
+
+    def store(self, *args, **kwargs):
+        pass
+
+    def get_metrics(self):
+        return {}
+
+
+class TestSemanticCacheDispatch(unittest.TestCase):
+    def setUp(self):
+        self.adapter = make_adapter()
+        self.addCleanup(self.adapter.cleanup)
+
+    def test_lookup_runs_in_the_worker(self):
+        cached = {"response_message": "4", "finished": True, "status_code": 200}
+        self.adapter.semantic_cache = FakeSemanticCache(cached)
+        syscall = make_syscall()
+        with mock.patch.object(self.adapter, "execute_llm_syscall") as execute:
+            futures = self.adapter.execute_llm_syscalls([syscall])
+            self.assertEqual(len(futures), 1)
+            futures[0].result(timeout=10)
+            execute.assert_not_called()
+
+        self.assertEqual(syscall.get_response().response_message, "4")
+        self.assertEqual(syscall.get_status(), "done")
+        self.assertIsNot(self.adapter.semantic_cache.lookup_threads[0], threading.current_thread())
+        # The hit is not reported as model latency
+        self.assertEqual(self.adapter.semantic_hits, set())
+        self.assertNotIn(0, self.adapter.load_tracker.latency)
+
+    def test_miss_calls_the_model(self):
+        self.adapter.semantic_cache = FakeSemanticCache(None)
+        syscall = make_syscall()
+        response = LLMResponse(response_message="four", finished=True, status_code=200)
+        with mock.patch.object(self.adapter, "execute_llm_syscall", return_value=(syscall, response)) as execute:
+            self.adapter.execute_llm_syscalls([syscall])[0].result(timeout=10)
+            execute.assert_called_once()
+        self.assertEqual(syscall.get_response().response_message, "four")
+
+
+
+class TestRequestCoalescing(unittest.TestCase):
+    def setUp(self):
+        self.adapter = make_adapter(request_coalescing={"enabled": True})
+        self.addCleanup(self.adapter.cleanup)
+        self.release = threading.Event()
+        self.calls = []
+
+    def slow_execute(self, model_idx, llm_syscall):
+        self.calls.append(llm_syscall)
+        self.release.wait(timeout=10)
+        return llm_syscall, LLMResponse(response_message="4", finished=True, status_code=200)
+
+    def test_identical_requests_share_one_call(self):
+        syscalls = [make_syscall(agent_name=f"agent_{i}") for i in range(3)]
+        with mock.patch.object(self.adapter, "execute_llm_syscall", side_effect=self.slow_execute):
+            futures = self.adapter.execute_llm_syscalls(syscalls)
+            self.release.set()
+            for future in futures:
+                future.result(timeout=10)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(self.adapter.coalesced_count, 2)
+        for syscall in syscalls:
+            self.assertEqual(syscall.get_status(), "done")
+            self.assertEqual(syscall.get_response().response_message, "4")
+        # Followers get their own copy of the response
+        self.assertIsNot(syscalls[1].get_response(), syscalls[2].get_response())
+        self.assertEqual(self.adapter.inflight_requests, {})
+
+    def test_sampled_requests_are_not_coalesced_by_default(self):
+        syscalls = [make_syscall(temperature=0.7) for _ in range(2)]
+        with mock.patch.object(self.adapter, "execute_llm_syscall", side_effect=self.slow_execute):
+            futures = self.adapter.execute_llm_syscalls(syscalls)
+            self.release.set()
+            for future in futures:
+                future.result(timeout=10)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.adapter.coalesced_count, 0)
+
+    def test_followers_are_released_when_the_leader_fails(self):
+        syscalls = [make_syscall(agent_name=f"agent_{i}") for i in range(2)]
+
+        def crash(model_idx, llm_syscall):
+            # Fails outside the model call, so the worker never completes the syscall
+            self.release.wait(timeout=10)
+            raise RuntimeError("worker crashed")
+
+        with mock.patch.object(self.adapter, "_run_llm_syscall", side_effect=crash):
+            futures = self.adapter.execute_llm_syscalls(syscalls)
+            self.release.set()
+            for future in futures:
+                concurrent.futures.wait([future], timeout=10)
+
+        for syscall in syscalls:
+            self.assertTrue(syscall.wait(timeout=10))
+            self.assertEqual(syscall.get_status(), "error")
+            self.assertIn("worker crashed", syscall.get_response().error)
+        self.assertEqual(self.adapter.inflight_requests, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
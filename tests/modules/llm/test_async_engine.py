@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import unittest
+
+from aios.llm_core.async_engine import AsyncLLMEngine
+
+
+class TestAsyncLLMEngine(unittest.TestCase):
+    def test_submit_runs_on_the_loop(self):
+        engine = AsyncLLMEngine()
+        engine.start()
+        try:
+            async def add(a, b):
+                await asyncio.sleep(0)
+                return a + b
+
+            self.assertEqual(engine.submit(add(1, 2)).result(timeout=5), 3)
+        finally:
+            engine.stop()
+
+    def test_stop_cancels_pending_requests(self):
+        engine = AsyncLLMEngine()
+        engine.start()
+        started = threading.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(3600)
+
+        future = engine.submit(hang())
+        released = threading.Event()
+        future.add_done_callback(lambda f: released.set())
+        self.assertTrue(started.wait(timeout=5))
+
+        engine.stop()
+        self.assertTrue(released.wait(timeout=5))
+        self.assertTrue(future.cancelled())
+        self.assertIsNone(engine.loop)
+
+    def test_submit_requires_running_engine(self):
+        engine = AsyncLLMEngine()
+
+        async def noop():
+            return None
+
+        coroutine = noop()
+        with self.assertRaises(RuntimeError):
+            engine.submit(coroutine)
+        coroutine.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import threading
+import unittest
+
+import torch
+from transformers import LlamaConfig, LlamaForCausalLM
+
+from aios.llm_core.hf_batching import ContinuousBatchingEngine
+
+
+class TokenIdTokenizer:
+    """Decodes token ids to their numbers, so outputs can be compared exactly."""
+    eos_token_id = None
+
+    def decode(self, ids, skip_special_tokens=True):
+        return " ".join(str(token) for token in ids)
+
+
+def build_tiny_model(eos_token_id=None):
+    torch.manual_seed(0)
+    config = LlamaConfig(
+        vocab_size=97,
+        hidden_size=32,
+        intermediate_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=128,
+    )
+    # float64 keeps padded and unpadded forward passes numerically identical
+    model = LlamaForCausalLM(config).double().eval()
+    model.generation_config.eos_token_id = eos_token_id
+    return model
+
+
+def greedy_reference(model, prompt, max_new_tokens):
+    """Greedy decoding of one unpadded sequence without any KV cache."""
+    input_ids = torch.tensor([prompt])
+    generated = []
+    with torch.no_grad():
+        for _ in range(max_new_tokens):
+            token = int(model(input_ids).logits[0, -1].argmax())
+            generated.append(token)
+            input_ids = torch.cat([input_ids, torch.tensor([[token]])], dim=1)
+    return generated
+
+
+class TestContinuousBatchingEngine(unittest.TestCase):
+    def setUp(self):
+        self.model = build_tiny_model()
+        self.tokenizer = TokenIdTokenizer()
+        self.engine = ContinuousBatchingEngine(self.model, self.tokenizer, max_batch_size=4)
+        self.engine.start()
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def expected(self, prompt, max_new_tokens):
+        return self.tokenizer.decode(greedy_reference(self.model, prompt, max_new_tokens))
+
+    def test_single_request_matches_reference(self):
+        prompt = [5, 6, 7, 8]
+        future = self.engine.submit(torch.tensor([prompt]), max_new_tokens=12, temperature=0)
+        self.assertEqual(future.result(timeout=30), self.expected(prompt, 12))
+
+    def test_left_padded_batch_matches_reference(self):
+        prompts = [[5, 6, 7, 8, 9, 10, 11], [3, 4], [20, 21, 22, 23]]
+        futures = [
+            self.engine.submit(torch.tensor([prompt]), max_new_tokens=10, temperature=0)
+            for prompt in prompts
+        ]
+        for prompt, future in zip(prompts, futures):
+            self.assertEqual(future.result(timeout=30), self.expected(prompt, 10))
+
+    def test_request_joins_mid_flight(self):
+        long_prompt, short_prompt = [5, 6, 7, 8, 9, 10, 11], [3, 4]
+        started = threading.Event()
+        deltas = []
+
+        def on_delta(text):
+            deltas.append(text)
+            if len(deltas) == 3:
+                started.set()
+
+        first = self.engine.submit(torch.tensor([long_prompt]), max_new_tokens=20, temperature=0, on_delta=on_delta)
+        self.assertTrue(started.wait(timeout=30))
+        second = self.engine.submit(torch.tensor([short_prompt]), max_new_tokens=8, temperature=0)
+
+        first_text = first.result(timeout=30)
+        self.assertEqual(first_text, self.expected(long_prompt, 20))
+        self.assertEqual(second.result(timeout=30), self.expected(short_prompt, 8))
+        self.assertEqual("".join(deltas), first_text)
+        # The second request was decoded alongside the first, not after it
+        self.assertLess(self.engine.get_metrics()["steps"], 19 + 7)
+
+    def test_requests_beyond_batch_size_wait_for_a_slot(self):
+        prompts = [[i, i + 1, i + 2] for i in range(10, 70, 10)]
+        futures = [
+            self.engine.submit(torch.tensor([prompt]), max_new_tokens=6, temperature=0)
+            for prompt in prompts
+        ]
+        for prompt, future in zip(prompts, futures):
+            self.assertEqual(future.result(timeout=30), self.expected(prompt, 6))
+        self.assertEqual(self.engine.get_metrics()["active"], 0)
+
+
+class TestContinuousBatchingEngineStop(unittest.TestCase):
+    def test_stops_at_eos(self):
+        model = build_tiny_model()
+        prompt = [5, 6, 7, 8]
+        reference = greedy_reference(model, prompt, 8)
+        # Make the fourth generated token the end of sequence
+        model.generation_config.eos_token_id = reference[3]
+        if reference[3] in reference[:3]:
+            self.skipTest("end-of-sequence token generated earlier")
+
+        engine = ContinuousBatchingEngine(model, TokenIdTokenizer(), max_batch_size=2)
+        engine.start()
+        try:
+            future = engine.submit(torch.tensor([prompt]), max_new_tokens=8, temperature=0)
+            self.assertEqual(future.result(timeout=30), TokenIdTokenizer().decode(reference[:3]))
+        finally:
+            engine.stop()
+
+    def test_submit_requires_running_engine(self):
+        engine = ContinuousBatchingEngine(build_tiny_model(), TokenIdTokenizer())
+        with self.assertRaises(RuntimeError):
+            engine.submit(torch.tensor([[1, 2]]), max_new_tokens=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+from aios.llm_core.routing import LoadAwareRouting, ModelLoadTracker
+
+
+class ModelConfig:
+    def __init__(self, name):
+        self.name = name
+
+
+class TestLoadAwareRouting(unittest.TestCase):
+    def setUp(self):
+        self.tracker = ModelLoadTracker()
+        # Replica 0 answers short requests quickly but generates slowly;
+        # replica 1 has a higher latency on long outputs but a higher throughput
+        self.tracker.on_complete(0, latency=1.0, output_tokens=10)
+        self.tracker.on_complete(1, latency=5.0, output_tokens=500)
+        self.router = LoadAwareRouting(
+            [ModelConfig("llama"), ModelConfig("llama")], self.tracker, default_output_tokens=256
+        )
+
+    def test_completion_time_uses_throughput(self):
+        self.assertAlmostEqual(self.tracker.expected_completion_time(0), 1.0)
+        self.assertAlmostEqual(self.tracker.expected_completion_time(0, output_tokens=400), 40.0)
+        self.assertAlmostEqual(self.tracker.expected_completion_time(1, output_tokens=400), 4.0)
+
+    def test_long_request_goes_to_high_throughput_replica(self):
+        model_idxs = self.router.get_model_idxs([[{"name": "llama"}]], [[]], max_tokens=[1024])
+        self.assertEqual(model_idxs, [1])
+
+    def test_queue_depth_spreads_a_batch(self):
+        self.tracker.set_limits(1, concurrency=1)
+        self.tracker.on_dispatch(1)
+        # Replica 1 now has a request ahead of it: 2 x 2.56 s against 25.6 s
+        # on replica 0. Every query assigned to it adds a wave, so replica 0
+        # takes over once about ten are queued there
+        model_idxs = self.router.get_model_idxs([[{"name": "llama"}]] * 12, [[]] * 12)
+        self.assertEqual(model_idxs[0], 1)
+        self.assertIn(0, model_idxs)
+
+    def test_unseen_model_is_explored(self):
+        router = LoadAwareRouting(
+            [ModelConfig("llama"), ModelConfig("llama"), ModelConfig("llama")], self.tracker
+        )
+        self.assertEqual(router.get_model_idxs([[{"name": "llama"}]], [[]]), [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from aios.llm_core.routing import SmartRouting
+
+
+class FakeCollection:
+    def __init__(self, ids):
+        self.id = "collection-uuid"
+        self.ids = ids
+
+    def count(self):
+        return len(self.ids)
+
+    def get(self, include=None):
+        return {"ids": self.ids}
+
+
+def make_store(stats_dir, ids):
+    store = SmartRouting.QueryStore.__new__(SmartRouting.QueryStore)
+    store._stats_dir = stats_dir
+    store.collection = FakeCollection(ids)
+    return store
+
+
+def make_stats(store, ids, fill):
+    return {
+        "present": np.full((len(ids), 2), True),
+        "correct": np.full((len(ids), 2), fill, dtype=np.float32),
+        "out_len": np.full((len(ids), 2), fill * 10, dtype=np.float32),
+        "fingerprint": store._fingerprint(ids),
+        "row_of_id": {doc_id: row for row, doc_id in enumerate(ids)},
+        "model_index": {"model-a": 0, "model-b": 1},
+    }
+
+
+class TestModelStatsIndex(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.stats_dir = os.path.join(tmp.name, "model_stats")
+
+    def test_save_and_load_round_trip(self):
+        ids = ["q1", "q2", "q3"]
+        store = make_store(self.stats_dir, ids)
+        stats = store._save_stats(make_stats(store, ids, 0.5))
+        self.assertIsInstance(stats["correct"], np.memmap)
+        np.testing.assert_array_equal(stats["out_len"], np.full((3, 2), 5.0))
+        self.assertEqual(stats["row_of_id"], {"q1": 0, "q2": 1, "q3": 2})
+        # No temporary files are left behind
+        self.assertEqual(sorted(os.listdir(self.stats_dir)), ["correct.npy", "index.json", "out_len.npy", "present.npy"])
+
+    def test_rewrite_keeps_earlier_mappings_intact(self):
+        ids = ["q1", "q2"]
+        store = make_store(self.stats_dir, ids)
+        old = store._save_stats(make_stats(store, ids, 0.25))
+
+        new_ids = ["q1", "q2", "q3", "q4"]
+        store.collection = FakeCollection(new_ids)
+        new = store._save_stats(make_stats(store, new_ids, 0.75))
+        # The old mapping still reads its own file, not a truncated or rewritten one
+        np.testing.assert_array_equal(old["correct"], np.full((2, 2), 0.25, dtype=np.float32))
+        np.testing.assert_array_equal(new["correct"], np.full((4, 2), 0.75, dtype=np.float32))
+
+    def test_stale_index_is_not_loaded(self):
+        ids = ["q1", "q2"]
+        store = make_store(self.stats_dir, ids)
+        store._save_stats(make_stats(store, ids, 0.5))
+        store.collection = FakeCollection(["q1", "q9"])
+        self.assertIsNone(store._load_stats())
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        ids = ["q1"]
+        store = make_store(self.stats_dir, ids)
+        os.makedirs(self.stats_dir)
+
+        def fail(f):
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            store._replace_file("present.npy", fail)
+        self.assertEqual(os.listdir(self.stats_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
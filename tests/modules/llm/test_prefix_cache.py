@@ -0,0 +1,123 @@
+import unittest
+
+import torch
+
+from aios.llm_core.prefix_cache import PrefixKVCache
+
+
+BLOCK = 16
+# One layer, one head, head_dim 2, float32: 16 bytes of keys and values per token
+BYTES_PER_TOKEN = 16
+
+
+def prompt(*blocks, extra=0):
+    """Token ids made of full blocks filled with the given ids, plus `extra` trailing tokens."""
+    tokens = [token for block in blocks for token in [block] * BLOCK]
+    tokens += list(range(1000, 1000 + extra))
+    return torch.tensor([tokens])
+
+
+def make_kv(length, offset=0.0):
+    # Values encode the position so slices can be checked exactly
+    positions = torch.arange(length, dtype=torch.float32) + offset
+    keys = positions.repeat_interleave(2).reshape(1, 1, length, 2)
+    return ((keys, keys + 0.5),)
+
+
+class TestPrefixLookup(unittest.TestCase):
+    def setUp(self):
+        self.cache = PrefixKVCache(max_bytes=1024 * 1024, block_size=BLOCK)
+
+    def test_miss_when_empty(self):
+        legacy, reused = self.cache.lookup(prompt(1, 2))
+        self.assertIsNone(legacy)
+        self.assertEqual(reused, 0)
+        self.assertEqual(self.cache.get_metrics()["misses"], 1)
+
+    def test_insert_keeps_full_blocks_only(self):
+        self.cache.insert(prompt(1, 2, extra=5), make_kv(37))
+        self.assertEqual(self.cache.get_metrics()["bytes"], 32 * BYTES_PER_TOKEN)
+
+        legacy, reused = self.cache.lookup(prompt(1, 2, extra=3))
+        self.assertEqual(reused, 32)
+        key, value = legacy[0]
+        self.assertEqual(key.shape, (1, 1, 32, 2))
+        torch.testing.assert_close(key, make_kv(32)[0][0])
+        torch.testing.assert_close(value, make_kv(32)[0][1])
+
+    def test_longest_shared_prefix_wins(self):
+        self.cache.insert(prompt(1, 2, 3), make_kv(48))
+        _, reused = self.cache.lookup(prompt(1, 2, 9, extra=1))
+        self.assertEqual(reused, 32)
+        _, reused = self.cache.lookup(prompt(1, 9, extra=1))
+        self.assertEqual(reused, 16)
+        legacy, reused = self.cache.lookup(prompt(9, 2, 3, extra=1))
+        self.assertIsNone(legacy)
+        self.assertEqual(reused, 0)
+
+    def test_leaves_a_token_to_prefill(self):
+        self.cache.insert(prompt(1, 2), make_kv(32))
+        # The whole prompt is cached, but the last block is not reused so the
+        # prefill still has a token to produce logits for
+        _, reused = self.cache.lookup(prompt(1, 2))
+        self.assertEqual(reused, 16)
+
+    def test_reinserting_a_cached_prompt_keeps_one_entry(self):
+        self.cache.insert(prompt(1, 2), make_kv(32))
+        self.cache.insert(prompt(1, 2), make_kv(32, offset=100.0))
+        self.assertEqual(self.cache.get_metrics()["entries"], 1)
+        legacy, _ = self.cache.lookup(prompt(1, 2, extra=1))
+        torch.testing.assert_close(legacy[0][0], make_kv(32)[0][0])
+
+    def test_metrics_count_reused_tokens(self):
+        self.cache.insert(prompt(1, 2), make_kv(32))
+        self.cache.lookup(prompt(1, 2, extra=1))
+        self.cache.lookup(prompt(1, extra=1))
+        self.cache.lookup(prompt(7, extra=1))
+        metrics = self.cache.get_metrics()
+        self.assertEqual((metrics["hits"], metrics["misses"], metrics["reused_tokens"]), (2, 1, 48))
+
+
+class TestPrefixEviction(unittest.TestCase):
+    def setUp(self):
+        # Room for exactly two entries of two blocks
+        self.cache = PrefixKVCache(max_bytes=2 * 32 * BYTES_PER_TOKEN, block_size=BLOCK)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.insert(prompt(1, 2), make_kv(32))
+        self.cache.insert(prompt(3, 4), make_kv(32))
+        # Using the first entry makes the second the least recently used
+        self.cache.lookup(prompt(1, 2, extra=1))
+        self.cache.insert(prompt(5, 6), make_kv(32))
+
+        self.assertEqual(self.cache.get_metrics()["entries"], 2)
+        self.assertEqual(self.cache.get_metrics()["bytes"], 2 * 32 * BYTES_PER_TOKEN)
+        self.assertEqual(self.cache.lookup(prompt(1, 2, extra=1))[1], 32)
+        self.assertEqual(self.cache.lookup(prompt(5, 6, extra=1))[1], 32)
+        self.assertEqual(self.cache.lookup(prompt(3, 4, extra=1)), (None, 0))
+
+    def test_eviction_keeps_keys_taken_over_by_newer_entries(self):
+        self.cache.insert(prompt(1, 2), make_kv(32))
+        # Shares the first block, so that key now points at the newer entry
+        self.cache.insert(prompt(1, 3), make_kv(32, offset=100.0))
+        self.cache.insert(prompt(5, 6), make_kv(32))
+
+        # The first entry is gone, but its first block is still served by the second
+        legacy, reused = self.cache.lookup(prompt(1, 2, extra=1))
+        self.assertEqual(reused, 16)
+        torch.testing.assert_close(legacy[0][0], make_kv(16, offset=100.0)[0][0])
+
+    def test_entry_over_budget_is_not_stored(self):
+        self.cache.insert(prompt(1, 2, 3, 4, 5), make_kv(80))
+        self.assertEqual(self.cache.get_metrics()["entries"], 0)
+        self.assertEqual(self.cache.lookup(prompt(1, 2, extra=1)), (None, 0))
+
+    def test_clear(self):
+        self.cache.insert(prompt(1, 2), make_kv(32))
+        self.cache.clear()
+        self.assertEqual(self.cache.get_metrics()["bytes"], 0)
+        self.assertEqual(self.cache.lookup(prompt(1, 2, extra=1)), (None, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
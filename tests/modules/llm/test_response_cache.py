@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from aios.llm_core.cache import ResponseCache, make_cache_key
+
+
+class TestMakeCacheKey(unittest.TestCase):
+    def test_cosmetic_differences_share_a_key(self):
+        messages = [{"role": "user", "content": "Hello"}]
+        padded = [{"role": "user", "content": "  Hello\n", "name": None}]
+        self.assertEqual(
+            make_cache_key("gpt-4o-mini", messages, temperature=0.0),
+            make_cache_key("gpt-4o-mini", padded, temperature=0.0),
+        )
+
+    def test_parameters_change_the_key(self):
+        messages = [{"role": "user", "content": "Hello"}]
+        base = make_cache_key("gpt-4o-mini", messages, temperature=0.0)
+        self.assertNotEqual(base, make_cache_key("gpt-4o", messages, temperature=0.0))
+        self.assertNotEqual(base, make_cache_key("gpt-4o-mini", messages, temperature=0.0, message_return_type="json"))
+        self.assertNotEqual(base, make_cache_key("gpt-4o-mini", messages, temperature=0.0, max_tokens=16))
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_returns_a_copy(self):
+        cache = ResponseCache()
+        cache.put("a", {"response_message": "hi"})
+        cached = cache.get("a")
+        cached["response_message"] = "changed"
+        self.assertEqual(cache.get("a"), {"response_message": "hi"})
+
+    def test_lru_eviction_by_entries(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", {"value": 1})
+        cache.put("b", {"value": 2})
+        # Touch "a" so "b" is the least recently used
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", {"value": 3})
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"value": 1})
+        self.assertEqual(cache.get("c"), {"value": 3})
+        self.assertEqual(cache.get_metrics()["evictions"], 1)
+
+    def test_eviction_by_bytes(self):
+        cache = ResponseCache(max_entries=100, max_bytes=40)
+        cache.put("a", {"value": "x" * 10})
+        cache.put("b", {"value": "y" * 10})
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("b"))
+        self.assertLessEqual(cache.get_metrics()["memory_bytes"], 40)
+
+    def test_oversized_value_is_not_cached(self):
+        cache = ResponseCache(max_bytes=8)
+        cache.put("a", {"value": "x" * 100})
+        self.assertIsNone(cache.get("a"))
+
+    def test_entries_expire_after_ttl(self):
+        cache = ResponseCache(ttl=10)
+        with mock.patch("aios.llm_core.cache.time.time", return_value=1000.0):
+            cache.put("a", {"value": 1})
+        with mock.patch("aios.llm_core.cache.time.time", return_value=1009.0):
+            self.assertEqual(cache.get("a"), {"value": 1})
+        with mock.patch("aios.llm_core.cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get_metrics()["memory_entries"], 0)
+
+    def test_disk_tier_survives_a_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResponseCache(disk_path=path)
+            cache.put("a", {"value": 1})
+            cache.close()
+
+            reopened = ResponseCache(disk_path=path)
+            self.assertEqual(reopened.get("a"), {"value": 1})
+            metrics = reopened.get_metrics()
+            self.assertEqual(metrics["disk_hits"], 1)
+            # Promoted to memory, so the next hit does not touch the disk
+            self.assertEqual(metrics["memory_entries"], 1)
+            reopened.close()
+
+    def test_disk_tier_expires_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            with mock.patch("aios.llm_core.cache.time.time", return_value=1000.0):
+                cache = ResponseCache(ttl=10, disk_path=path)
+                cache.put("a", {"value": 1})
+            cache.close()
+
+            reopened = ResponseCache(ttl=10, disk_path=path)
+            with mock.patch("aios.llm_core.cache.time.time", return_value=1011.0):
+                self.assertIsNone(reopened.get("a"))
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from aios.llm_core.semantic_cache import SemanticCache
+
+
+class BagOfWordsEncoder:
+    """Deterministic stand-in for the sentence embedding model."""
+    dim = 64
+
+    def __init__(self, model_name):
+        pass
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, text, normalize_embeddings=True):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.lower().split():
+            vector[sum(word.encode("utf-8")) % self.dim] += 1.0
+        return vector / np.linalg.norm(vector)
+
+
+def user(content):
+    return {"role": "user", "content": content}
+
+
+def assistant(content):
+    return {"role": "assistant", "content": content}
+
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("sentence_transformers.SentenceTransformer", BagOfWordsEncoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = SemanticCache(threshold=0.99, scope="agent_model")
+
+    def test_hit_on_same_question(self):
+        messages = [user("What is the capital of France?")]
+        self.cache.store("agent", "model", messages, {"response_message": "Paris"})
+        hit = self.cache.lookup("agent", "model", [user("what is the capital of france?")])
+        self.assertEqual(hit, {"response_message": "Paris"})
+
+    def test_scope_separates_agents(self):
+        self.cache.store("agent", "model", [user("hello there")], {"response_message": "hi"})
+        self.assertIsNone(self.cache.lookup("other", "model", [user("hello there")]))
+
+    def test_earlier_turns_separate_answers(self):
+        first = [user("Write a poem about the sea"), assistant("Waves..."), user("continue")]
+        second = [user("Write a poem about trees"), assistant("Leaves..."), user("continue")]
+        self.cache.store("agent", "model", first, {"response_message": "More waves"})
+        self.assertIsNone(self.cache.lookup("agent", "model", second))
+        self.assertEqual(self.cache.lookup("agent", "model", first), {"response_message": "More waves"})
+
+    def test_return_type_and_format_separate_answers(self):
+        messages = [user("List three colors")]
+        response_format = {"type": "json_object"}
+        self.cache.store("agent", "model", messages, {"response_message": "red, green, blue"})
+        self.assertIsNone(self.cache.lookup(
+            "agent", "model", messages, message_return_type="json", response_format=response_format
+        ))
+
+        self.cache.store(
+            "agent", "model", messages, {"response_message": '["red"]'},
+            message_return_type="json", response_format=response_format
+        )
+        hit = self.cache.lookup("agent", "model", messages, message_return_type="json", response_format=response_format)
+        self.assertEqual(hit, {"response_message": '["red"]'})
+        self.assertEqual(self.cache.lookup("agent", "model", messages), {"response_message": "red, green, blue"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from types import SimpleNamespace
+
+from aios.llm_core.routing import ModelLoadTracker, SequentialRouting
+
+
+MODEL = "meta-llama/Llama-3.1-8B-Instruct"
+
+
+def make_configs(weights=(1, 1, 1)):
+    # Three replicas of the same model plus one unrelated model at the end
+    configs = [
+        SimpleNamespace(name=MODEL, backend="vllm", hostname=f"http://gpu-{i}:8091", weight=weight)
+        for i, weight in enumerate(weights)
+    ]
+    configs.append(SimpleNamespace(name="gpt-4o-mini", backend="openai", weight=1))
+    return configs
+
+
+def pick(router, count):
+    selected = [[{"name": MODEL}]] * count
+    queries = [[{"role": "user", "content": "hi"}]] * count
+    return router.get_model_idxs(selected, queries)
+
+
+class TestReplicaBalancing(unittest.TestCase):
+    def test_round_robin_takes_turns(self):
+        router = SequentialRouting(make_configs(), balancing="round_robin")
+        self.assertEqual(pick(router, 4), [0, 1, 2, 0])
+        # The position carries over to the next batch
+        self.assertEqual(pick(router, 3), [1, 2, 0])
+
+    def test_weighted_is_smooth(self):
+        router = SequentialRouting(make_configs(weights=(5, 1, 1)), balancing="weighted")
+        # Smooth WRR interleaves the light replicas instead of bursting the heavy one
+        self.assertEqual(pick(router, 7), [0, 0, 1, 0, 2, 0, 0])
+        self.assertEqual(pick(router, 7), [0, 0, 1, 0, 2, 0, 0])
+
+    def test_least_outstanding_counts_the_batch(self):
+        tracker = ModelLoadTracker()
+        for _ in range(2):
+            tracker.on_dispatch(0)
+        tracker.on_dispatch(2)
+        router = SequentialRouting(make_configs(), load_tracker=tracker, balancing="least_outstanding")
+        # In-flight load is 2/0/1; queries assigned earlier in the batch count as load
+        # and ties go to the replica given fewer queries in this batch
+        self.assertEqual(pick(router, 5), [1, 2, 1, 0, 2])
+
+    def test_other_models_are_not_replicas(self):
+        router = SequentialRouting(make_configs(), balancing="round_robin")
+        selected = [[{"name": "gpt-4o-mini"}]] * 2
+        self.assertEqual(router.get_model_idxs(selected, [[]] * 2), [3, 3])
+
+    def test_least_outstanding_needs_a_tracker(self):
+        with self.assertRaises(ValueError):
+            SequentialRouting(make_configs(), balancing="least_outstanding")
+
+
+if __name__ == "__main__":
+    unittest.main()
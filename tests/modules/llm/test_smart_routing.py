@@ -0,0 +1,84 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+from aios.llm_core.routing import ModelLoadTracker, SmartRouting
+
+
+def make_router(concurrency, performance_requirement=0.5):
+    llm_configs = [SimpleNamespace(name=f"model-{j}", backend="openai", weight=1.0) for j in range(len(concurrency))]
+    tracker = ModelLoadTracker()
+    for j, limit in enumerate(concurrency):
+        tracker.set_limits(j, concurrency=limit)
+    # The query store (Chroma and its bootstrap download) is not needed to assign a scored batch
+    with mock.patch.object(SmartRouting, "QueryStore"):
+        return SmartRouting(
+            llm_configs=llm_configs,
+            bootstrap_url=None,
+            load_tracker=tracker,
+            assignment="global",
+            performance_requirement=performance_requirement,
+            background_init=False,
+        )
+
+
+class TestGlobalAssignment(unittest.TestCase):
+    def test_capacity_spreads_the_batch(self):
+        router = make_router([2, None])
+        # Model 0 is cheaper and good enough for every query, but takes only two
+        perf = np.full((5, 2), 0.9)
+        cost = np.tile([1.0, 3.0], (5, 1))
+        chosen = router.optimize_model_selection_global(
+            perf, cost, capacities=np.array([2.0, np.inf]), time_limit=10
+        )
+        self.assertEqual(np.bincount(chosen, minlength=2).tolist(), [2, 3])
+
+    def test_without_capacity_limits_cheapest_wins(self):
+        router = make_router([None, None])
+        perf = np.full((4, 2), 0.9)
+        cost = np.tile([1.0, 3.0], (4, 1))
+        chosen = router.optimize_model_selection_global(perf, cost, time_limit=10)
+        self.assertEqual(chosen.tolist(), [0, 0, 0, 0])
+
+    def test_candidates_are_respected(self):
+        router = make_router([None, None])
+        perf = np.full((3, 2), 0.9)
+        cost = np.tile([1.0, 3.0], (3, 1))
+        candidates = np.array([[True, True], [False, True], [True, True]])
+        chosen = router.optimize_model_selection_global(perf, cost, candidates=candidates, time_limit=10)
+        self.assertEqual(chosen.tolist(), [0, 1, 0])
+
+    def test_greedy_fallback_stays_within_capacity(self):
+        router = make_router([2, 1, None])
+        perf = np.array([[0.9, 0.9, 0.6]] * 5)
+        cost = np.tile([1.0, 2.0, 5.0], (5, 1))
+        candidates = np.ones((5, 3), dtype=bool)
+        with mock.patch.object(router, "optimize_model_selection_global", return_value=None) as solver:
+            chosen = router._assign_global(perf, cost, candidates)
+        solver.assert_called_once()
+        self.assertEqual(np.bincount(chosen, minlength=3).tolist(), [2, 1, 2])
+
+    def test_greedy_fallback_serves_constrained_queries_first(self):
+        router = make_router([1, None])
+        perf = np.full((2, 2), 0.9)
+        cost = np.tile([1.0, 3.0], (2, 1))
+        # Only query 1 can use model 0, which has room for one
+        candidates = np.array([[True, True], [True, False]])
+        with mock.patch.object(router, "optimize_model_selection_global", return_value=None):
+            chosen = router._assign_global(perf, cost, candidates)
+        self.assertEqual(chosen.tolist(), [1, 0])
+
+    def test_in_flight_requests_reduce_capacity(self):
+        router = make_router([2, None])
+        router.load_tracker.on_dispatch(0)
+        perf = np.full((3, 2), 0.9)
+        cost = np.tile([1.0, 3.0], (3, 1))
+        with mock.patch.object(router, "optimize_model_selection_global", return_value=None):
+            chosen = router._assign_global(perf, cost, np.ones((3, 2), dtype=bool))
+        self.assertEqual(np.bincount(chosen, minlength=2).tolist(), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import threading
+import unittest
+from unittest import mock
+
+from aios.llm_core.tokens import TokenCounter, resolve_tokenizer_family
+
+
+class CharTokenizer:
+    """Hugging Face style tokenizer with one token per character."""
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [list(text) for text in texts]}
+
+
+class TestResolveTokenizerFamily(unittest.TestCase):
+    def test_openai_models(self):
+        self.assertEqual(resolve_tokenizer_family("gpt-4o-mini"), "o200k_base")
+        self.assertEqual(resolve_tokenizer_family("openai/gpt-4o"), "o200k_base")
+        self.assertEqual(resolve_tokenizer_family("gpt-3.5-turbo"), "cl100k_base")
+
+    def test_litellm_provider_names_use_the_default(self):
+        self.assertEqual(resolve_tokenizer_family("gemini/gemini-1.5-flash"), "o200k_base")
+        self.assertEqual(resolve_tokenizer_family("ollama/llama3:8b"), "o200k_base")
+        self.assertEqual(resolve_tokenizer_family("meta-llama/Llama-3.1-8B-Instruct"), "o200k_base")
+
+    def test_registered_hf_models(self):
+        name = "meta-llama/Llama-3.1-8B-Instruct"
+        self.assertEqual(resolve_tokenizer_family(name, {name}), f"hf:{name}")
+
+
+class TestTokenCounter(unittest.TestCase):
+    def test_registered_tokenizer_counts_and_caches(self):
+        counter = TokenCounter()
+        counter.register_hf_model("org/model", CharTokenizer())
+        messages = [{"role": "user", "content": "hello"}]
+
+        first = counter.count_messages(messages, model="org/model")
+        self.assertEqual(counter.count_messages(messages, model="org/model"), first)
+        self.assertEqual(counter.count_text("hello", model="org/model"), 5)
+        metrics = counter.get_metrics()
+        self.assertEqual(metrics["hits"], 1)
+        self.assertEqual(metrics["estimated"], 0)
+
+    def test_estimates_while_loading_without_caching(self):
+        counter = TokenCounter()
+        release = threading.Event()
+
+        def slow_load(family):
+            release.wait(timeout=10)
+            with counter.tokenizer_lock:
+                counter.tokenizers[family] = lambda texts: [1 for _ in texts]
+                counter.loading.discard(family)
+
+        with mock.patch.object(counter, "_load_tokenizer", side_effect=slow_load):
+            # Does not block on the load
+            self.assertEqual(counter.count_text("x" * 8, model="gpt-4o"), 2)
+            self.assertEqual(counter.get_metrics()["loading"], ["o200k_base"])
+            counter.count_messages([{"role": "user", "content": "x" * 8}], model="gpt-4o")
+            self.assertEqual(counter.get_metrics()["cached_messages"], 0)
+            release.set()
+
+    def test_failed_load_is_retried_after_interval(self):
+        counter = TokenCounter(retry_interval=60)
+        with mock.patch("aios.llm_core.tokens.time.time", return_value=1000.0), \
+                mock.patch.dict("sys.modules", {"tiktoken": None}):
+            counter._load_tokenizer("o200k_base")
+        self.assertEqual(counter.get_metrics()["failed"], ["o200k_base"])
+
+        with mock.patch("aios.llm_core.tokens.threading.Thread") as thread, \
+                mock.patch("aios.llm_core.tokens.time.time", return_value=1030.0):
+            self.assertIsNone(counter._get_tokenizer("o200k_base"))
+            thread.assert_not_called()
+        with mock.patch("aios.llm_core.tokens.threading.Thread") as thread, \
+                mock.patch("aios.llm_core.tokens.time.time", return_value=1061.0):
+            self.assertIsNone(counter._get_tokenizer("o200k_base"))
+            thread.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
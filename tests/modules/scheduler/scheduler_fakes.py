@@ -0,0 +1,103 @@
+"""Fakes shared by the LLM scheduler tests."""
+
+import time
+from types import SimpleNamespace
+
+
+class FakeCounter:
+    """Counts one token per character of message content."""
+
+    def count_batch(self, message_lists, model=None):
+        return [sum(len(message["content"]) for message in messages) for messages in message_lists]
+
+    def count_text(self, text, model=None):
+        return len(text)
+
+
+class FakeSyscall:
+    """LLM syscall whose prompt is prompt_tokens characters long."""
+
+    def __init__(
+        self, pid, prompt_tokens=100, agent_name="agent", max_new_tokens=None, created_time=None, priority=None
+    ):
+        self.agent_name = agent_name
+        self.pid = pid
+        self.query = SimpleNamespace(
+            messages=[{"role": "user", "content": "x" * prompt_tokens}], max_new_tokens=max_new_tokens, llms=None
+        )
+        self.created_time = created_time if created_time is not None else time.time()
+        self.priority = priority
+        self.status = "executing"
+        self.start_time = None
+        self.response = None
+        self.preempted = False
+
+    def get_pid(self):
+        return self.pid
+
+    def get_created_time(self):
+        return self.created_time
+
+    def get_priority(self):
+        return self.priority
+
+    def set_priority(self, priority):
+        self.priority = priority
+
+    def get_status(self):
+        return self.status
+
+    def set_status(self, status):
+        self.status = status
+
+    def get_start_time(self):
+        return self.start_time
+
+    def set_start_time(self, start_time):
+        self.start_time = start_time
+
+    def is_done(self):
+        return self.status in ("done", "error")
+
+    def preemption_requested(self):
+        return self.preempted
+
+    def request_preemption(self):
+        self.preempted = True
+
+    def get_response(self):
+        return self.response
+
+
+class FakeFuture:
+    """Completed future resolving to a syscall."""
+
+    def __init__(self, syscall):
+        self.syscall = syscall
+
+    def cancelled(self):
+        return False
+
+    def exception(self):
+        return None
+
+    def result(self):
+        return self.syscall
+
+
+def make_scheduler(scheduler_class, **kwargs):
+    """Build an LLM scheduler without managers or queues, dispatching up to 100 syscalls."""
+    kwargs.setdefault("max_inflight", 100)
+    kwargs.setdefault("max_batch_size", 100)
+    return scheduler_class(
+        llm=None,
+        memory_manager=None,
+        storage_manager=None,
+        tool_manager=None,
+        log_mode="console",
+        get_llm_syscall=None,
+        get_memory_syscall=None,
+        get_storage_syscall=None,
+        get_tool_syscall=None,
+        **kwargs
+    )
@@ -0,0 +1,53 @@
+import time
+import unittest
+
+from aios.scheduler.batch_window import AdaptiveBatchWindow
+
+
+class TestAdaptiveBatchWindow(unittest.TestCase):
+    def test_window_is_zero_without_history(self):
+        window = AdaptiveBatchWindow(max_window=0.5, max_batch_size=8)
+        self.assertEqual(window.next_window(), 0.0)
+
+    def test_window_is_zero_under_light_load(self):
+        window = AdaptiveBatchWindow(max_window=0.5, max_batch_size=8, rate_horizon=10.0)
+        now = time.time()
+        window.record_arrival(now)
+        window.record_service_time("model", 1.0)
+        # 0.1 arrivals/s x 1 s service time: nothing to batch with
+        self.assertEqual(window.next_window(), 0.0)
+
+    def test_window_grows_with_load(self):
+        window = AdaptiveBatchWindow(max_window=10.0, max_batch_size=32, rate_horizon=1.0)
+        now = time.time()
+        for _ in range(4):
+            window.record_arrival(now)
+        window.record_service_time("model", 1.0)
+        # 4 arrivals/s x 1 s: wait for 3 more requests at 4 per second
+        self.assertAlmostEqual(window.next_window(), 0.75, places=2)
+
+    def test_window_is_capped(self):
+        window = AdaptiveBatchWindow(max_window=0.1, max_batch_size=32, rate_horizon=1.0)
+        now = time.time()
+        for _ in range(10):
+            window.record_arrival(now)
+        window.record_service_time("model", 5.0)
+        self.assertEqual(window.next_window(), 0.1)
+
+    def test_old_arrivals_expire(self):
+        window = AdaptiveBatchWindow(rate_horizon=1.0)
+        window.record_arrival(time.time() - 5.0)
+        self.assertEqual(window.arrival_rate(), 0.0)
+
+    def test_service_time_is_smoothed(self):
+        window = AdaptiveBatchWindow(smoothing=0.5)
+        window.record_service_time("a", 1.0)
+        window.record_service_time("a", 3.0)
+        window.record_service_time("b", 4.0)
+        window.record_service_time("b", -1.0)
+        # EWMA of a is 2.0, b ignores the negative sample
+        self.assertAlmostEqual(window.service_time(), 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import threading
+import time
+import unittest
+from queue import Queue
+
+from aios.hooks.stores import queue as QueueStore
+from aios.scheduler.base import BaseScheduler
+
+
+class TestCollectBatch(unittest.TestCase):
+    def _getter(self, q):
+        return lambda timeout=None: QueueStore.getMessage(q, timeout=timeout)
+
+    def test_zero_window_drains_backlog(self):
+        q = Queue()
+        for i in range(5):
+            QueueStore.addMessage(q, i)
+        start = time.time()
+        batch = BaseScheduler.collect_batch(None, self._getter(q), max_batch_size=4, max_wait=0.0)
+        self.assertEqual(batch, [0, 1, 2, 3])
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_window_waits_for_late_arrivals(self):
+        q = Queue()
+        QueueStore.addMessage(q, "first")
+        during = threading.Timer(0.02, QueueStore.addMessage, args=(q, "during"))
+        after = threading.Timer(0.4, QueueStore.addMessage, args=(q, "after"))
+        during.start()
+        after.start()
+        self.addCleanup(after.cancel)
+        start = time.time()
+        batch = BaseScheduler.collect_batch(None, self._getter(q), max_batch_size=4, max_wait=0.2)
+        elapsed = time.time() - start
+        # The window stays open for the late arrival and closes at the deadline
+        self.assertEqual(batch, ["first", "during"])
+        self.assertGreaterEqual(elapsed, 0.15)
+        self.assertLess(elapsed, 0.4)
+        after.join()
+        self.assertEqual(QueueStore.getMessage(q, timeout=0), "after")
+
+    def test_shutdown_returns_collected(self):
+        q = Queue()
+        QueueStore.addMessage(q, "first")
+        QueueStore.shutdown(q)
+        batch = BaseScheduler.collect_batch(None, self._getter(q), max_batch_size=4, max_wait=10.0)
+        self.assertEqual(batch, ["first"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from aios.scheduler.fair_share_scheduler import FairShareScheduler
+from scheduler_fakes import FakeCounter, FakeFuture, FakeSyscall, make_scheduler
+
+
+class TestFairShareScheduler(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("aios.scheduler.fair_share_scheduler.get_token_counter", return_value=FakeCounter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_scheduler(self, **kwargs):
+        kwargs.setdefault("quantum_tokens", 100)
+        kwargs.setdefault("default_burst_tokens", 100)
+        kwargs.setdefault("default_output_tokens", 0)
+        return make_scheduler(FairShareScheduler, **kwargs)
+
+    def dispatch_order(self, scheduler, syscalls):
+        scheduler._admit(syscalls)
+        order = []
+        while scheduler._has_waiting():
+            order.extend(syscall.get_pid() for syscall in scheduler._pop_ready())
+        return order
+
+    def test_round_robin_between_agents(self):
+        scheduler = self.make_scheduler()
+        syscalls = [FakeSyscall(pid, agent_name="chatty") for pid in range(4)]
+        syscalls += [FakeSyscall(pid, agent_name="quiet") for pid in (10, 11)]
+        # The chatty agent queued first, but cannot crowd out the quiet one
+        self.assertEqual(self.dispatch_order(scheduler, syscalls), [0, 10, 1, 11, 2, 3])
+
+    def test_shares_weight_the_rounds(self):
+        scheduler = self.make_scheduler()
+        scheduler.set_agent_share("heavy", share=2)
+        syscalls = [FakeSyscall(pid, agent_name="heavy") for pid in range(4)]
+        syscalls += [FakeSyscall(pid, agent_name="light") for pid in (10, 11)]
+        self.assertEqual(self.dispatch_order(scheduler, syscalls), [0, 1, 10, 2, 3, 11])
+
+    def test_costs_are_in_tokens(self):
+        scheduler = self.make_scheduler(default_burst_tokens=300)
+        # One long prompt costs the agent three rounds of credit
+        syscalls = [FakeSyscall(0, agent_name="long", prompt_tokens=300), FakeSyscall(1, agent_name="long")]
+        syscalls += [FakeSyscall(pid, agent_name="short") for pid in (10, 11, 12)]
+        self.assertEqual(self.dispatch_order(scheduler, syscalls), [10, 11, 0, 12, 1])
+
+    def test_output_charge_is_capped_by_max_new_tokens(self):
+        scheduler = self.make_scheduler(default_output_tokens=256)
+        capped, default = FakeSyscall(0, max_new_tokens=10), FakeSyscall(1)
+        scheduler._admit([capped, default])
+        self.assertEqual(scheduler.charges[id(capped)][0][2], 110)
+        self.assertEqual(scheduler.charges[id(default)][0][2], 356)
+
+    def test_refund_does_not_bank_credit(self):
+        scheduler = self.make_scheduler(default_output_tokens=256)
+        syscall = FakeSyscall(0, prompt_tokens=10)
+        self.assertEqual(self.dispatch_order(scheduler, [syscall]), [0])
+        # A short response refunds most of the estimate, but the agent has nothing queued
+        syscall.response = SimpleNamespace(response_message="ok")
+        scheduler._forget_arrival(FakeFuture(syscall))
+        self.assertEqual(scheduler.deficits["agent"], 0.0)
+
+    def test_refund_is_capped_by_burst(self):
+        scheduler = self.make_scheduler(default_output_tokens=256, default_burst_tokens=400)
+        scheduler.max_inflight = 1
+        first, second = FakeSyscall(0), FakeSyscall(1, prompt_tokens=1000)
+        scheduler._admit([first, second])
+        self.assertEqual([syscall.get_pid() for syscall in scheduler._pop_ready()], [0])
+        # Credit earned by the waiting request while the first one ran
+        scheduler.deficits["agent"] = 350.0
+        first.response = SimpleNamespace(response_message="ok")
+        scheduler._forget_arrival(FakeFuture(first))
+        self.assertEqual(scheduler.deficits["agent"], 400.0)
+
+    def test_tokens_are_counted_outside_the_lock(self):
+        scheduler = self.make_scheduler(default_output_tokens=256)
+        lock_held = []
+
+        class LockCheckingCounter(FakeCounter):
+            def count_batch(self, message_lists, model=None):
+                lock_held.append(scheduler.lock.locked())
+                return super().count_batch(message_lists, model)
+
+            def count_text(self, text, model=None):
+                lock_held.append(scheduler.lock.locked())
+                return super().count_text(text, model)
+
+        syscall = FakeSyscall(0)
+        with mock.patch("aios.scheduler.fair_share_scheduler.get_token_counter", return_value=LockCheckingCounter()):
+            prepared = scheduler._prepare([syscall])
+            with scheduler.lock:
+                scheduler._admit([syscall], prepared)
+                scheduler._pop_ready()
+            syscall.response = SimpleNamespace(response_message="ok")
+            scheduler._forget_arrival(FakeFuture(syscall))
+        self.assertEqual(lock_held, [False, False])
+        self.assertEqual(scheduler.served_tokens["agent"], 102)
+
+
+if __name__ == "__main__":
+    unittest.main()
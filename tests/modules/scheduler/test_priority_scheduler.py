@@ -0,0 +1,114 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from aios.hooks.stores.queue import QueueShutdown
+from aios.scheduler.priority_scheduler import PRIORITY_CLASSES, PriorityScheduler
+from scheduler_fakes import FakeSyscall, make_scheduler
+
+
+class TestPriorityScheduler(unittest.TestCase):
+    def make_scheduler(self, **kwargs):
+        kwargs.setdefault("aging_rate", 0.1)
+        kwargs.setdefault("preemption", True)
+        kwargs.setdefault("min_run_time", 0.5)
+        return make_scheduler(PriorityScheduler, **kwargs)
+
+    def dispatch(self, scheduler):
+        """Pop what fits and track it as running, as the dispatch loop does."""
+        batch = scheduler._pop_ready()
+        scheduler.running.update((id(syscall), syscall) for syscall in batch)
+        return [syscall.get_pid() for syscall in batch]
+
+    def test_better_class_first(self):
+        scheduler = self.make_scheduler()
+        syscalls = [
+            FakeSyscall(0, created_time=1000.0, priority=PRIORITY_CLASSES["batch"]),
+            FakeSyscall(1, created_time=1001.0, priority=PRIORITY_CLASSES["realtime"]),
+            FakeSyscall(2, created_time=1002.0, priority=PRIORITY_CLASSES["normal"]),
+        ]
+        scheduler._admit(syscalls)
+        self.assertEqual(self.dispatch(scheduler), [1, 2, 0])
+
+    def test_waiting_syscalls_age(self):
+        scheduler = self.make_scheduler()
+        # Two classes apart, but the batch request has waited 30 s longer: 3 + 100 < 1 + 103
+        old_batch = FakeSyscall(0, created_time=1000.0, priority=PRIORITY_CLASSES["batch"])
+        new_interactive = FakeSyscall(1, created_time=1030.0, priority=PRIORITY_CLASSES["interactive"])
+        recent_interactive = FakeSyscall(2, created_time=1010.0, priority=PRIORITY_CLASSES["interactive"])
+        scheduler._admit([old_batch, new_interactive, recent_interactive])
+        self.assertEqual(self.dispatch(scheduler), [2, 0, 1])
+
+    def test_max_inflight_caps_dispatch(self):
+        scheduler = self.make_scheduler(max_inflight=2)
+        syscalls = [FakeSyscall(pid, created_time=1000.0 + pid) for pid in range(4)]
+        scheduler._admit(syscalls)
+        self.assertEqual(self.dispatch(scheduler), [0, 1])
+        self.assertEqual(self.dispatch(scheduler), [])
+        # A completion frees one slot
+        syscalls[0].status = "done"
+        self.assertEqual(self.dispatch(scheduler), [2])
+
+    def test_preemption_picks_worst_class_past_min_run_time(self):
+        scheduler = self.make_scheduler(max_inflight=3)
+        now = time.time()
+        normal = FakeSyscall(0, priority=PRIORITY_CLASSES["normal"])
+        old_batch = FakeSyscall(1, priority=PRIORITY_CLASSES["batch"])
+        new_batch = FakeSyscall(2, priority=PRIORITY_CLASSES["batch"])
+        scheduler._admit([normal, old_batch, new_batch])
+        self.dispatch(scheduler)
+        normal.start_time, old_batch.start_time, new_batch.start_time = now - 5, now - 2, now
+
+        scheduler._admit([FakeSyscall(3, priority=PRIORITY_CLASSES["realtime"])])
+        scheduler._maybe_preempt()
+        # The batch syscall that has run long enough yields; the fresh one is protected
+        self.assertTrue(old_batch.preempted)
+        self.assertFalse(new_batch.preempted)
+        self.assertFalse(normal.preempted)
+        self.assertEqual(scheduler.preemptions, 1)
+
+    def test_no_preemption_within_min_run_time_or_same_class(self):
+        scheduler = self.make_scheduler(max_inflight=1)
+        running = FakeSyscall(0, priority=PRIORITY_CLASSES["batch"])
+        scheduler._admit([running])
+        self.dispatch(scheduler)
+        running.start_time = time.time()
+
+        scheduler._admit([FakeSyscall(1, priority=PRIORITY_CLASSES["realtime"])])
+        scheduler._maybe_preempt()
+        self.assertFalse(running.preempted)
+
+        running.start_time = time.time() - 5
+        scheduler.heap.clear()
+        scheduler._admit([FakeSyscall(2, priority=PRIORITY_CLASSES["batch"])])
+        scheduler._maybe_preempt()
+        self.assertFalse(running.preempted)
+
+    def test_set_agent_priority(self):
+        scheduler = self.make_scheduler()
+        scheduler.set_agent_priority("assistant", "interactive")
+        self.assertEqual(scheduler._base_priority(FakeSyscall(0, agent_name="assistant")), PRIORITY_CLASSES["interactive"])
+        # A syscall's own priority wins over its agent's class
+        own = FakeSyscall(1, agent_name="assistant", priority=PRIORITY_CLASSES["batch"])
+        self.assertEqual(scheduler._base_priority(own), PRIORITY_CLASSES["batch"])
+
+        scheduler.set_agent_priority("assistant", None)
+        self.assertEqual(scheduler._base_priority(FakeSyscall(2, agent_name="assistant")), scheduler.default_priority)
+        with self.assertRaises(ValueError):
+            scheduler.set_agent_priority("assistant", "urgent")
+
+    def test_syscalls_drained_before_shutdown_are_dispatched(self):
+        scheduler = self.make_scheduler()
+        syscalls = [FakeSyscall(0), FakeSyscall(1)]
+        scheduler.get_llm_syscall = mock.Mock(side_effect=syscalls + [QueueShutdown()])
+        dispatched = []
+        scheduler.llm = SimpleNamespace(execute_llm_syscalls=lambda batch: dispatched.extend(batch) or [])
+        scheduler.active = True
+
+        scheduler.process_llm_requests()
+        self.assertEqual([syscall.get_pid() for syscall in dispatched], [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from aios.scheduler.sjf_scheduler import SJFScheduler
+from scheduler_fakes import FakeCounter, FakeFuture, FakeSyscall, make_scheduler
+
+
+class TestSJFScheduler(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch("aios.scheduler.sjf_scheduler.get_token_counter", return_value=FakeCounter())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = make_scheduler(SJFScheduler, max_wait=30.0, default_output_tokens=100, preempt_ratio=4.0)
+
+    def dispatch_order(self, syscalls):
+        self.scheduler._admit(syscalls)
+        return [syscall.get_pid() for syscall in self.scheduler._pop_ready()]
+
+    def test_shortest_prompt_first(self):
+        syscalls = [FakeSyscall(0, 500), FakeSyscall(1, 10), FakeSyscall(2, 200)]
+        self.assertEqual(self.dispatch_order(syscalls), [1, 2, 0])
+        self.assertEqual(self.scheduler.get_metrics()["heuristic"], 3)
+
+    def test_output_is_capped_by_max_new_tokens(self):
+        # 50 + 100 default output tokens against 80 + at most 10
+        syscalls = [FakeSyscall(0, 50), FakeSyscall(1, 80, max_new_tokens=10)]
+        self.assertEqual(self.dispatch_order(syscalls), [1, 0])
+        self.assertEqual(self.scheduler._rank(syscalls[1]), 90)
+
+    def test_overdue_requests_go_first(self):
+        now = time.time()
+        syscalls = [
+            FakeSyscall(0, 10, created_time=now),
+            FakeSyscall(1, 900, created_time=now - 60),
+            FakeSyscall(2, 800, created_time=now - 120),
+        ]
+        # Both large jobs waited past max_wait and go first, oldest first
+        self.assertEqual(self.dispatch_order(syscalls), [2, 1, 0])
+        self.assertEqual(self.scheduler.get_metrics()["max_wait_overrides"], 2)
+
+    def test_preempted_request_ranks_by_remaining_work(self):
+        syscall = FakeSyscall(0, 20)
+        self.scheduler._admit([syscall])
+        self.assertEqual(self.scheduler._rank(syscall), 120)
+
+        # A preempted slice generated 70 of the predicted 100 output tokens
+        syscall.status = "suspended"
+        syscall.response = SimpleNamespace(response_message="y" * 70)
+        self.scheduler._forget_arrival(FakeFuture(syscall))
+        self.assertEqual(self.scheduler._rank(syscall), 50)
+
+        syscall.status = "done"
+        self.scheduler._forget_arrival(FakeFuture(syscall))
+        self.assertNotIn(0, self.scheduler.estimates)
+
+    def test_sizing_happens_before_admission(self):
+        syscalls = [FakeSyscall(0, 50), FakeSyscall(1, 20)]
+        lock_held = []
+
+        def predict(new):
+            lock_held.append(self.scheduler.lock.locked())
+            return [None] * len(new)
+
+        with mock.patch.object(self.scheduler, "_predict_output_tokens", side_effect=predict):
+            prepared = self.scheduler._prepare(syscalls)
+            with self.scheduler.lock:
+                self.scheduler._admit(syscalls, prepared)
+        # Sized once, without the lock
+        self.assertEqual(lock_held, [False])
+        self.assertEqual([syscall.get_pid() for syscall in self.scheduler._pop_ready()], [1, 0])
+        self.assertEqual(self.scheduler.get_metrics()["heuristic"], 2)
+
+    def test_preempts_only_much_larger_jobs(self):
+        small, medium, large = FakeSyscall(0, 10), FakeSyscall(1, 300), FakeSyscall(2, 900)
+        self.scheduler._admit([small, medium, large])
+        # Sizes 110, 400 and 1000 against a ratio of 4
+        self.assertFalse(self.scheduler._should_preempt(small, medium))
+        self.assertTrue(self.scheduler._should_preempt(small, large))
+
+
+if __name__ == "__main__":
+    unittest.main()